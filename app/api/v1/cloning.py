@@ -1,14 +1,35 @@
 import os
 import uuid
-from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, Query
+from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
 from app.models.voice import VoiceProfile
-from app.services.audio_service import AudioService
+from app.services.ingest_service import ingest_service, IngestError
+from app.services.inference_executor import inference_executor
+from app.services.voice_library import voice_library, InvalidCursor
 from app.core.config import settings
+from app.core.metrics import span
+import logging
+
+logger = logging.getLogger("uvicorn")
 
 router = APIRouter()
 
+async def _extract_speaker_features(voice: VoiceProfile):
+    """
+    Precomputes the speaker features (x-vector prompt) for a new reference file,
+    so clone synthesis never decodes it again.
+    Not fatal: on failure the features are computed on first use instead.
+    """
+    try:
+        with span("speaker_features"):
+            features = await inference_executor.submit("extract_speaker_features", ref_audio_paths=[voice.file_path])
+        voice.embedding_path = features[0]["embedding_path"]
+        voice.ref_fingerprint = features[0]["fingerprint"]
+    except Exception as e:
+        logger.warning(f"Speaker feature extraction failed for {voice.id}: {e}")
+
 @router.post("/extract")
 async def extract_voice(
     audio: UploadFile = File(...),
@@ -25,41 +46,61 @@ async def extract_voice(
         filename = f"{voice_id}.wav"
         file_path = os.path.join(settings.UPLOAD_DIR, filename)
         
-        # 2. Save Audio File
-        contents = await audio.read()
-        AudioService.save_upload(contents, file_path)
+        # 2. Save Audio File (conditioned: trimmed, length-capped, level-normalized)
+        quality = await ingest_service.ingest(audio, file_path)
         
         # 3. Create Database Entry
-        # Real logic would also run inference here to get the 'embedding' .pt file
         new_voice = VoiceProfile(
             id=voice_id,
             name=name,
             tag=tag,
-            file_path=file_path
+            file_path=file_path,
+            duration_s=quality["duration_s"],
+            snr_db=quality["snr_db"],
+            clipping_ratio=quality["clipping_ratio"]
         )
         
-        db.add(new_voice)
-        await db.commit()
-        await db.refresh(new_voice)
+        # 4. Precompute the speaker embedding (.pt next to the audio)
+        await _extract_speaker_features(new_voice)
+        
+        with span("db_write"):
+            db.add(new_voice)
+            await db.commit()
+            await db.refresh(new_voice)
+        voice_library.invalidate()
         
         return {
             "status": "cloned",
             "voice": new_voice.to_dict()
         }
         
+    except IngestError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 from sqlalchemy.future import select
 @router.get("/list")
-async def list_voices(db: AsyncSession = Depends(get_db)):
+async def list_voices(
+    limit: int = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    tag: Optional[str] = None,
+    type: Optional[str] = None,
+    q: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
     """
-    Returns a list of all available voice profiles.
+    Returns one page of voice profiles, oldest first.
+    Filters: tag, type ("cloned" | "locked" | "preset"), q (name contains).
+    Pass next_cursor back as cursor for the following page (null on the last one).
     """
-    result = await db.execute(select(VoiceProfile))
-    voices = result.scalars().all()
-    return {"voices": [v.to_dict() for v in voices]}
+    limit = min(limit or settings.VOICE_LIST_PAGE_SIZE, settings.VOICE_LIST_MAX_PAGE_SIZE)
+    try:
+        with span("db_lookup"):
+            return await voice_library.list_page(db, limit, cursor=cursor, tag=tag, voice_type=type, q=q)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/lock")
 async def lock_voice(
@@ -78,9 +119,8 @@ async def lock_voice(
         filename = f"locked_{voice_id}.wav"
         file_path = os.path.join(settings.UPLOAD_DIR, filename)
         
-        # 2. Save Audio File (auto-converts to WAV)
-        contents = await audio.read()
-        AudioService.save_upload(contents, file_path)
+        # 2. Save Audio File (auto-converts to WAV, conditioned like /extract)
+        quality = await ingest_service.ingest(audio, file_path)
         
         # 3. Create Database Entry with type="locked"
         new_voice = VoiceProfile(
@@ -89,26 +129,65 @@ async def lock_voice(
             tag="Locked",
             type="locked",
             prompt=prompt,
-            file_path=file_path
+            file_path=file_path,
+            duration_s=quality["duration_s"],
+            snr_db=quality["snr_db"],
+            clipping_ratio=quality["clipping_ratio"]
         )
         
-        db.add(new_voice)
-        await db.commit()
-        await db.refresh(new_voice)
+        # 4. Precompute the speaker embedding (.pt next to the audio)
+        await _extract_speaker_features(new_voice)
+        
+        with span("db_write"):
+            db.add(new_voice)
+            await db.commit()
+            await db.refresh(new_voice)
+        voice_library.invalidate()
         
         return {
             "status": "locked",
             "voice": new_voice.to_dict()
         }
         
+    except IngestError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
-from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
+from app.services.ingest_service import spool_to_disk
+from app.services.voice_import import voice_importer, BulkImportError
+
+@router.post("/import")
+async def import_voices(
+    archive: UploadFile = File(...),
+    tag: str = Form("Imported")
+):
+    """
+    Imports every audio file of a .zip or .tar(.gz) archive as a cloned voice.
+    Names and tags come from an optional manifest.csv (file,name,tag[,prompt]),
+    else from the file name and folder. Files that fail are reported per item.
+    """
+    max_bytes = settings.BULK_IMPORT_MAX_BYTES
+    spool_path = os.path.join(settings.UPLOAD_DIR, f".import_upload_{uuid.uuid4().hex}")
+    try:
+        with span("upload_spool"):
+            await run_in_threadpool(spool_to_disk, archive.file, spool_path, max_bytes, settings.UPLOAD_CHUNK_BYTES)
+        return await voice_importer.import_archive(spool_path, default_tag=tag)
+    except (BulkImportError, IngestError) as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if os.path.exists(spool_path):
+            os.remove(spool_path)
+
+from fastapi import Request
+from app.core.file_response import cached_file_response
 
 @router.get("/download/{voice_id}")
-async def download_voice(voice_id: str, db: AsyncSession = Depends(get_db)):
+async def download_voice(voice_id: str, request: Request, db: AsyncSession = Depends(get_db)):
     """
     Download the audio file for a cloned/locked voice.
     """
@@ -118,17 +197,13 @@ async def download_voice(voice_id: str, db: AsyncSession = Depends(get_db)):
     if not voice:
         raise HTTPException(status_code=404, detail="Voice not found")
     
-    if not voice.file_path or not os.path.exists(voice.file_path):
+    if not voice.file_path:
         raise HTTPException(status_code=404, detail="Audio file not found")
     
     # Return file with proper filename for download
+    # (revalidated via ETag: the reference can be replaced, e.g. by a re-lock)
     filename = f"{voice.name.replace(' ', '_')}.wav"
-    return FileResponse(
-        voice.file_path,
-        media_type="audio/wav",
-        filename=filename,
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
+    return cached_file_response(request, voice.file_path, media_type="audio/wav", filename=filename)
 
 from pydantic import BaseModel
 
@@ -149,5 +224,6 @@ async def update_voice(voice_id: str, request: UpdateVoiceRequest, db: AsyncSess
     voice.name = request.name
     await db.commit()
     await db.refresh(voice)
+    voice_library.invalidate()
     
     return {"status": "updated", "voice": voice.to_dict()}
@@ -0,0 +1,122 @@
+import json
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.core.config import settings
+from app.core.database import get_db, SessionLocal
+from app.core.file_response import cached_file_response
+from app.models.render_job import RenderJob, RenderJobItem
+from app.services.audio_encoder import negotiate
+from app.services.render_jobs import render_jobs, FINISHED_STATUSES
+
+router = APIRouter()
+
+class RenderLine(BaseModel):
+    text: str
+    voice_id: Optional[str] = None
+    voice_prompt: Optional[str] = None
+
+class RenderJobRequest(BaseModel):
+    items: List[RenderLine]
+    format: Optional[str] = None  # wav, flac, opus, mp3 (default: OUTPUT_FORMAT)
+
+async def _get_job(job_id: str, db: AsyncSession) -> RenderJob:
+    job = await db.get(RenderJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.post("", status_code=202)
+async def create_job(request: RenderJobRequest):
+    """
+    Queues a script for rendering. Returns the job; follow it with
+    GET /jobs/{id} (polling) or GET /jobs/{id}/events (SSE).
+    """
+    items = [item for item in request.items if item.text.strip()]
+    if not items:
+        raise HTTPException(status_code=400, detail="No lines to render")
+    if len(items) > settings.RENDER_JOB_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {settings.RENDER_JOB_MAX_ITEMS} lines per job")
+    try:
+        fmt = negotiate(request.format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    job = await render_jobs.submit([item.model_dump() for item in items], fmt.name)
+    return {"status": "queued", "job": job.to_dict()}
+
+@router.get("/{job_id}")
+async def get_job(job_id: str, items: bool = False, db: AsyncSession = Depends(get_db)):
+    """
+    Job progress. items=true also lists every line with its status.
+    """
+    job = await _get_job(job_id, db)
+    response = {"job": job.to_dict()}
+    if items:
+        result = await db.execute(
+            select(RenderJobItem).where(RenderJobItem.job_id == job_id).order_by(RenderJobItem.position)
+        )
+        response["items"] = [item.to_dict() for item in result.scalars().all()]
+    return response
+
+@router.get("/{job_id}/events")
+async def job_events(job_id: str, request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Server-Sent Events: a "progress" event on every finished line,
+    then one "end" event when the job is done, failed or cancelled.
+    """
+    await _get_job(job_id, db)
+
+    async def events():
+        while True:
+            async with SessionLocal() as session:
+                job = await session.get(RenderJob, job_id)
+                state = job.to_dict()
+            finished = state["status"] in FINISHED_STATUSES
+            yield f"event: {'end' if finished else 'progress'}\ndata: {json.dumps(state)}\n\n"
+            if finished or await request.is_disconnected():
+                return
+            await render_jobs.wait_for_update(job_id, timeout=15.0)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.delete("/{job_id}")
+async def cancel_job(job_id: str, db: AsyncSession = Depends(get_db)):
+    """
+    Cancels a queued or running job. Lines already rendered are kept.
+    """
+    job = await _get_job(job_id, db)
+    if not await render_jobs.cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"Job is already {job.status}")
+    return {"status": "cancelled", "job_id": job_id}
+
+@router.get("/{job_id}/download")
+async def download_job(job_id: str, request: Request, kind: str = "zip", db: AsyncSession = Depends(get_db)):
+    """
+    All outputs of a finished job: kind=zip (one file per line + manifest.json)
+    or kind=track (all lines joined into a single file, RENDER_JOB_GAP_MS apart).
+    """
+    if kind not in ("zip", "track"):
+        raise HTTPException(status_code=400, detail="kind must be 'zip' or 'track'")
+    job = await _get_job(job_id, db)
+    if job.status not in FINISHED_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status} ({job.completed}/{job.total} lines)")
+    if job.completed == 0:
+        raise HTTPException(status_code=404, detail="Job has no rendered lines")
+
+    try:
+        path = await render_jobs.build_output(job, kind)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    fmt = negotiate(job.format)
+    media_type = "application/zip" if kind == "zip" else fmt.media_type
+    filename = f"job_{job.id}.zip" if kind == "zip" else f"job_{job.id}.{fmt.extension}"
+    return cached_file_response(request, path, media_type=media_type, filename=filename)
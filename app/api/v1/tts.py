@@ -1,10 +1,22 @@
-import uuid
-import os
-from fastapi import APIRouter, HTTPException, Depends
+import asyncio
+import time
+from urllib.parse import quote
+from fastapi import APIRouter, HTTPException, Depends, Request, BackgroundTasks
+from fastapi.responses import StreamingResponse, Response
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 from typing import Optional
-from app.services.tts_service import tts_service
+from app.services.batch_scheduler import batch_scheduler
+from app.services.inference_executor import inference_executor
+from app.services.result_cache import result_cache
+from app.services.audio_encoder import negotiate
+from app.services.synthesis import resolve_voice, render
+from app.services.admission import admission, AdmissionRejected, ClientDisconnected, run_until_disconnect
+from app.services.voice_library import voice_library
+from app.services.output_store import output_store
+from app.services.streaming import split_sentences, stream_sentences, latency_stats
 from app.core.config import settings
+from app.core.metrics import span
 
 router = APIRouter()
 
@@ -13,68 +25,148 @@ class TTSRequest(BaseModel):
     voice_id: Optional[str] = None
     voice_prompt: Optional[str] = None
     speed: float = 1.0
+    format: Optional[str] = None  # wav, flac, opus, mp3 (default: Accept header, then OUTPUT_FORMAT)
+    response_mode: str = "url"  # "url": JSON with audio_url, "inline": audio bytes in the response body
+    deadline_s: Optional[float] = None  # Give up (504) after this long, including time spent queued
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
 from app.core.database import get_db
-from app.models.voice import VoiceProfile
+
+def _client_id(http_request: Request) -> str:
+    """Fair-queuing key: X-Client-Id if the client sends one, else its address."""
+    client_id = http_request.headers.get("x-client-id")
+    if client_id:
+        return client_id
+    return http_request.client.host if http_request.client else "anonymous"
+
+def _deadline(request: TTSRequest):
+    """Absolute time.monotonic() deadline: the request's own, capped by REQUEST_DEADLINE_S."""
+    limits = [t for t in (request.deadline_s, settings.REQUEST_DEADLINE_S) if t]
+    return time.monotonic() + min(limits) if limits else None
 
 @router.post("/generate")
-async def generate_speech(request: TTSRequest, db: AsyncSession = Depends(get_db)):
+async def generate_speech(
+    request: TTSRequest,
+    http_request: Request,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+):
     """
     Generate speech from text using Qwen3-TTS.
+    response_mode="inline" returns the audio itself (metadata in X-* headers)
+    instead of a URL to download it from.
     """
+    if request.response_mode not in ("url", "inline"):
+        raise HTTPException(status_code=400, detail="response_mode must be 'url' or 'inline'")
     try:
-        # Lookup Voice Instruction if ID provided
-        instruction = None
-        ref_audio_path = None
+        fmt = negotiate(request.format, http_request.headers.get("accept"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def _generate():
+        started = time.perf_counter()
+        with span("db_lookup"):
+            model, extra = await resolve_voice(db, request.voice_id, request.voice_prompt)
         
-        # Priority 1: Direct Voice Prompt (Dynamic Mode)
-        if request.voice_prompt:
-            instruction = request.voice_prompt
-            
-        # Priority 2: Database Lookup by ID (Library/Clone Mode)
-        elif request.voice_id:
-            result = await db.execute(select(VoiceProfile).where(VoiceProfile.id == request.voice_id))
-            voice_profile = result.scalars().first()
-            if voice_profile:
-                # Check if this is a cloned voice (has reference audio)
-                if voice_profile.file_path and os.path.exists(voice_profile.file_path):
-                    ref_audio_path = voice_profile.file_path
-                # Otherwise use prompt-based generation
-                elif voice_profile.prompt:
-                    instruction = voice_profile.prompt
+        # 1. Generate Audio (clone or synthesize), batched with concurrent requests
+        #    Identical lines for the same voice are served from the result cache
+        audio_data = await render(request.text, model, extra, fmt, voice_id=request.voice_id, speed=request.speed)
         
-        # 1. Generate Audio (clone or synthesize)
-        if ref_audio_path:
-            # Voice Cloning Mode
-            audio_data = tts_service.clone(
-                text=request.text,
-                ref_audio_path=ref_audio_path,
-                speed=request.speed
-            )
-        else:
-            # Voice Design Mode (text prompt)
-            audio_data = tts_service.generate(
-                text=request.text, 
-                voice_embedding=request.voice_id, 
-                instruction=instruction,
-                speed=request.speed
-            )
+        # 2. Save to the output vault (sharded, indexed, garbage collected)
+        filename = output_store.new_filename(fmt.extension)
+        audio_url = f"/audio/download/{filename}"
         
-        # 2. Save to Output Directory
-        filename = f"gen_{uuid.uuid4().hex}.wav"
-        output_path = os.path.join(settings.OUTPUT_DIR, filename)
+        if request.response_mode == "inline":
+            # Audio goes out in this response; the vault copy is optional
+            # and written after the response has been sent
+            headers = {
+                "X-Audio-Format": fmt.name,
+                "X-Text-Processed": quote(request.text),
+            }
+            if settings.INLINE_PERSIST == "background":
+                background_tasks.add_task(output_store.save, filename, audio_data, "inline")
+                headers["X-Audio-Url"] = audio_url
+            elapsed = time.perf_counter() - started
+            latency_stats["generate"].record(elapsed, elapsed)
+            return Response(content=audio_data, media_type=fmt.media_type, headers=headers)
+        
+        await output_store.save(filename, audio_data)
         
-        with open(output_path, "wb") as f:
-            f.write(audio_data)
-            
         # 3. Return URL
+        elapsed = time.perf_counter() - started
+        latency_stats["generate"].record(elapsed, elapsed)
         return {
             "status": "success",
-            "audio_url": f"/audio/download/{filename}",
+            "audio_url": audio_url,
+            "format": fmt.name,
             "text_processed": request.text
         }
-            
+
+    deadline = _deadline(request)
+    try:
+        async with admission.slot(_client_id(http_request), deadline):
+            return await run_until_disconnect(http_request, _generate(), deadline)
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except ClientDisconnected:
+        # Nobody is listening; the queued synthesis has been dropped
+        return Response(status_code=499)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Deadline exceeded")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/stats")
+async def scheduler_stats():
+    """
+    Batching statistics (batch size distribution, queue wait times),
+    result cache hit/miss counters, generate vs. stream latency and
+    model residency (memory, load/unload/wait times; thread and server
+    backends, process workers keep their own models).
+    """
+    return {
+        "scheduler": batch_scheduler.stats(),
+        "executor": inference_executor.stats(),
+        "models": await inference_executor.model_stats(),
+        "admission": admission.stats(),
+        "result_cache": result_cache.stats(),
+        "voice_library": voice_library.stats(),
+        "outputs": output_store.stats(),
+        "latency": {path: tracker.stats() for path, tracker in latency_stats.items()},
+    }
+
+@router.post("/stream")
+async def stream_speech(request: TTSRequest, http_request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Streaming synthesis: splits the text into sentences and sends a chunked
+    WAV (PCM16) response as each sentence finishes, for low time-to-first-audio.
+    The admission slot is held until the last chunk is sent (or the client leaves).
+    """
+    with span("db_lookup"):
+        model, extra = await resolve_voice(db, request.voice_id, request.voice_prompt)
+    sentences = split_sentences(request.text)
+    if not sentences:
+        raise HTTPException(status_code=400, detail="Text is empty")
+
+    try:
+        slot = await admission.acquire(_client_id(http_request), _deadline(request))
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+    async def synthesize(sentence: str):
+        wav, sr, _ = await batch_scheduler.submit(model, sentence, extra)
+        return wav, sr
+
+    async def chunks():
+        try:
+            async for chunk in stream_sentences(sentences, synthesize):
+                yield chunk
+        finally:
+            slot.release()
+
+    return StreamingResponse(
+        chunks(),
+        media_type="audio/wav",
+        headers={"X-Sentence-Count": str(len(sentences))},
+        background=BackgroundTask(slot.release),  # in case the stream never started
+    )
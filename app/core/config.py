@@ -9,9 +9,19 @@ class Settings(BaseSettings):
     BASE_DIR: str = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     UPLOAD_DIR: str = os.path.join(BASE_DIR, "vault/voices")
     OUTPUT_DIR: str = os.path.join(BASE_DIR, "vault/generated")
+    RESULT_CACHE_DIR: str = os.path.join(BASE_DIR, "vault/cache")
     
     # Database
     DATABASE_URL: str = "sqlite+aiosqlite:///./minestream.db"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000 # Writers wait this long for a lock instead of failing
+
+    # Voice library listing (/clone/list)
+    VOICE_LIST_PAGE_SIZE: int = 50
+    VOICE_LIST_MAX_PAGE_SIZE: int = 200
+    VOICE_LIST_CACHE_SIZE: int = 128 # Cached pages per process (0 disables)
+    VOICE_LIST_CACHE_TTL_S: float = 30.0 # Bounds staleness across API worker processes
     
     # AI Models
     # VoiceDesign model for text-prompt based voice synthesis
@@ -19,7 +29,100 @@ class Settings(BaseSettings):
     # Base model for voice cloning from reference audio
     TTS_CLONE_MODEL_PATH: str = "Qwen/Qwen3-TTS-12Hz-1.7B-Base"
     USE_GPU: bool = True
-    QUANTIZATION: str = "fp16" # options: fp16, int8, or none
+    QUANTIZATION: str = "fp16" # options: fp16, bf16, int8, or none (see app/services/precision.py)
+    MODEL_SNAPSHOT_DIR: str = "" # Load models from snapshots written by scripts/export_snapshot.py ("" = off)
+    MODEL_SNAPSHOT_MMAP: bool = True # Memory-map CPU weights from the snapshot (shared page cache across processes)
+
+    # Model residency
+    PRELOAD_MODELS: str = "voice_design,clone" # Loaded at startup; others on first use ("" = fully lazy)
+    MODEL_MEMORY_BUDGET_MB: int = 0 # Unload idle models above this (0 = unlimited)
+    MODEL_IDLE_TIMEOUT_S: float = 0 # Unload models unused for this long (0 = never)
+    MODEL_IDLE_ACTION: str = "unload" # options: unload, or offload (move to CPU RAM, CUDA only)
+
+    # Inference Executor
+    INFERENCE_BACKEND: str = "thread" # options: thread, process, server (shared model server process), or replicas (pinned CPU replicas)
+    INFERENCE_WORKERS: int = 1 # Each process worker loads its own copy of the models
+    INFERENCE_QUEUE_SIZE: int = 64 # Jobs waiting for a worker before submit() blocks
+
+    # CPU replica pool (INFERENCE_BACKEND=replicas): K model copies, each pinned to its own cores
+    CPU_REPLICAS: int = 0 # 0 = usable cores // CPU_THREADS_PER_REPLICA (one per 4 cores if both are 0)
+    CPU_THREADS_PER_REPLICA: int = 0 # torch intra-op threads = cores per replica (0 = equal share)
+    CPU_INTEROP_THREADS: int = 1
+    CPU_PIN_REPLICAS: bool = True # sched_setaffinity each replica to its core set (Linux)
+
+    # Model server (INFERENCE_BACKEND=server): one process owns the models, API workers connect to it
+    MODEL_SERVER_SOCKET: str = os.path.join(BASE_DIR, "vault/model_server.sock")
+    MODEL_SERVER_AUTOSTART: bool = True # Start it on demand (otherwise run: python -m app.services.model_server)
+    MODEL_SERVER_LINGER_S: float = 30.0 # An autostarted server exits this long after its last client left
+    MODEL_SERVER_START_TIMEOUT_S: float = 30.0
+    MODEL_SERVER_SHM_MIN_BYTES: int = 64 * 1024 # Smaller arrays are pickled instead of using shared memory
+
+    # Startup warmup: synthetic lines through the preloaded models; /health is 503 until it finishes
+    WARMUP_ENABLED: bool = False # Opt-in: on CPU every worker/replica warms up, which can take minutes
+    WARMUP_TEXT_WORDS: str = "8" # Line length buckets (words), e.g. "4,16,48"
+    WARMUP_BATCH_SIZES: str = "1" # e.g. "1,8" to also warm full batches
+
+    # torch.compile (compiled graphs are cached on disk, so restarts skip recompiling)
+    TORCH_COMPILE: bool = False
+    TORCH_COMPILE_MODE: str = "default" # options: default, reduce-overhead, max-autotune
+    TORCH_COMPILE_MODULES: str = "talker" # Submodules of the model to compile ("" = the whole model)
+    COMPILE_CACHE_DIR: str = os.path.join(BASE_DIR, "vault/compile_cache")
+
+    # Micro-batching
+    BATCH_WINDOW_MS: float = 20.0 # How long the first request of a batch waits for company
+    BATCH_MAX_SIZE: int = 8 # Flush immediately once this many requests are queued (1 disables batching)
+
+    # Admission control for /tts/generate and /tts/stream
+    ADMISSION_MAX_INFLIGHT: int = 16 # Requests synthesizing at once (keep >= BATCH_MAX_SIZE)
+    ADMISSION_MAX_QUEUE: int = 64 # Waiting beyond this returns 503 + Retry-After
+    ADMISSION_MAX_QUEUE_PER_CLIENT: int = 16 # Per client (X-Client-Id or IP); beyond this returns 429
+    REQUEST_DEADLINE_S: float = 120.0 # Upper bound for a request's deadline_s (0 = none)
+
+    # Speaker embeddings (clone prompts) kept in memory per worker
+    SPEAKER_CACHE_SIZE: int = 256
+
+    # Synthesis result cache (content-addressed, on disk)
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_MAX_BYTES: int = 1024 * 1024 * 1024 # 1 GB
+    RESULT_CACHE_TTL_S: float = 7 * 24 * 3600 # 0 disables expiry
+    RESULT_CACHE_KEEP_ENCODED: bool = True # Also cache the Opus/MP3/FLAC variants, not just the WAV
+
+    # Output encoding (per request: "format" field or Accept header)
+    OUTPUT_FORMAT: str = "wav" # options: wav, flac, opus, mp3
+    OPUS_BITRATE_KBPS: int = 32
+    MP3_BITRATE_KBPS: int = 64
+    INLINE_PERSIST: str = "background" # options: background (vault copy written after an inline response), or off
+
+    # Streaming synthesis (/tts/stream)
+    STREAM_MIN_SENTENCE_CHARS: int = 24 # Shorter sentences are merged into the next one
+    STREAM_LOOKAHEAD: int = 1 # Sentences synthesized ahead of the one being sent
+    STREAM_CROSSFADE_MS: float = 15.0
+
+    # Reference audio uploads (/clone/extract, /clone/lock)
+    UPLOAD_MAX_BYTES: int = 25 * 1024 * 1024 # 0 = unlimited
+    UPLOAD_MAX_SECONDS: float = 60.0 # Longest accepted reference clip (0 = unlimited)
+    UPLOAD_CHUNK_BYTES: int = 1024 * 1024 # Spool-to-disk chunk size
+    INGEST_WORKERS: int = 2 # Decode/resample processes (each imports torch)
+    REFERENCE_CONDITIONING: bool = True # Trim silence, cap length and normalize level of references at upload
+    REFERENCE_MAX_SECONDS: float = 10.0 # Longest stored reference: the most speech-dense window is kept (0 = no cap)
+    REFERENCE_TRIM_PAD_MS: float = 150.0 # Silence kept around the speech when trimming
+    REFERENCE_TARGET_DBFS: float = -20.0 # Speech level after normalization
+
+    # Bulk voice import (/clone/import, scripts/import_voices.py)
+    BULK_IMPORT_MAX_BYTES: int = 2 * 1024 * 1024 * 1024 # Archive size (0 = unlimited)
+    BULK_IMPORT_MAX_ITEMS: int = 10000
+    BULK_IMPORT_FEATURE_BATCH: int = 16 # References per speaker feature extraction call
+
+    # Batch script rendering (/jobs)
+    RENDER_JOB_CONCURRENCY: int = 16 # Lines in flight per job (keep >= BATCH_MAX_SIZE so batches fill up)
+    RENDER_JOB_MAX_ITEMS: int = 2000
+    RENDER_JOB_MAX_RUNNING: int = 2 # Jobs rendering at once, later ones stay queued (keep this x RENDER_JOB_CONCURRENCY well below ADMISSION_MAX_QUEUE)
+    RENDER_JOB_GAP_MS: float = 300.0 # Silence between lines in the joined track
+
+    # Generated audio vault (OUTPUT_DIR): hash-sharded files, indexed in the database
+    OUTPUT_RETENTION_S: float = 0 # Outputs and finished render jobs older than this are deleted (0 = keep forever, e.g. 604800 = 7 days)
+    OUTPUT_MAX_BYTES: int = 0 # Disk quota for generated outputs: oldest are deleted above it (0 = unlimited)
+    OUTPUT_GC_INTERVAL_S: float = 300.0
 
     class Config:
         env_file = ".env"
@@ -29,3 +132,4 @@ settings = Settings()
 # Ensure directories exist
 os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
 os.makedirs(settings.OUTPUT_DIR, exist_ok=True)
+os.makedirs(settings.RESULT_CACHE_DIR, exist_ok=True)
@@ -0,0 +1,72 @@
+import os
+import re
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+from fastapi import Request
+from fastapi.responses import FileResponse, JSONResponse, Response
+
+# Generated outputs are never rewritten: a name always refers to the same bytes
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Everything else may be replaced under the same URL: cache, but revalidate
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Plain file names only (no separators, no leading dot)
+SAFE_FILENAME = re.compile(r"^[A-Za-z0-9_-][A-Za-z0-9_.-]*$")
+
+
+def strong_etag(stat_result: os.stat_result) -> str:
+    return f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison (RFC 9110 13.1.2)
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def _not_modified_since(if_modified_since: str, stat_result: os.stat_result) -> bool:
+    try:
+        return int(stat_result.st_mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def cached_file_response(
+    request: Request,
+    path: str,
+    media_type: str,
+    immutable: bool = False,
+    filename: str = None,
+) -> Response:
+    """
+    Serves a file with a strong ETag, Last-Modified and Cache-Control.
+    Answers conditional GETs (If-None-Match / If-Modified-Since) with 304;
+    Range / If-Range requests get 206 from FileResponse.
+    Costs one stat() per request, also when the file is missing.
+    """
+    try:
+        stat_result = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return JSONResponse(status_code=404, content={"detail": "File not found"})
+    if not stat.S_ISREG(stat_result.st_mode):
+        return JSONResponse(status_code=404, content={"detail": "File not found"})
+
+    etag = strong_etag(stat_result)
+    headers = {
+        "etag": etag,
+        "cache-control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, etag)
+    else:
+        not_modified = if_modified_since is not None and _not_modified_since(if_modified_since, stat_result)
+    if not_modified:
+        headers["last-modified"] = formatdate(stat_result.st_mtime, usegmt=True)
+        return Response(status_code=304, headers=headers)
+
+    # stat_result is reused, so FileResponse doesn't stat the file again
+    return FileResponse(path, media_type=media_type, headers=headers, filename=filename, stat_result=stat_result)
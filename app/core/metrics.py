@@ -0,0 +1,252 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+import logging
+
+logger = logging.getLogger("uvicorn")
+
+# Spans recorded while handling the current HTTP request: [(stage, seconds), ...]
+# Tasks created by the handler inherit the same list.
+_request_spans = contextvars.ContextVar("request_spans", default=None)
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{str(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        REGISTRY.register(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(n, "") for n in self.labels)
+
+    def render(self) -> list:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> list:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        super().__init__(name, help, labels)
+        self._values = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> list:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, k)} {v}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """
+    Gauge whose values are read from a callback at scrape time.
+    The callback returns {label values tuple: value}.
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        super().__init__(name, help, labels)
+        self._fn = None
+
+    def set_function(self, fn):
+        self._fn = fn
+
+    def _samples(self) -> list:
+        if self._fn is None:
+            return []
+        try:
+            values = self._fn()
+        except Exception as e:
+            logger.warning(f"Gauge {self.name} failed: {e}")
+            return []
+        return [f"{self.name}{_format_labels(self.labels, k)} {v}" for k, v in values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # key -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            i = bisect.bisect_left(self.buckets, value)
+            if i < len(self.buckets):
+                row[i] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def _samples(self) -> list:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        lines = []
+        for key, row in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, row):
+                cumulative += n
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {row[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {row[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {row[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric: _Metric):
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_SECONDS = Histogram("minestream_request_seconds", "HTTP request latency", ("method", "route", "status"))
+STAGE_SECONDS = Histogram("minestream_stage_seconds", "Time spent per pipeline stage", ("stage",))
+QUEUE_DEPTH = Gauge("minestream_queue_depth", "Requests waiting in a queue", ("queue",))
+REALTIME_FACTOR = Histogram(
+    "minestream_realtime_factor", "Audio seconds produced per wall second of inference", ("model",),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0),
+)
+AUDIO_SECONDS = Counter("minestream_audio_seconds_total", "Seconds of audio synthesized", ("model",))
+FALLBACKS = Counter("minestream_fallback_total", "Inference fallbacks (mock audio or clone->design)", ("model", "kind"))
+OUTPUT_BYTES = Counter("minestream_output_bytes_total", "Audio bytes sent to clients", ("route",))
+
+
+@contextmanager
+def span(stage: str):
+    """
+    Times a pipeline stage: feeds the per-stage histogram and, inside an HTTP
+    request, the request's timing log / Server-Timing header.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((stage, elapsed))
+
+
+def request_spans():
+    """Span list of the current HTTP request (None outside one)."""
+    return _request_spans.get()
+
+
+def span_context(spans: list) -> contextvars.Context:
+    """Copy of the current context in which span() records into spans."""
+    context = contextvars.copy_context()
+    context.run(_request_spans.set, spans)
+    return context
+
+
+def record_inference(model: str, wavs: list, sr: int, seconds: float):
+    audio_s = sum(len(w) for w in wavs) / sr if sr else 0.0
+    AUDIO_SECONDS.inc(audio_s, model=model)
+    if seconds > 0:
+        REALTIME_FACTOR.observe(audio_s / seconds, model=model)
+
+
+def _route_label(scope) -> str:
+    """
+    Templated path of the matched route ("/api/v1/clone/download/{voice_id}"),
+    so per-ID URLs don't each get their own time series. Routes of included
+    routers only know their own suffix, the prefix is taken from the URL.
+    """
+    route = scope.get("route")
+    path = scope["path"]
+    regex = getattr(route, "path_regex", None)
+    if regex is None:
+        return "unmatched"  # 404s would otherwise add one series per URL
+    for i, ch in enumerate(path):
+        if ch == "/" and regex.match(path[i:]):
+            return path[:i] + route.path
+    return route.path
+
+
+class TimingMiddleware:
+    """
+    ASGI middleware: collects spans per request, adds a Server-Timing header,
+    logs one structured timing line and records request latency / audio bytes.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        spans = []
+        token = _request_spans.set(spans)
+        started = time.perf_counter()
+        status = 500
+        audio = False
+        nbytes = 0
+
+        async def send_wrapper(message):
+            nonlocal status, audio, nbytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                content_type = dict(headers).get(b"content-type", b"")
+                audio = content_type.startswith(b"audio/")
+                if spans:
+                    timing = ", ".join(f"{stage.replace('.', '-')};dur={sec * 1000:.1f}" for stage, sec in spans)
+                    headers.append((b"server-timing", timing.encode("latin-1")))
+                message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body" and audio:
+                nbytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_spans.reset(token)
+            elapsed = time.perf_counter() - started
+            route_path = _route_label(scope)
+            REQUEST_SECONDS.observe(elapsed, method=scope["method"], route=route_path, status=status)
+            if nbytes:
+                OUTPUT_BYTES.inc(nbytes, route=route_path)
+            if spans:
+                stages = " ".join(f"{stage}={sec * 1000:.1f}ms" for stage, sec in spans)
+                logger.info(f"timing {scope['method']} {scope['path']} status={status} total={elapsed * 1000:.1f}ms {stages}")
@@ -0,0 +1,64 @@
+from fastapi.responses import JSONResponse
+from app.core.config import settings
+
+# Multipart framing and form fields around the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadLimitMiddleware:
+    """
+    ASGI middleware: rejects uploads with 413 before the body is read.
+
+    limits maps a request path to the settings attribute holding its byte
+    limit. The Content-Length header is checked before the app is called,
+    so form parsing never spools an oversized body. Bodies without one
+    (chunked) are cut off as soon as they exceed the limit. The exact size
+    of the file is still checked while it is spooled (spool_to_disk).
+    """
+
+    def __init__(self, app, limits: dict):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        setting = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        max_bytes = getattr(settings, setting) if setting else 0
+        if not max_bytes:
+            await self.app(scope, receive, send)
+            return
+
+        limit = max_bytes + MULTIPART_OVERHEAD
+        length = dict(scope["headers"]).get(b"content-length", b"")
+        if length.isdigit() and int(length) > limit:
+            await self._reject(scope, receive, send, max_bytes)
+            return
+
+        received = 0
+        rejected = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            message = await receive()
+            if message["type"] == "http.request" and not rejected:
+                received += len(message.get("body", b""))
+                if received > limit:
+                    rejected = True
+                    await self._reject(scope, receive, send, max_bytes)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            # The app's answer to the cut-off body; the 413 already went out
+            if not rejected:
+                await send(message)
+
+        await self.app(scope, limited_receive, guarded_send)
+
+    @staticmethod
+    async def _reject(scope, receive, send, max_bytes: int):
+        response = JSONResponse(
+            {"detail": f"Upload exceeds the {max_bytes // (1024 * 1024)} MB limit"},
+            status_code=413,
+            headers={"Connection": "close"},
+        )
+        await response(scope, receive, send)
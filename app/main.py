@@ -1,50 +1,145 @@
-import os
+import asyncio
+import inspect
+import time
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.core.database import init_db
-from app.services.tts_service import tts_service
-from app.api.v1 import tts, cloning
+from app.core.metrics import REGISTRY, QUEUE_DEPTH, TimingMiddleware
+from app.core.file_response import cached_file_response, SAFE_FILENAME
+from app.core.upload_limit import UploadLimitMiddleware
+from app.services.inference_executor import inference_executor
+from app.services.batch_scheduler import batch_scheduler
+from app.services.result_cache import result_cache
+from app.services.admission import admission
+from app.services.ingest_service import ingest_service
+from app.services.audio_encoder import format_for_filename
+from app.services.render_jobs import render_jobs
+from app.services.output_store import output_store
+from app.api.v1 import tts, cloning, jobs
+import logging
+
+logger = logging.getLogger("uvicorn")
+
+async def run_warmup(app: FastAPI):
+    """
+    Synthetic requests through every copy of the models (each process
+    worker / replica), in the background. /health answers 503 until done.
+    """
+    started = time.perf_counter()
+    try:
+        results = await inference_executor.warmup()
+        failed = any(isinstance(r, str) and r.startswith("failed") for r in results.values())
+        app.state.warmup = {"status": "degraded" if failed else "ready", "models": results}
+    except Exception as e:
+        logger.warning(f"Warmup failed: {e}")
+        app.state.warmup = {"status": "degraded", "error": str(e)}
+    app.state.warmup["seconds"] = round(time.perf_counter() - started, 2)
+
+def start_warmup(app: FastAPI):
+    if not settings.WARMUP_ENABLED:
+        app.state.warmup = {"status": "ready", "skipped": True}
+        return
+    app.state.warmup = {"status": "warming"}
+    app.state.warmup_task = asyncio.create_task(run_warmup(app))
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
-    await init_db()
-    tts_service.initialize_model()
+    # Startup (model loading is timed per phase by the model manager)
+    phases = []
+    for phase, step in (
+        ("database", init_db),
+        ("result_cache", result_cache.load_index),
+        ("inference_executor", inference_executor.start),
+        ("warmup", lambda: start_warmup(app)),
+        ("render_jobs", render_jobs.start),
+        ("output_store", output_store.start),
+    ):
+        started = time.perf_counter()
+        result = step()
+        if inspect.isawaitable(result):
+            await result
+        phases.append(f"{phase}={time.perf_counter() - started:.2f}s")
+    logger.info(f"Startup: {' '.join(phases)}")
     yield
     # Shutdown
-    # clean up resources if needed
+    if getattr(app.state, "warmup_task", None) is not None:
+        app.state.warmup_task.cancel()
+    await render_jobs.stop()
+    await output_store.stop()
+    await batch_scheduler.stop()
+    await inference_executor.stop()
+    ingest_service.shutdown()
 
 app = FastAPI(
     title=settings.PROJECT_NAME, 
     lifespan=lifespan
 )
 
+# Oversized uploads are refused from Content-Length, before the body is read
+app.add_middleware(UploadLimitMiddleware, limits={
+    f"{settings.API_V1_STR}/clone/extract": "UPLOAD_MAX_BYTES",
+    f"{settings.API_V1_STR}/clone/lock": "UPLOAD_MAX_BYTES",
+    f"{settings.API_V1_STR}/clone/import": "BULK_IMPORT_MAX_BYTES",
+})
+
+# Per-request timing spans, Server-Timing header and request metrics
+app.add_middleware(TimingMiddleware)
+
+QUEUE_DEPTH.set_function(lambda: {
+    ("admission",): admission.queue_depth,
+    ("inference",): inference_executor.queue_depth,
+    ("batch_design",): batch_scheduler.queue_depth("design"),
+    ("batch_clone",): batch_scheduler.queue_depth("clone"),
+})
+
 # CORS checks
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    # Metadata of inline (/tts/generate response_mode="inline") and streamed audio
+    expose_headers=["X-Audio-Format", "X-Audio-Url", "X-Text-Processed", "X-Sentence-Count", "Server-Timing"],
 )
 
 # Include Routers
 app.include_router(tts.router, prefix=f"{settings.API_V1_STR}/tts", tags=["TTS"])
 app.include_router(cloning.router, prefix=f"{settings.API_V1_STR}/clone", tags=["Cloning"])
+app.include_router(jobs.router, prefix=f"{settings.API_V1_STR}/jobs", tags=["Jobs"])
 
 @app.get("/audio/download/{filename}")
-async def download_audio(filename: str):
-    """Serves the generated audio file."""
-    file_path = os.path.join(settings.OUTPUT_DIR, filename)
-    if os.path.exists(file_path):
-        return FileResponse(file_path, media_type="audio/wav")
-    return JSONResponse(status_code=404, content={"detail": "File not found"})
+async def download_audio(filename: str, request: Request):
+    """Serves the generated audio file (cacheable, conditional and range requests)."""
+    if not SAFE_FILENAME.match(filename):
+        return JSONResponse(status_code=404, content={"detail": "File not found"})
+    file_path = output_store.resolve(filename)
+    return cached_file_response(
+        request,
+        file_path,
+        media_type=format_for_filename(filename).media_type,
+        immutable=filename.startswith("gen_"),  # gen_<uuid> files are never rewritten
+    )
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics (per-stage histograms, queue depth, RTF, fallbacks, bytes served)."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/health")
 async def health_check():
-    return {"status": "ok", "device": "cuda" if settings.USE_GPU else "cpu"}
+    """
+    Readiness: 503 while the startup warmup runs, so load balancers only
+    route to a node once its first requests are as fast as the rest.
+    A failed warmup still serves, with warmup status "degraded".
+    """
+    warmup = getattr(app.state, "warmup", {"status": "warming"})
+    body = {"status": "ok", "device": "cuda" if settings.USE_GPU else "cpu", "warmup": warmup}
+    if warmup["status"] == "warming":
+        return JSONResponse({**body, "status": "warming"}, status_code=503)
+    return body
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,16 @@
+import time
+from sqlalchemy import Column, String, Float, Integer, Index
+from app.core.database import Base
+
+# Index of the generated audio vault: one row per stored gen_* file
+class GeneratedOutput(Base):
+    __tablename__ = "generated_outputs"
+    __table_args__ = (
+        # Retention and quota cleanup walk the oldest outputs first
+        Index("ix_generated_outputs_created_at", "created_at"),
+    )
+
+    filename = Column(String, primary_key=True)  # gen_<uuid>.<ext>, stored in its shard directory
+    size = Column(Integer, nullable=False)
+    kind = Column(String, nullable=False, default="generate")  # "generate" | "inline"
+    created_at = Column(Float, default=time.time)
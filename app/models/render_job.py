@@ -0,0 +1,56 @@
+import time
+import uuid
+from sqlalchemy import Column, String, Float, Integer, Index
+from app.core.database import Base
+
+class RenderJob(Base):
+    __tablename__ = "render_jobs"
+
+    id = Column(String, primary_key=True, default=lambda: uuid.uuid4().hex[:12])
+    status = Column(String, nullable=False, default="queued")  # "queued" | "running" | "done" | "failed" | "cancelled"
+    format = Column(String, nullable=False, default="wav")  # Output format of every item
+    total = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    error = Column(String, nullable=True)
+    created_at = Column(Float, default=time.time)
+    finished_at = Column(Float, nullable=True)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "format": self.format,
+            "total": self.total,
+            "completed": self.completed,
+            "failed": self.failed,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+class RenderJobItem(Base):
+    __tablename__ = "render_job_items"
+    __table_args__ = (
+        Index("ix_render_job_items_job_position", "job_id", "position"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(String, nullable=False)
+    position = Column(Integer, nullable=False)  # Order in the script
+    text = Column(String, nullable=False)
+    voice_id = Column(String, nullable=True)
+    voice_prompt = Column(String, nullable=True)
+    status = Column(String, nullable=False, default="pending")  # "pending" | "done" | "failed"
+    output_path = Column(String, nullable=True)
+    error = Column(String, nullable=True)
+
+    def to_dict(self):
+        return {
+            "position": self.position,
+            "text": self.text,
+            "voice_id": self.voice_id,
+            "voice_prompt": self.voice_prompt,
+            "status": self.status,
+            "error": self.error,
+        }
@@ -1,10 +1,16 @@
 import time
 import uuid
-from sqlalchemy import Column, String, Float, Integer
+from sqlalchemy import Column, String, Float, Integer, Index
 from app.core.database import Base
 
 class VoiceProfile(Base):
     __tablename__ = "voice_profiles"
+    __table_args__ = (
+        # Keyset pagination order, unfiltered and per tag / type filter
+        Index("ix_voice_profiles_created_at_id", "created_at", "id"),
+        Index("ix_voice_profiles_tag_created_at", "tag", "created_at", "id"),
+        Index("ix_voice_profiles_type_created_at", "type", "created_at", "id"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: uuid.uuid4().hex[:8])
     name = Column(String, nullable=False)
@@ -12,6 +18,12 @@ class VoiceProfile(Base):
     type = Column(String, default="cloned")  # "cloned" | "locked" | "preset"
     prompt = Column(String, nullable=True) # Text description for VoiceDesign
     file_path = Column(String, nullable=True) # Path to reference audio
+    embedding_path = Column(String, nullable=True) # Precomputed speaker features (.pt)
+    ref_fingerprint = Column(String, nullable=True) # Reference audio size/mtime the features were computed from
+    # Reference quality, measured at upload
+    duration_s = Column(Float, nullable=True) # Stored (conditioned) reference length
+    snr_db = Column(Float, nullable=True)
+    clipping_ratio = Column(Float, nullable=True) # Fraction of full-scale samples in the upload
     created_at = Column(Float, default=time.time)
     
     def to_dict(self):
@@ -21,5 +33,8 @@ class VoiceProfile(Base):
             "tag": self.tag,
             "type": self.type,
             "prompt": self.prompt,
+            "duration_s": self.duration_s,
+            "snr_db": self.snr_db,
+            "clipping_ratio": self.clipping_ratio,
             "created_at": self.created_at
         }
@@ -0,0 +1,199 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from app.core.config import settings
+from app.core.metrics import Counter
+import logging
+
+logger = logging.getLogger("uvicorn")
+
+REJECTED = Counter("minestream_admission_rejected_total", "Synthesis requests turned away", ("reason",))
+
+
+class AdmissionRejected(Exception):
+    """Request not admitted; carries the HTTP status and a Retry-After hint."""
+
+    def __init__(self, message: str, status_code: int, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Bounds how much synthesis work is in flight and how much may wait.
+
+    At most ADMISSION_MAX_INFLIGHT requests run at once (enough to keep
+    the batch scheduler's batches full). Others wait in per-client FIFO
+    queues that are served round-robin, so one client sending a burst
+    can't starve the rest. Requests are turned away immediately when the
+    queue is full (503), when the client already has too many queued
+    (429), or when they would wait past their deadline (504, also when the
+    deadline passes while queued).
+    """
+
+    def __init__(self):
+        self._inflight = 0
+        self._queues = OrderedDict()  # client -> deque of waiter futures; rotation order = fairness order
+        self._queued = 0
+        self._avg_service_s = 1.0  # EWMA of how long a slot is held
+        self.admitted = 0
+        self.rejected = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queued
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free, from queue length and service time."""
+        slots = max(1, settings.ADMISSION_MAX_INFLIGHT)
+        return max(1, math.ceil((self._queued + 1) * self._avg_service_s / slots))
+
+    def _reject(self, reason: str, message: str, status_code: int):
+        self.rejected += 1
+        REJECTED.inc(reason=reason)
+        raise AdmissionRejected(message, status_code, self.retry_after())
+
+    async def acquire(self, client: str, deadline: float = None) -> "AdmissionSlot":
+        """
+        Waits for an in-flight slot; release() it when the work is done.
+        deadline is an absolute time.monotonic() value (None = no limit).
+        Raises AdmissionRejected.
+        """
+        if self._inflight >= settings.ADMISSION_MAX_INFLIGHT:
+            queue = self._queues.get(client)
+            if self._queued >= settings.ADMISSION_MAX_QUEUE:
+                self._reject("queue_full", "Server busy, try again later", 503)
+            if queue is not None and len(queue) >= settings.ADMISSION_MAX_QUEUE_PER_CLIENT:
+                self._reject("client_limit", "Too many queued requests from this client", 429)
+            # Don't queue requests that will time out before their turn
+            if deadline is not None and time.monotonic() + self.retry_after() > deadline:
+                self._reject("deadline", "Server busy, deadline would be exceeded", 504)
+            await self._wait(client, deadline)
+        else:
+            self._inflight += 1
+
+        self.admitted += 1
+        return AdmissionSlot(self)
+
+    @asynccontextmanager
+    async def slot(self, client: str, deadline: float = None):
+        """Holds one in-flight slot for the body of the with-block."""
+        admitted = await self.acquire(client, deadline)
+        try:
+            yield
+        finally:
+            admitted.release()
+
+    def _finished(self, held: float):
+        self._avg_service_s = 0.9 * self._avg_service_s + 0.1 * held
+        self._release()
+
+    async def _wait(self, client: str, deadline: float):
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(client, deque()).append(future)
+        self._queued += 1
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # Slot was handed over just as we gave up: pass it on
+                self._release()
+            else:
+                future.cancel()
+                self._discard(client, future)
+            if isinstance(e, asyncio.TimeoutError):
+                self._reject("deadline", "Deadline exceeded while queued", 504)
+            raise
+
+    def _discard(self, client: str, future: asyncio.Future):
+        queue = self._queues.get(client)
+        if queue is not None and future in queue:
+            queue.remove(future)
+            self._queued -= 1
+            if not queue:
+                del self._queues[client]
+
+    def _release(self):
+        """Hands the freed slot to the next client in round-robin order."""
+        while self._queues:
+            client, queue = next(iter(self._queues.items()))
+            future = queue.popleft()
+            self._queued -= 1
+            if queue:
+                self._queues.move_to_end(client)  # this client goes to the back of the rotation
+            else:
+                del self._queues[client]
+            if not future.done():
+                future.set_result(None)  # slot ownership moves to the waiter
+                return
+        self._inflight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "inflight": self._inflight,
+            "max_inflight": settings.ADMISSION_MAX_INFLIGHT,
+            "queued": self._queued,
+            "max_queue": settings.ADMISSION_MAX_QUEUE,
+            "clients_waiting": len(self._queues),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_service_ms": round(self._avg_service_s * 1000, 1),
+        }
+
+
+class AdmissionSlot:
+    """An admitted request's slot. release() is idempotent."""
+
+    def __init__(self, controller: AdmissionController):
+        self._controller = controller
+        self._started = time.monotonic()
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._controller._finished(time.monotonic() - self._started)
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+async def run_until_disconnect(request, coro, deadline: float = None):
+    """
+    Runs coro, cancelling it if the HTTP client disconnects or the
+    deadline (time.monotonic() value) passes first.
+    Raises ClientDisconnected / asyncio.TimeoutError in those cases.
+
+    Cancelling drops the request from the batch queue; a model call that
+    has already started finishes (torch calls can't be interrupted).
+    """
+    work = asyncio.ensure_future(coro)
+    watcher = asyncio.ensure_future(_wait_for_disconnect(request))
+    timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+    try:
+        done, _ = await asyncio.wait({work, watcher}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+        if not work.done():
+            work.cancel()
+    if work in done:
+        return work.result()
+    if watcher in done:
+        raise ClientDisconnected()
+    raise asyncio.TimeoutError()
+
+
+async def _wait_for_disconnect(request):
+    # The request body has been read already, so the next message is the disconnect
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+admission = AdmissionController()
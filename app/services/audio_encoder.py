@@ -0,0 +1,148 @@
+import io
+from dataclasses import dataclass
+import numpy as np
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class OutputFormat:
+    name: str
+    extension: str
+    media_type: str
+    sf_format: str   # soundfile container
+    sf_subtype: str  # soundfile codec
+
+
+OUTPUT_FORMATS = {
+    "wav": OutputFormat("wav", "wav", "audio/wav", "WAV", "PCM_16"),
+    "flac": OutputFormat("flac", "flac", "audio/flac", "FLAC", "PCM_16"),
+    "opus": OutputFormat("opus", "ogg", "audio/ogg", "OGG", "OPUS"),
+    "mp3": OutputFormat("mp3", "mp3", "audio/mpeg", "MP3", "MPEG_LAYER_III"),
+}
+
+# Accept header media types -> format name
+_MEDIA_TYPES = {
+    "audio/wav": "wav",
+    "audio/x-wav": "wav",
+    "audio/wave": "wav",
+    "audio/flac": "flac",
+    "audio/x-flac": "flac",
+    "audio/ogg": "opus",
+    "audio/opus": "opus",
+    "audio/mpeg": "mp3",
+    "audio/mp3": "mp3",
+}
+
+# libsndfile maps compression_level (0..1) linearly onto these bitrate ranges (kbps)
+_OPUS_KBPS = (6, 256)
+_MP3_KBPS_MPEG1 = (32, 320)  # 32 kHz and up
+_MP3_KBPS_MPEG2 = (8, 160)   # below 32 kHz (the 24 kHz model output)
+
+
+def get_format(name: str) -> OutputFormat:
+    fmt = OUTPUT_FORMATS.get((name or "").lower())
+    if fmt is None:
+        raise ValueError(f"Unknown output format '{name}' (expected one of {list(OUTPUT_FORMATS)})")
+    return fmt
+
+
+def negotiate(requested: str = None, accept: str = None) -> OutputFormat:
+    """
+    Picks the output format: explicit request parameter first, then the
+    audio types in the Accept header (by q-value), then OUTPUT_FORMAT.
+    Types refused with q=0 (also via audio/* or */*) are never picked.
+    """
+    if requested:
+        return get_format(requested)
+
+    explicit, wildcard = {}, {}
+    for item in (accept or "").split(","):
+        media_type, _, params = item.strip().partition(";")
+        media_type = media_type.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = min(max(float(value), 0.0), 1.0)
+                except ValueError:
+                    q = 0.0
+        if media_type in ("audio/*", "*/*"):
+            wildcard[media_type] = q
+            continue
+        name = _MEDIA_TYPES.get(media_type)
+        if name is not None:
+            explicit[name] = max(q, explicit.get(name, 0.0))
+
+    best, best_q = None, 0.0
+    for name, q in explicit.items():
+        if q > best_q:
+            best, best_q = name, q
+    if best is not None:
+        return get_format(best)
+
+    # Nothing asked for by name: the default, unless refused
+    default_q = wildcard.get("audio/*", wildcard.get("*/*", 1.0))
+    candidates = [settings.OUTPUT_FORMAT.lower()] + [name for name in OUTPUT_FORMATS if name != settings.OUTPUT_FORMAT.lower()]
+    for name in candidates:
+        if explicit.get(name, default_q) > 0:
+            return get_format(name)
+    raise ValueError(f"No acceptable audio format in Accept header (available: {list(OUTPUT_FORMATS)})")
+
+
+def format_for_filename(filename: str) -> OutputFormat:
+    """Output format of a stored file, by extension (defaults to WAV)."""
+    extension = filename.rsplit(".", 1)[-1].lower()
+    for fmt in OUTPUT_FORMATS.values():
+        if fmt.extension == extension:
+            return fmt
+    return OUTPUT_FORMATS["wav"]
+
+
+def bitrate_kbps(fmt: OutputFormat):
+    if fmt.name == "opus":
+        return settings.OPUS_BITRATE_KBPS
+    if fmt.name == "mp3":
+        return settings.MP3_BITRATE_KBPS
+    return None
+
+
+def _compression_level(fmt: OutputFormat, sr: int):
+    kbps = bitrate_kbps(fmt)
+    if fmt.name == "opus":
+        low, high = _OPUS_KBPS
+    elif fmt.name == "mp3":
+        low, high = _MP3_KBPS_MPEG1 if sr >= 32000 else _MP3_KBPS_MPEG2
+    else:
+        return None
+    # MP3 rejects exactly 1.0
+    return min(max((high - kbps) / (high - low), 0.0), 0.99)
+
+
+def encode(audio_data, sr: int, fmt: OutputFormat) -> bytes:
+    """
+    Encodes a waveform in the given output format.
+    CPU-bound: call it through run_in_threadpool.
+    """
+    import soundfile as sf
+
+    kwargs = {}
+    level = _compression_level(fmt, sr)
+    if level is not None:
+        kwargs["compression_level"] = level
+        if fmt.name == "mp3":
+            kwargs["bitrate_mode"] = "CONSTANT"
+
+    buffer = io.BytesIO()
+    sf.write(buffer, np.asarray(audio_data, dtype=np.float32), sr, format=fmt.sf_format, subtype=fmt.sf_subtype, **kwargs)
+    return buffer.getvalue()
+
+
+def transcode(wav_bytes: bytes, fmt: OutputFormat) -> bytes:
+    """Re-encodes a cached WAV result in another output format."""
+    import soundfile as sf
+
+    if fmt.name == "wav":
+        return wav_bytes
+    audio, sr = sf.read(io.BytesIO(wav_bytes), dtype="float32")
+    return encode(audio, sr, fmt)
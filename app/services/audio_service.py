@@ -1,26 +1,138 @@
 import os
 import torchaudio
 import torch
+from app.core.config import settings
+from app.services.reference_conditioner import condition_reference, reference_metrics, clipping_ratio
+
+REFERENCE_SAMPLE_RATE = 24000  # Qwen3-TTS reference audio: mono, 24 kHz, 16-bit PCM
+
+
+class AudioConversionError(Exception):
+    """Upload could not be decoded (unsupported or corrupt audio)."""
+
+
+class AudioTooLongError(AudioConversionError):
+    """Decoded audio is longer than the allowed maximum."""
+
 
 class AudioService:
     @staticmethod
-    def save_upload(file_data: bytes, dest_path: str):
+    def convert_file(src_path: str, dest_path: str, max_seconds: float = 0) -> dict:
+        """
+        Decodes an uploaded file and writes it as a mono 24 kHz 16-bit WAV,
+        conditioned for cloning (see reference_conditioner) unless
+        REFERENCE_CONDITIONING is off.
+        Runs inside an ingest worker process. Formats libsndfile understands
+        (WAV, FLAC, OGG, MP3, ...) are decoded in-process; anything else
+        (e.g. the browser's WebM/Opus recordings) is decoded in-process by
+        PyAV if it is installed, else through one ffmpeg process per file.
+        Returns {"original_duration_s", "duration_s", "snr_db", "clipping_ratio"}.
+        """
+        import soundfile as sf
         try:
-            from pydub import AudioSegment
-            import io
-            
-            # Load from bytes (handles WebM, MP3, etc. automatically via ffmpeg)
-            audio = AudioSegment.from_file(io.BytesIO(file_data))
-            
-            # Export as 16-bit PCM WAV
-            audio.export(dest_path, format="wav", parameters=["-ac", "1", "-ar", "24000"]) # Force mono, 24kHz (ideal for Qwen)
-            
-        except Exception as e:
-            # Fallback to direct write if conversion fails or pydub missing
-            print(f"Audio conversion failed: {e}. Saving raw bytes.")
-            with open(dest_path, "wb") as buffer:
-                buffer.write(file_data)
-        return dest_path
+            audio, sample_rate = sf.read(src_path, dtype="float32", always_2d=True)
+        except (sf.LibsndfileError, RuntimeError):
+            try:
+                import av  # noqa: F401
+            except ImportError:
+                waveform = AudioService._decode_with_ffmpeg(src_path, dest_path + ".decoded", max_seconds)
+            else:
+                waveform = AudioService._decode_with_av(src_path, max_seconds)
+            return AudioService._write_reference(waveform, None, dest_path)
+
+        if not len(audio):
+            raise AudioConversionError("Audio file contains no samples")
+        duration = len(audio) / sample_rate
+        if max_seconds and duration > max_seconds:
+            raise AudioTooLongError(f"Audio is {duration:.1f}s long (limit {max_seconds:g}s)")
+
+        mono = audio.mean(axis=1)
+        # Measured before resampling, which smears clipped runs
+        clipping = clipping_ratio(mono)
+        waveform = torch.from_numpy(mono)
+        if sample_rate != REFERENCE_SAMPLE_RATE:
+            waveform = torchaudio.functional.resample(waveform, sample_rate, REFERENCE_SAMPLE_RATE)
+        return AudioService._write_reference(waveform.numpy(), clipping, dest_path)
+
+    @staticmethod
+    def _write_reference(waveform, clipping, dest_path: str) -> dict:
+        import soundfile as sf
+        import numpy as np
+
+        info = {"original_duration_s": round(len(waveform) / REFERENCE_SAMPLE_RATE, 2)}
+        if settings.REFERENCE_CONDITIONING:
+            waveform, metrics = condition_reference(waveform, REFERENCE_SAMPLE_RATE)
+        else:
+            metrics = reference_metrics(waveform, REFERENCE_SAMPLE_RATE)
+        info.update(metrics)
+        if clipping is not None:
+            info["clipping_ratio"] = round(clipping, 5)
+
+        tmp_path = dest_path + ".tmp"
+        sf.write(tmp_path, np.clip(waveform, -1.0, 1.0), REFERENCE_SAMPLE_RATE, format="WAV", subtype="PCM_16")
+        os.replace(tmp_path, dest_path)
+        return info
+
+    @staticmethod
+    def _decode_with_av(src_path: str, max_seconds: float = 0):
+        """Decodes to mono 24 kHz with PyAV (libav in-process); returns the waveform."""
+        import av
+        import numpy as np
+
+        limit = int((max_seconds + 1) * REFERENCE_SAMPLE_RATE) if max_seconds else 0
+        chunks, samples = [], 0
+        try:
+            with av.open(src_path) as container:
+                if not container.streams.audio:
+                    raise AudioConversionError("File has no audio stream")
+                resampler = av.AudioResampler(format="flt", layout="mono", rate=REFERENCE_SAMPLE_RATE)
+                for frame in container.decode(container.streams.audio[0]):
+                    for out in resampler.resample(frame):
+                        chunks.append(out.to_ndarray().reshape(-1))
+                        samples += out.samples
+                    if limit and samples > limit:
+                        break  # stop decoding once the limit is exceeded
+                else:
+                    for out in resampler.resample(None):
+                        chunks.append(out.to_ndarray().reshape(-1))
+                        samples += out.samples
+        except av.FFmpegError as e:
+            raise AudioConversionError(f"Could not decode audio: {e}")
+
+        if not samples:
+            raise AudioConversionError("Audio file contains no samples")
+        if max_seconds and samples / REFERENCE_SAMPLE_RATE > max_seconds:
+            raise AudioTooLongError(f"Audio is longer than the {max_seconds:g}s limit")
+        return np.concatenate(chunks)
+
+    @staticmethod
+    def _decode_with_ffmpeg(src_path: str, tmp_path: str, max_seconds: float = 0):
+        """Decodes to mono 24 kHz through ffmpeg; returns the waveform."""
+        import soundfile as sf
+        import subprocess
+
+        cmd = ["ffmpeg", "-nostdin", "-v", "error", "-y", "-i", src_path]
+        if max_seconds:
+            cmd += ["-t", str(max_seconds + 1)]  # stop decoding once the limit is exceeded
+        cmd += ["-ac", "1", "-ar", str(REFERENCE_SAMPLE_RATE), "-c:a", "pcm_s16le", "-f", "wav", tmp_path]
+        try:
+            try:
+                result = subprocess.run(cmd, capture_output=True, timeout=120)
+            except FileNotFoundError:
+                raise AudioConversionError("Unsupported audio format (ffmpeg is not installed)")
+            if result.returncode != 0:
+                error = result.stderr.decode(errors="replace").strip().splitlines()
+                raise AudioConversionError(f"Could not decode audio: {error[-1] if error else 'ffmpeg failed'}")
+
+            waveform, _ = sf.read(tmp_path, dtype="float32")
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        if not len(waveform):
+            raise AudioConversionError("Audio file contains no samples")
+        if max_seconds and len(waveform) / REFERENCE_SAMPLE_RATE > max_seconds:
+            raise AudioTooLongError(f"Audio is longer than the {max_seconds:g}s limit")
+        return waveform
 
     @staticmethod
     def load_audio(file_path: str, target_sr: int = 24000):
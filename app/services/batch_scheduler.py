@@ -0,0 +1,185 @@
+import asyncio
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from app.core.config import settings
+from app.core.metrics import STAGE_SECONDS, request_spans, span_context
+from app.services.inference_executor import inference_executor
+import logging
+
+logger = logging.getLogger("uvicorn")
+
+# Batch key -> batched TTSService method
+MODEL_METHODS = {
+    "design": "synthesize_design",  # VoiceDesign model
+    "clone": "synthesize_clone",    # Base model
+}
+
+
+@dataclass
+class PendingRequest:
+    text: str
+    extra: str  # instruction (design) or reference audio path (clone)
+    future: asyncio.Future = field(repr=False)
+    enqueued_at: float = field(default_factory=time.perf_counter)
+    spans: list = field(default_factory=request_spans, repr=False)  # caller's request spans
+
+
+class BatchScheduler:
+    """
+    Dynamic micro-batching in front of the inference executor.
+
+    Concurrent requests for the same model are collected for up to
+    BATCH_WINDOW_MS (or until BATCH_MAX_SIZE is reached) and sent through
+    a single batched generate_voice_design / generate_voice_clone call.
+    Each caller gets back its own (waveform, sample_rate, fallback), and its
+    request's Server-Timing gets its batch_wait plus the batch's model spans.
+    """
+
+    def __init__(self):
+        self._pending = {model: [] for model in MODEL_METHODS}
+        self._timers = {}
+        self._tasks = set()  # strong refs to window/flush tasks: the loop only keeps weak ones
+        self._batch_sizes = Counter()
+        self._batches = 0
+        self._requests = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    async def submit(self, model: str, text: str, extra: str = None):
+        """
+        Queues one synthesis and waits for its slot in a batch.
+        Returns (waveform, sample_rate, fallback); fallback is True for
+        degraded audio (mock tone, or VoiceDesign standing in for a clone).
+        """
+        if model not in MODEL_METHODS:
+            raise ValueError(f"Unknown model '{model}' (expected one of {list(MODEL_METHODS)})")
+
+        future = asyncio.get_running_loop().create_future()
+        queue = self._pending[model]
+        queue.append(PendingRequest(text=text, extra=extra, future=future))
+
+        if len(queue) >= settings.BATCH_MAX_SIZE:
+            self._cancel_timer(model)
+            self._spawn(self._flush(model))
+        elif model not in self._timers:
+            self._timers[model] = self._spawn(self._flush_after_window(model))
+
+        return await future
+
+    def queue_depth(self, model: str = None) -> int:
+        if model is not None:
+            return len(self._pending[model])
+        return sum(len(q) for q in self._pending.values())
+
+    def stats(self) -> dict:
+        return {
+            "window_ms": settings.BATCH_WINDOW_MS,
+            "max_batch_size": settings.BATCH_MAX_SIZE,
+            "batches": self._batches,
+            "requests": self._requests,
+            "avg_batch_size": round(self._requests / self._batches, 2) if self._batches else 0.0,
+            "batch_sizes": dict(sorted(self._batch_sizes.items())),
+            "avg_queue_wait_ms": round(self._wait_total / self._requests * 1000, 2) if self._requests else 0.0,
+            "max_queue_wait_ms": round(self._wait_max * 1000, 2),
+            "queue_depth": {model: len(q) for model, q in self._pending.items()},
+        }
+
+    async def stop(self):
+        for model in list(self._timers):
+            self._cancel_timer(model)
+        for queue in self._pending.values():
+            for item in queue:
+                if not item.future.done():
+                    item.future.set_exception(RuntimeError("Batch scheduler shut down"))
+            queue.clear()
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _cancel_timer(self, model: str):
+        timer = self._timers.pop(model, None)
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+
+    async def _flush_after_window(self, model: str):
+        await asyncio.sleep(settings.BATCH_WINDOW_MS / 1000)
+        self._timers.pop(model, None)
+        await self._flush(model)
+
+    async def _flush(self, model: str):
+        queue = self._pending[model]
+        batch = queue[:settings.BATCH_MAX_SIZE]
+        del queue[:settings.BATCH_MAX_SIZE]
+
+        # Leftovers (burst larger than one batch) get their own window
+        if queue and model not in self._timers:
+            self._timers[model] = self._spawn(self._flush_after_window(model))
+
+        # Drop callers that already gave up
+        batch = [item for item in batch if not item.future.done()]
+        if not batch:
+            return
+
+        now = time.perf_counter()
+        waits = [now - item.enqueued_at for item in batch]
+        self._batches += 1
+        self._requests += len(batch)
+        self._batch_sizes[len(batch)] += 1
+        self._wait_total += sum(waits)
+        self._wait_max = max(self._wait_max, *waits)
+        for item, wait in zip(batch, waits):
+            STAGE_SECONDS.observe(wait, stage="batch_wait")
+            if item.spans is not None:
+                item.spans.append(("batch_wait", wait))
+        logger.info(
+            f"Dispatching {model} batch of {len(batch)} "
+            f"(max queue wait {max(waits) * 1000:.1f}ms)"
+        )
+
+        texts = [item.text for item in batch]
+        extras = [item.extra for item in batch]
+        kwargs = {"texts": texts}
+        if model == "design":
+            kwargs["instructions"] = extras
+        else:
+            kwargs["ref_audio_paths"] = extras
+
+        # Model spans of the batch are collected here and copied to every caller
+        job_spans = []
+        job = asyncio.get_running_loop().create_task(
+            inference_executor.submit(MODEL_METHODS[model], **kwargs), context=span_context(job_spans)
+        )
+
+        # Every caller gave up (disconnect/deadline) while the batch was still
+        # queued for a worker: withdraw it. A running batch can't be stopped.
+        def abandon_if_unwanted(_):
+            if all(item.future.cancelled() for item in batch):
+                job.cancel()
+
+        for item in batch:
+            item.future.add_done_callback(abandon_if_unwanted)
+
+        await asyncio.wait([job])
+        for item in batch:
+            if item.spans is not None:
+                item.spans.extend(job_spans)
+        if job.cancelled():
+            logger.info(f"Dropped {model} batch of {len(batch)}: all callers cancelled")
+            return
+        if job.exception() is not None:
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(job.exception())
+            return
+        wavs, sr, fallback = job.result()
+
+        for item, wav in zip(batch, wavs):
+            if not item.future.done():
+                item.future.set_result((wav, sr, fallback))
+
+
+batch_scheduler = BatchScheduler()
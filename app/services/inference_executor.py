@@ -0,0 +1,230 @@
+import asyncio
+import contextvars
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from app.core.config import settings
+from app.services.tts_service import tts_service
+from app.services.model_server import ModelServerClient
+from app.services.replica_pool import CPUReplicaPool
+from app.services.precision import resolve_precision
+import logging
+
+logger = logging.getLogger("uvicorn")
+
+
+def _init_worker():
+    """
+    Runs once inside every worker process (process backend only).
+    Each process owns its own copy of the models and warms it up before
+    taking jobs: the pool can't send a warmup job to each worker.
+    """
+    tts_service.initialize_model()
+    if settings.WARMUP_ENABLED:
+        tts_service.warmup()
+
+
+def _run_job(method: str, kwargs: dict):
+    """
+    Executes a TTSService method inside the worker.
+    Module-level so it can be pickled for the process backend.
+    """
+    return getattr(tts_service, method)(**kwargs)
+
+
+@dataclass
+class InferenceJob:
+    method: str
+    kwargs: dict
+    future: asyncio.Future = field(repr=False)
+    # Submitter's context: thread workers run in it, so model.* spans reach its request
+    context: contextvars.Context = field(default_factory=contextvars.copy_context, repr=False)
+
+
+class InferenceExecutor:
+    """
+    Owns the TTS models and runs inference jobs off the event loop.
+
+    Handlers submit jobs through an async queue and only await the result,
+    so the loop keeps serving lightweight endpoints (/health, /clone/list,
+    downloads) while a synthesis is running.
+
+    Backends (settings.INFERENCE_BACKEND):
+    - "thread": models are loaded once and shared by INFERENCE_WORKERS threads.
+    - "process": every worker process loads its own models (more RAM/VRAM,
+      but no GIL contention for the Python parts of the pipeline).
+    - "server": a separate model server process owns the models and runs
+      INFERENCE_WORKERS threads; every API worker process (uvicorn
+      --workers N) connects to it, so the weights are loaded only once.
+    - "replicas": CPU serving. CPU_REPLICAS model processes, each pinned to
+      its own cores with matching torch thread counts; jobs go to the
+      least-loaded replica (one job per replica in flight).
+    """
+
+    def __init__(self):
+        self._pool = None
+        self._client = None
+        self._replicas = None
+        self._preload = None
+        self._queue = None
+        self._consumers = []
+
+    @property
+    def started(self) -> bool:
+        return self._pool is not None or self._client is not None or self._replicas is not None
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self):
+        if self.started:
+            return
+
+        backend = settings.INFERENCE_BACKEND
+        workers = max(1, settings.INFERENCE_WORKERS)
+        loop = asyncio.get_running_loop()
+
+        # Fail fast on an invalid/unsupported QUANTIZATION before loading anything
+        plan = resolve_precision()
+        logger.info(f"Inference precision: {plan.label} (QUANTIZATION={plan.mode})")
+
+        if backend == "process":
+            # "spawn" so children don't inherit the event loop or a CUDA context
+            self._pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        elif backend == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inference")
+            # Shared models: preload them once in the background. The server
+            # accepts traffic meanwhile; jobs needing a loading model wait for it.
+            self._preload = loop.run_in_executor(None, tts_service.initialize_model)
+            self._preload.add_done_callback(self._log_preload_failure)
+        elif backend == "server":
+            client = ModelServerClient(settings.MODEL_SERVER_SOCKET)
+            await client.connect(autostart=settings.MODEL_SERVER_AUTOSTART)
+            self._client = client
+        elif backend == "replicas":
+            self._replicas = CPUReplicaPool()
+            self._replicas.start()
+            workers = len(self._replicas)
+        else:
+            raise ValueError(f"Unknown INFERENCE_BACKEND '{backend}' (expected 'thread', 'process', 'server' or 'replicas')")
+
+        self._queue = asyncio.Queue(maxsize=settings.INFERENCE_QUEUE_SIZE)
+        self._consumers = [asyncio.create_task(self._consume()) for _ in range(workers)]
+        logger.info(f"Inference executor started ({backend} backend, {workers} worker(s))")
+
+    @staticmethod
+    def _log_preload_failure(future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Model preload failed: {future.exception()}")
+
+    async def stop(self):
+        if not self.started:
+            return
+        for task in self._consumers:
+            task.cancel()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        self._consumers = []
+
+        # Fail anything still waiting in the queue
+        while not self._queue.empty():
+            job = self._queue.get_nowait()
+            if not job.future.done():
+                job.future.set_exception(RuntimeError("Inference executor shut down"))
+
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+        elif self._replicas is not None:
+            self._replicas.shutdown()
+            self._replicas = None
+        else:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        self._queue = None
+
+    async def submit(self, method: str, **kwargs):
+        """
+        Queues a TTSService method call and waits for its result.
+        """
+        if not self.started:
+            raise RuntimeError("Inference executor not started. Call start() first.")
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(InferenceJob(method=method, kwargs=kwargs, future=future))
+        return await future
+
+    async def warmup(self) -> dict:
+        """
+        Warms up every copy of the models and returns the per-model results.
+        - replicas: one warmup job per replica (one job per replica in flight).
+        - process: workers warm up in _init_worker; this waits until every
+          worker process has reported its pid (concurrent jobs make the
+          pool start all of its processes).
+        - thread/server: one warmup of the shared models.
+        """
+        if self._replicas is not None:
+            results = await asyncio.gather(*(self.submit("warmup") for _ in range(len(self._replicas))))
+            return results[0]
+        if isinstance(self._pool, ProcessPoolExecutor):
+            workers = len(self._consumers)
+            reported = {}
+            while True:
+                for status in await asyncio.gather(*(self.submit("warmup_status") for _ in range(workers))):
+                    reported[status["pid"]] = status["models"]
+                if len(reported) >= workers:
+                    return next(iter(reported.values()))
+                await asyncio.sleep(0.5)  # others still loading/warming up
+        return await self.submit("warmup")
+
+    async def model_stats(self) -> dict:
+        """Model residency stats of whichever process owns the models."""
+        if self._client is not None:
+            return await self._client.call("model_stats", {})
+        return tts_service.model_stats()
+
+    def stats(self) -> dict:
+        stats = {
+            "backend": settings.INFERENCE_BACKEND,
+            "workers": len(self._consumers),
+            "queue_depth": self.queue_depth,
+        }
+        if self._replicas is not None:
+            stats["replicas"] = self._replicas.stats()
+        return stats
+
+    async def _run(self, job: InferenceJob):
+        if self._client is not None:
+            return await self._client.call(job.method, job.kwargs)
+        if self._replicas is not None:
+            return await self._replicas.run(job.method, job.kwargs)
+        loop = asyncio.get_running_loop()
+        if isinstance(self._pool, ProcessPoolExecutor):
+            # Spans inside worker processes only feed the aggregate stage metrics
+            return await loop.run_in_executor(self._pool, _run_job, job.method, job.kwargs)
+        return await loop.run_in_executor(self._pool, job.context.run, _run_job, job.method, job.kwargs)
+
+    async def _consume(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                # Caller went away while the job was queued: skip the work
+                if job.future.cancelled():
+                    continue
+                try:
+                    result = await self._run(job)
+                except Exception as e:
+                    if not job.future.done():
+                        job.future.set_exception(e)
+                else:
+                    if not job.future.done():
+                        job.future.set_result(result)
+            finally:
+                self._queue.task_done()
+
+
+inference_executor = InferenceExecutor()
@@ -0,0 +1,117 @@
+import asyncio
+import multiprocessing
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.metrics import span
+from app.services.audio_service import AudioService, AudioConversionError, AudioTooLongError
+import logging
+
+logger = logging.getLogger("uvicorn")
+
+
+class IngestError(Exception):
+    """Upload rejected; carries the HTTP status to answer with."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def spool_to_disk(src, dest_path: str, max_bytes: int, chunk_size: int) -> int:
+    """
+    Copies the upload to disk chunk by chunk, stopping as soon as it
+    exceeds max_bytes. Returns the number of bytes written.
+    """
+    written = 0
+    with open(dest_path, "wb") as dest:
+        while True:
+            chunk = src.read(chunk_size)
+            if not chunk:
+                return written
+            written += len(chunk)
+            if max_bytes and written > max_bytes:
+                raise IngestError(f"Upload exceeds the {max_bytes // (1024 * 1024)} MB limit", status_code=413)
+            dest.write(chunk)
+
+
+def _probe_duration(path: str):
+    """Duration from the file header, or None if libsndfile can't read it (e.g. WebM)."""
+    import soundfile as sf
+    try:
+        return sf.info(path).duration
+    except Exception:
+        return None
+
+
+class IngestService:
+    """
+    Turns uploaded reference audio into conditioned mono 24 kHz WAV files.
+
+    Oversized requests are refused from Content-Length before their body is
+    read (UploadLimitMiddleware). The upload is spooled to disk in chunks
+    (never held in memory as a whole), size and duration limits are checked
+    before any decoding, and decoding/resampling runs in a small process
+    pool (INGEST_WORKERS) while the event loop keeps serving requests.
+    """
+
+    def __init__(self):
+        self._pool = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            workers = max(1, settings.INGEST_WORKERS)
+            self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            logger.info(f"Ingest pool started ({workers} worker(s))")
+        return self._pool
+
+    async def ingest(self, upload: UploadFile, dest_path: str) -> dict:
+        """
+        Stores an uploaded audio file at dest_path as (conditioned) reference WAV.
+        Returns its quality metrics (see AudioService.convert_file). Raises IngestError.
+        """
+        max_bytes = settings.UPLOAD_MAX_BYTES
+        max_seconds = settings.UPLOAD_MAX_SECONDS
+
+        spool_path = os.path.join(os.path.dirname(dest_path), f".upload_{uuid.uuid4().hex}")
+        try:
+            with span("upload_spool"):
+                size = await run_in_threadpool(spool_to_disk, upload.file, spool_path, max_bytes, settings.UPLOAD_CHUNK_BYTES)
+            if size == 0:
+                raise IngestError("Uploaded file is empty")
+
+            duration = await run_in_threadpool(_probe_duration, spool_path)
+            if max_seconds and duration is not None and duration > max_seconds:
+                raise IngestError(f"Audio is {duration:.1f}s long (limit {max_seconds:g}s)", status_code=413)
+
+            return await self.convert(spool_path, dest_path)
+        finally:
+            if os.path.exists(spool_path):
+                os.remove(spool_path)
+
+    async def convert(self, src_path: str, dest_path: str) -> dict:
+        """
+        Converts an audio file already on disk into a reference WAV in the
+        process pool. Returns its quality metrics. Raises IngestError.
+        """
+        with span("upload_convert"):
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(
+                    self._get_pool(), AudioService.convert_file, src_path, dest_path, settings.UPLOAD_MAX_SECONDS
+                )
+            except AudioTooLongError as e:
+                raise IngestError(str(e), status_code=413)
+            except AudioConversionError as e:
+                raise IngestError(str(e), status_code=415)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+ingest_service = IngestService()
@@ -0,0 +1,361 @@
+import gc
+import os
+import threading
+import time
+from contextlib import contextmanager
+import torch
+from app.core.config import settings
+from app.core.metrics import span
+from app.services.precision import resolve_precision, load_kwargs, apply_precision
+from app.services.snapshot import read_manifest, snapshot_path, storage_dtype, mmap_snapshot, map_weights
+from app.services.warmup import compile_model
+import logging
+
+logger = logging.getLogger("uvicorn")
+
+# Model name -> settings attribute holding its path
+MODEL_PATH_SETTINGS = {
+    "voice_design": "TTS_MODEL_PATH",        # text-prompt voice synthesis
+    "clone": "TTS_CLONE_MODEL_PATH",         # reference-audio cloning (Base)
+}
+
+
+def use_cuda() -> bool:
+    return settings.USE_GPU and torch.cuda.is_available()
+
+
+def load_tts_model(path: str):
+    """
+    Loads one Qwen3-TTS model from the hub or a local directory,
+    in the precision selected by QUANTIZATION.
+
+    From a snapshot (scripts/export_snapshot.py) the weights are already in
+    the right dtype. On CPU the memory-mapped snapshot tensors are handed to
+    from_pretrained as its state_dict: the model is built on the meta device
+    (device_map implies low_cpu_mem_usage) and its parameters become views
+    of the mapping, so weights are neither copied nor read up front.
+    model.load_phases has the seconds spent per step.
+    """
+    phases = {}
+    started = time.perf_counter()
+
+    def phase(name: str):
+        nonlocal started
+        now = time.perf_counter()
+        phases[name] = round(now - started, 3)
+        started = now
+
+    from qwen_tts import Qwen3TTSModel
+    phase("import")
+
+    plan = resolve_precision()
+    kwargs = load_kwargs(plan)
+    manifest = read_manifest(path)
+    if manifest is not None and manifest["dtype"] != str(storage_dtype(plan)).replace("torch.", ""):
+        logger.warning(
+            f"Snapshot {path} holds {manifest['dtype']} weights but QUANTIZATION={plan.mode} needs "
+            f"{storage_dtype(plan)}; converting while loading (re-export the snapshot to avoid this)"
+        )
+    tensors = None
+    if manifest is not None and settings.MODEL_SNAPSHOT_MMAP and not use_cuda():
+        try:
+            tensors = mmap_snapshot(path, strict=True)
+            kwargs["state_dict"] = tensors
+        except ValueError as e:
+            logger.warning(f"Snapshot {path} can't be passed to from_pretrained memory-mapped ({e}); copying weights")
+        phase("mmap")
+
+    model = Qwen3TTSModel.from_pretrained(path, **kwargs)
+    phase("from_pretrained")
+
+    if manifest is not None and settings.MODEL_SNAPSHOT_MMAP:
+        # Anything from_pretrained copied anyway (or all of it on the fallback path)
+        mapped = map_weights(getattr(model, "model", model), path, tensors)
+        phase("map_weights")
+        logger.info(f"Memory-mapped {mapped / 1e6:.0f} MB of weights from {path}")
+
+    model = apply_precision(model, plan)
+    phase("precision")
+
+    if settings.TORCH_COMPILE:
+        compiled = compile_model(model)
+        phase("compile")
+        logger.info(f"torch.compile ({settings.TORCH_COMPILE_MODE}): {', '.join(compiled) or 'nothing'}; graphs compile during warmup")
+    model.precision = plan.label
+    model.load_phases = phases
+    return model
+
+
+def model_memory_bytes(model) -> int:
+    """
+    Bytes held by the model's parameters and buffers
+    (including dynamically quantized int8 Linear weights).
+    """
+    module = getattr(model, "model", model)
+    if not isinstance(module, torch.nn.Module):
+        return 0
+    tensors = list(module.parameters()) + list(module.buffers())
+    for m in module.modules():
+        if isinstance(m, torch.ao.nn.quantized.dynamic.Linear):
+            tensors.append(m.weight())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+def process_rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+class ManagedModel:
+    def __init__(self, name: str):
+        self.name = name
+        self.model = None
+        self.state = "unloaded"  # unloaded | loading | loaded | offloaded | failed
+        self.error = None
+        self.memory_bytes = 0
+        self.in_use = 0
+        self.last_used = 0.0
+        self.loads = 0
+        self.load_seconds = 0.0
+        self.last_load_seconds = 0.0
+        self.last_load_phases = {}
+        self.unloads = 0
+        self.unload_seconds = 0.0
+        self.waits = 0
+        self.wait_seconds = 0.0
+
+    @property
+    def path(self) -> str:
+        # An exported snapshot takes precedence over the hub / local path
+        return snapshot_path(self.name) or getattr(settings, MODEL_PATH_SETTINGS[self.name])
+
+
+class ModelManager:
+    """
+    Lazy, memory-aware residency for the TTS models.
+
+    - A model is loaded on first use (get/acquire); callers that arrive while
+      it is loading wait for it instead of failing.
+    - PRELOAD_MODELS are loaded at startup in the background.
+    - Memory per model is tracked. When MODEL_MEMORY_BUDGET_MB is exceeded,
+      or a model sits idle for MODEL_IDLE_TIMEOUT_S, idle models are unloaded
+      (or offloaded to CPU RAM when MODEL_IDLE_ACTION="offload" on CUDA).
+    """
+
+    def __init__(self, loader=load_tts_model):
+        self._loader = loader
+        self._models = {name: ManagedModel(name) for name in MODEL_PATH_SETTINGS}
+        self._cond = threading.Condition()
+        self._reaper = None
+
+    @contextmanager
+    def acquire(self, name: str):
+        """
+        Yields the loaded model and keeps it resident for the duration of the block.
+        """
+        model = self._get(name, hold=True)
+        try:
+            yield model
+        finally:
+            with self._cond:
+                entry = self._models[name]
+                entry.in_use -= 1
+                entry.last_used = time.time()
+
+    def get(self, name: str):
+        return self._get(name, hold=False)
+
+    def preload(self, names=None):
+        """
+        Loads the given models (default: PRELOAD_MODELS) and starts the idle reaper.
+        """
+        if names is None:
+            names = [n.strip() for n in settings.PRELOAD_MODELS.split(",") if n.strip()]
+        self.start_reaper()
+        for name in names:
+            if name not in self._models:
+                logger.warning(f"Ignoring unknown model '{name}' in PRELOAD_MODELS")
+                continue
+            self.get(name)
+
+    def unload(self, name: str) -> bool:
+        """
+        Frees (or offloads) a model unless it is in use. Returns True if it was released.
+        """
+        with self._cond:
+            entry = self._models[name]
+            if entry.state != "loaded" or entry.in_use:
+                return False
+            started = time.perf_counter()
+            if settings.MODEL_IDLE_ACTION == "offload" and use_cuda():
+                self._move(entry.model, "cpu")
+                entry.state = "offloaded"
+            else:
+                entry.model = None
+                entry.state = "unloaded"
+            entry.unloads += 1
+            entry.unload_seconds += time.perf_counter() - started
+
+        gc.collect()
+        if use_cuda():
+            torch.cuda.empty_cache()
+        logger.info(f"Released {name} model ({entry.state}, {entry.memory_bytes / 1e9:.2f} GB)")
+        return True
+
+    def unload_idle(self):
+        timeout = settings.MODEL_IDLE_TIMEOUT_S
+        if timeout <= 0:
+            return
+        now = time.time()
+        for name, entry in self._models.items():
+            if entry.state == "loaded" and not entry.in_use and now - entry.last_used > timeout:
+                self.unload(name)
+
+    def start_reaper(self):
+        if self._reaper is not None or settings.MODEL_IDLE_TIMEOUT_S <= 0:
+            return
+
+        def run():
+            while True:
+                time.sleep(max(1.0, settings.MODEL_IDLE_TIMEOUT_S / 4))
+                try:
+                    self.unload_idle()
+                except Exception as e:
+                    logger.error(f"Idle model reaper failed: {e}")
+
+        self._reaper = threading.Thread(target=run, name="model-reaper", daemon=True)
+        self._reaper.start()
+
+    def stats(self) -> dict:
+        models = {}
+        for name, entry in self._models.items():
+            models[name] = {
+                "path": entry.path,
+                "state": entry.state,
+                "precision": getattr(entry.model, "precision", None),
+                "error": entry.error,
+                "memory_mb": round(entry.memory_bytes / 1e6, 1),
+                "in_use": entry.in_use,
+                "idle_s": round(time.time() - entry.last_used, 1) if entry.last_used else None,
+                "loads": entry.loads,
+                "last_load_s": round(entry.last_load_seconds, 2),
+                "last_load_phases": entry.last_load_phases,
+                "total_load_s": round(entry.load_seconds, 2),
+                "unloads": entry.unloads,
+                "total_unload_s": round(entry.unload_seconds, 2),
+                "waits": entry.waits,
+                "total_wait_s": round(entry.wait_seconds, 2),
+            }
+        return {
+            "budget_mb": settings.MODEL_MEMORY_BUDGET_MB,
+            "resident_mb": round(self._resident_bytes() / 1e6, 1),
+            "process_rss_mb": round(process_rss_bytes() / 1e6, 1),
+            "cuda_allocated_mb": round(torch.cuda.memory_allocated() / 1e6, 1) if use_cuda() else 0.0,
+            "models": models,
+        }
+
+    def _get(self, name: str, hold: bool):
+        if name not in self._models:
+            raise ValueError(f"Unknown model '{name}' (expected one of {list(self._models)})")
+
+        with self._cond:
+            entry = self._models[name]
+            if entry.state == "loading":
+                # Someone else is loading it: wait instead of failing
+                started = time.perf_counter()
+                entry.waits += 1
+                self._cond.wait_for(lambda: entry.state != "loading")
+                entry.wait_seconds += time.perf_counter() - started
+
+            if entry.state == "loaded":
+                if hold:
+                    entry.in_use += 1
+                entry.last_used = time.time()
+                return entry.model
+
+            entry.state = "loading"
+            if hold:
+                entry.in_use += 1
+
+        try:
+            model = self._load(entry)
+        except Exception as e:
+            with self._cond:
+                entry.state = "failed"
+                entry.error = str(e)
+                if hold:
+                    entry.in_use -= 1
+                self._cond.notify_all()
+            raise
+
+        with self._cond:
+            entry.model = model
+            entry.state = "loaded"
+            entry.error = None
+            entry.last_used = time.time()
+            self._cond.notify_all()
+
+        self._enforce_budget(keep=name)
+        return model
+
+    def _load(self, entry: ManagedModel):
+        # Make room first if this model's size is already known
+        if entry.memory_bytes:
+            self._enforce_budget(keep=entry.name, incoming=entry.memory_bytes)
+
+        started = time.perf_counter()
+        if entry.model is not None:
+            # Offloaded to CPU: move it back
+            logger.info(f"Restoring {entry.name} model to GPU...")
+            self._move(entry.model, "cuda")
+            model = entry.model
+        else:
+            logger.info(f"Loading {entry.name} model from {entry.path}...")
+            with span("model.load"):
+                model = self._loader(entry.path)
+
+        elapsed = time.perf_counter() - started
+        entry.loads += 1
+        entry.last_load_seconds = elapsed
+        entry.load_seconds += elapsed
+        entry.memory_bytes = model_memory_bytes(model)
+        entry.last_load_phases = getattr(model, "load_phases", {})
+        device_str = "CUDA" if use_cuda() else "CPU"
+        phases = " ".join(f"{k}={v:.2f}s" for k, v in entry.last_load_phases.items())
+        logger.info(f"{entry.name} model ready on {device_str} in {elapsed:.1f}s ({entry.memory_bytes / 1e9:.2f} GB) {phases}")
+        return model
+
+    def _resident_bytes(self) -> int:
+        return sum(e.memory_bytes for e in self._models.values() if e.state == "loaded")
+
+    def _enforce_budget(self, keep: str, incoming: int = 0):
+        budget = settings.MODEL_MEMORY_BUDGET_MB * 1024 * 1024
+        if budget <= 0:
+            return
+        # Least recently used first
+        candidates = sorted(
+            (e for e in self._models.values() if e.name != keep and e.state == "loaded"),
+            key=lambda e: e.last_used,
+        )
+        for entry in candidates:
+            if self._resident_bytes() + incoming <= budget:
+                break
+            self.unload(entry.name)
+        if self._resident_bytes() + incoming > budget:
+            logger.warning(
+                f"Model memory {(self._resident_bytes() + incoming) / 1e6:.0f} MB exceeds budget "
+                f"{settings.MODEL_MEMORY_BUDGET_MB} MB (remaining models are in use)"
+            )
+
+    @staticmethod
+    def _move(model, device: str):
+        module = getattr(model, "model", model)
+        module.to(device)
+        if hasattr(model, "device"):
+            model.device = torch.device(device)
+
+
+model_manager = ModelManager()
@@ -0,0 +1,323 @@
+"""
+Standalone model server: one process owns the TTS models and serves
+inference to any number of API worker processes over a Unix socket.
+
+    python -m app.services.model_server
+
+API workers use it with INFERENCE_BACKEND=server (and start it themselves
+when MODEL_SERVER_AUTOSTART is on). Requests and small results travel as
+pickles over multiprocessing.connection; waveforms are handed back through
+shared memory, so the API side copies them out once instead of unpickling
+megabytes from the socket.
+"""
+import argparse
+import asyncio
+import fcntl
+import itertools
+import os
+import pickle
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import resource_tracker
+from multiprocessing.connection import Client, Listener
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger("uvicorn")
+
+
+@dataclass(frozen=True)
+class SharedArray:
+    """A numpy array left in a shared memory block for the receiver."""
+    name: str
+    shape: tuple
+    dtype: str
+
+
+def _pack(value, blocks: list):
+    """Replaces large numpy arrays in a result with SharedArray handles."""
+    if isinstance(value, np.ndarray) and value.nbytes >= settings.MODEL_SERVER_SHM_MIN_BYTES:
+        shm = SharedMemory(create=True, size=max(1, value.nbytes))
+        np.ndarray(value.shape, dtype=value.dtype, buffer=shm.buf)[...] = value
+        blocks.append(shm)
+        return SharedArray(shm.name, value.shape, value.dtype.str)
+    if isinstance(value, (list, tuple)):
+        return type(value)(_pack(v, blocks) for v in value)
+    if isinstance(value, dict):
+        return {k: _pack(v, blocks) for k, v in value.items()}
+    return value
+
+
+def _unpack(value):
+    """Copies SharedArray handles out of shared memory and frees the blocks."""
+    if isinstance(value, SharedArray):
+        shm = SharedMemory(name=value.name)
+        try:
+            return np.ndarray(value.shape, dtype=np.dtype(value.dtype), buffer=shm.buf).copy()
+        finally:
+            shm.close()
+            shm.unlink()
+    if isinstance(value, (list, tuple)):
+        return type(value)(_unpack(v) for v in value)
+    if isinstance(value, dict):
+        return {k: _unpack(v) for k, v in value.items()}
+    return value
+
+
+def _hand_over(blocks: list):
+    # The receiver unlinks the blocks; stop this process's resource tracker
+    # from "cleaning up" (and warning about) them at exit
+    for shm in blocks:
+        resource_tracker.unregister(shm._name, "shared_memory")
+        shm.close()
+
+
+def _discard(blocks: list):
+    for shm in blocks:
+        shm.close()
+        shm.unlink()
+
+
+# --- Server side ---
+
+class ModelServer:
+    """
+    Accepts API worker connections and runs their jobs on a thread pool
+    (INFERENCE_WORKERS threads sharing one copy of the models).
+    """
+
+    def __init__(self, address: str, linger: float = None):
+        self.address = address
+        self.linger = linger  # exit after this long without clients (None = run forever)
+        self._pool = ThreadPoolExecutor(max_workers=max(1, settings.INFERENCE_WORKERS), thread_name_prefix="inference")
+        self._clients = 0
+        self._idle_since = time.monotonic()
+        self._lock = threading.Lock()
+
+    def serve_forever(self):
+        from app.services.tts_service import tts_service
+
+        if os.path.exists(self.address):
+            os.unlink(self.address)  # stale socket of a server that died
+        # Jobs are pickles: only this user may connect. The umask makes bind()
+        # create the socket private, so there is no window before the chmod.
+        old_umask = os.umask(0o077)
+        try:
+            listener = Listener(self.address, family="AF_UNIX")
+        finally:
+            os.umask(old_umask)
+        os.chmod(self.address, 0o600)
+        logger.info(f"Model server listening on {self.address}")
+
+        # Accept connections right away; jobs needing a loading model wait for it
+        self._pool.submit(tts_service.initialize_model)
+        if self.linger is not None:
+            threading.Thread(target=self._exit_when_idle, daemon=True).start()
+
+        while True:
+            conn = listener.accept()
+            with self._lock:
+                self._clients += 1
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        send_lock = threading.Lock()
+        try:
+            while True:
+                try:
+                    call_id, method, kwargs = conn.recv()
+                except (EOFError, OSError):
+                    return
+                future = self._pool.submit(_run, method, kwargs)
+                future.add_done_callback(lambda f, call_id=call_id: self._reply(conn, send_lock, call_id, f))
+        finally:
+            with self._lock:
+                self._clients -= 1
+                self._idle_since = time.monotonic()
+
+    @staticmethod
+    def _reply(conn, send_lock, call_id, future):
+        blocks = []
+        try:
+            message = (call_id, True, _pack(future.result(), blocks))
+        except Exception as e:
+            message = (call_id, False, e)
+        try:
+            with send_lock:
+                try:
+                    conn.send(message)
+                except (pickle.PicklingError, TypeError, AttributeError) as e:
+                    # Nothing was written yet: send() pickles before writing
+                    conn.send((call_id, False, RuntimeError(f"Unpicklable model server reply: {e}")))
+        except OSError:
+            _discard(blocks)  # client is gone
+        else:
+            _hand_over(blocks)
+
+    def _exit_when_idle(self):
+        while True:
+            time.sleep(1.0)
+            with self._lock:
+                idle = self._clients == 0 and time.monotonic() - self._idle_since > self.linger
+            if idle:
+                logger.info("Model server: no clients left, exiting")
+                try:
+                    os.unlink(self.address)
+                except FileNotFoundError:
+                    pass
+                os._exit(0)
+
+
+def _run(method: str, kwargs: dict):
+    from app.services.tts_service import tts_service
+    return getattr(tts_service, method)(**kwargs)
+
+
+# --- API worker side ---
+
+class ModelServerClient:
+    """
+    One connection per API worker process. Calls are multiplexed by id;
+    a reader thread resolves their futures as replies arrive.
+    """
+
+    def __init__(self, address: str):
+        self.address = address
+        self._conn = None
+        self._pending = {}  # call_id -> asyncio.Future
+        self._ids = itertools.count()
+        self._loop = None
+
+    @property
+    def connected(self) -> bool:
+        return self._conn is not None
+
+    async def connect(self, autostart: bool = False, timeout: float = None):
+        """
+        Connects to the model server, starting it first if autostart is set
+        and nothing is listening yet. Raises ConnectionError after timeout.
+        """
+        self._loop = asyncio.get_running_loop()
+        timeout = settings.MODEL_SERVER_START_TIMEOUT_S if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        started = False
+        while True:
+            try:
+                conn = await self._loop.run_in_executor(None, Client, self.address, "AF_UNIX")
+                break
+            except (FileNotFoundError, ConnectionRefusedError) as e:
+                if autostart and not started:
+                    spawn_server(self.address)
+                    started = True
+                if time.monotonic() > deadline:
+                    raise ConnectionError(f"Model server not reachable at {self.address}: {e}")
+                await asyncio.sleep(0.2)
+        self._conn = conn
+        threading.Thread(target=self._read, args=(conn,), name="model-server-reader", daemon=True).start()
+        logger.info(f"Connected to model server at {self.address}")
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()  # the reader thread fails what is still pending
+            self._conn = None
+
+    async def call(self, method: str, kwargs: dict):
+        if self._conn is None:
+            await self.connect(autostart=settings.MODEL_SERVER_AUTOSTART)
+        call_id = next(self._ids)
+        future = self._loop.create_future()
+        self._pending[call_id] = future
+        try:
+            self._conn.send((call_id, method, kwargs))
+            return await future
+        finally:
+            self._pending.pop(call_id, None)
+
+    def _read(self, conn):
+        while True:
+            try:
+                call_id, ok, payload = conn.recv()
+            except (EOFError, OSError):
+                break
+            except Exception as e:
+                logger.error(f"Unreadable model server reply: {e}")
+                conn.close()
+                break
+            # Unpack here so a reply nobody waits for still frees its shared memory
+            if ok:
+                try:
+                    payload = _unpack(payload)
+                except Exception as e:
+                    ok, payload = False, e
+            self._loop.call_soon_threadsafe(self._resolve, call_id, ok, payload)
+        self._loop.call_soon_threadsafe(self._lost, conn)
+
+    def _resolve(self, call_id, ok, payload):
+        future = self._pending.get(call_id)
+        if future is None or future.done():
+            return
+        if ok:
+            future.set_result(payload)
+        else:
+            future.set_exception(payload)
+
+    def _lost(self, conn):
+        if self._conn is conn:
+            logger.error("Lost connection to the model server")
+            self._conn = None  # the next call reconnects
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("Model server connection lost"))
+
+
+def spawn_server(address: str):
+    """
+    Starts a model server in the background. Several API workers may race
+    to do this; a lock file makes all but the first exit straight away.
+    """
+    logger.info(f"Starting model server on {address}")
+    subprocess.Popen(
+        [sys.executable, "-m", "app.services.model_server", "--address", address,
+         "--linger", str(settings.MODEL_SERVER_LINGER_S)],
+        cwd=settings.BASE_DIR,
+        start_new_session=True,  # don't take Ctrl+C meant for the API server
+    )
+
+
+def _lock_address(address: str):
+    """Holds an exclusive lock for address, or returns None if another server has it."""
+    lock_file = open(address + ".lock", "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MineStream model server")
+    parser.add_argument("--address", default=settings.MODEL_SERVER_SOCKET, help="Unix socket path")
+    parser.add_argument("--linger", type=float, default=None, help="Exit after this many seconds without clients")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:     [model-server] %(message)s")
+    os.makedirs(os.path.dirname(os.path.abspath(args.address)), exist_ok=True)
+    lock = _lock_address(args.address)
+    if lock is None:
+        logger.info(f"Model server already running on {args.address}")
+        return
+    ModelServer(args.address, linger=args.linger).serve_forever()
+
+
+if __name__ == "__main__":
+    # Run the copy importable as app.services.model_server, so pickled
+    # classes (SharedArray) resolve to the same module in the API workers
+    from app.services.model_server import main as _main
+    _main()
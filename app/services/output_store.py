@@ -0,0 +1,307 @@
+import asyncio
+import hashlib
+import os
+import shutil
+import time
+import uuid
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, func, insert
+from sqlalchemy.future import select
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.metrics import span
+from app.models.generated_output import GeneratedOutput
+from app.models.render_job import RenderJob, RenderJobItem
+from app.services.render_jobs import RenderJobRunner, FINISHED_STATUSES
+import logging
+
+logger = logging.getLogger("uvicorn")
+
+GC_BATCH = 500  # Outputs (or render jobs) deleted per transaction
+
+
+def shard_path(filename: str) -> str:
+    """
+    Where a generated file lives: OUTPUT_DIR/ab/cd/<filename>, with ab/cd
+    taken from a hash of the name (65536 directories, evenly filled).
+    """
+    digest = hashlib.md5(filename.encode("utf-8")).hexdigest()
+    return os.path.join(settings.OUTPUT_DIR, digest[:2], digest[2:4], filename)
+
+
+def _write_file(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _unlink(paths: list):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _shard_legacy_files() -> list:
+    """
+    Moves gen_* files left in the flat OUTPUT_DIR by older versions into
+    their shard directories. Returns index rows for the files this process moved,
+    dated now rather than at their mtime: retention counts from the upgrade.
+    """
+    rows = []
+    migrated_at = time.time()
+    with os.scandir(settings.OUTPUT_DIR) as it:
+        entries = [de for de in it if de.name.startswith("gen_") and not de.name.endswith(".tmp") and de.is_file()]
+    for de in entries:
+        try:
+            st = de.stat()
+            dest = shard_path(de.name)
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            os.replace(de.path, dest)
+        except FileNotFoundError:
+            continue  # moved by another API worker
+        rows.append({"filename": de.name, "size": st.st_size, "kind": "generate", "created_at": migrated_at})
+    return rows
+
+
+class OutputStore:
+    """
+    Generated audio vault (OUTPUT_DIR).
+
+    - Files are stored in hash-sharded directories (shard_path), so no
+      directory grows with the total number of outputs.
+    - Every file has a row in generated_outputs (name, size, creation time),
+      committed before the file is written, so no file exists that cleanup
+      can't see. Rows of concurrent saves share one transaction. Cleanup
+      works from the index and never lists directories.
+    - A background task deletes outputs older than OUTPUT_RETENTION_S and
+      the oldest ones beyond OUTPUT_MAX_BYTES, plus finished render jobs
+      older than OUTPUT_RETENTION_S.
+    Flat files from older versions are moved into shards and indexed at start.
+    """
+
+    def __init__(self):
+        self._pending = []  # index rows waiting for the next commit
+        self._commit = None  # task committing (or about to commit) _pending
+        self._commit_lock = asyncio.Lock()
+        self._saving = set()  # saves in progress
+        self._over_quota = asyncio.Event()
+        self._task = None
+        self._migrating = False
+        self.files = 0  # indexed outputs at the last collection
+        self.bytes = 0  # indexed bytes at the last collection, plus outputs saved since
+        self.saved = 0
+        self.expired = 0
+        self.over_quota = 0
+        self.jobs_expired = 0
+        self.gc_runs = 0
+        self.last_gc_s = 0.0
+
+    async def start(self):
+        if self._task is None:
+            self._migrating = True
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Waits for saves in progress (e.g. inline background saves), then stops cleanup."""
+        if self._saving:
+            await asyncio.gather(*self._saving, return_exceptions=True)
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    @staticmethod
+    def new_filename(extension: str) -> str:
+        return f"gen_{uuid.uuid4().hex}.{extension}"
+
+    def resolve(self, filename: str) -> str:
+        """File system path of a stored output (no directory listing involved)."""
+        if not filename.startswith("gen_"):
+            return os.path.join(settings.OUTPUT_DIR, filename)
+        path = shard_path(filename)
+        if self._migrating and not os.path.exists(path):
+            # Not moved into its shard yet
+            return os.path.join(settings.OUTPUT_DIR, filename)
+        return path
+
+    async def save(self, filename: str, data: bytes, kind: str = "generate"):
+        """Indexes the output, then writes the file."""
+        task = asyncio.current_task()
+        self._saving.add(task)
+        try:
+            with span("index"):
+                await self._index({"filename": filename, "size": len(data), "kind": kind, "created_at": time.time()})
+            try:
+                with span("write"):
+                    await run_in_threadpool(_write_file, shard_path(filename), data)
+            except OSError:
+                await self._delete([(filename, len(data))])
+                raise
+        finally:
+            self._saving.discard(task)
+        self.saved += 1
+        self.bytes += len(data)
+        if settings.OUTPUT_MAX_BYTES and self.bytes > settings.OUTPUT_MAX_BYTES:
+            self._over_quota.set()
+
+    async def collect(self) -> dict:
+        """
+        One garbage collection pass: expired outputs, then the oldest ones
+        while over quota, then expired render jobs. Returns what was removed.
+        """
+        started = time.perf_counter()
+        removed = {"expired": 0, "over_quota": 0, "jobs": 0, "bytes": 0}
+        cutoff = time.time() - settings.OUTPUT_RETENTION_S if settings.OUTPUT_RETENTION_S > 0 else None
+
+        if cutoff is not None:
+            while True:
+                batch = await self._oldest(GeneratedOutput.created_at < cutoff)
+                if not batch:
+                    break
+                removed["expired"] += len(batch)
+                removed["bytes"] += await self._delete(batch)
+
+        async with SessionLocal() as db:
+            files, total = (await db.execute(
+                select(func.count(GeneratedOutput.filename), func.coalesce(func.sum(GeneratedOutput.size), 0))
+            )).one()
+        quota = settings.OUTPUT_MAX_BYTES
+        while quota and total > quota:
+            batch = await self._oldest()
+            if not batch:
+                break
+            # Only as many of the oldest as needed to get back under the quota
+            excess, take = total - quota, 0
+            while take < len(batch) and excess > 0:
+                excess -= batch[take][1]
+                take += 1
+            freed = await self._delete(batch[:take])
+            removed["over_quota"] += take
+            removed["bytes"] += freed
+            files -= take
+            total -= freed
+
+        if cutoff is not None:
+            removed["jobs"] = await self._delete_jobs(cutoff)
+
+        self.files, self.bytes = files, total
+        self.expired += removed["expired"]
+        self.over_quota += removed["over_quota"]
+        self.jobs_expired += removed["jobs"]
+        self.gc_runs += 1
+        self.last_gc_s = round(time.perf_counter() - started, 3)
+        if removed["expired"] or removed["over_quota"] or removed["jobs"]:
+            logger.info(
+                f"Output GC: removed {removed['expired']} expired and {removed['over_quota']} over-quota outputs "
+                f"({removed['bytes'] / 1e6:.1f} MB), {removed['jobs']} render job(s) in {self.last_gc_s:.2f}s"
+            )
+        return removed
+
+    def stats(self) -> dict:
+        return {
+            "files": self.files,
+            "bytes": self.bytes,
+            "max_bytes": settings.OUTPUT_MAX_BYTES,
+            "retention_s": settings.OUTPUT_RETENTION_S,
+            "saved": self.saved,
+            "expired": self.expired,
+            "over_quota": self.over_quota,
+            "jobs_expired": self.jobs_expired,
+            "gc_runs": self.gc_runs,
+            "last_gc_s": self.last_gc_s,
+        }
+
+    async def _run(self):
+        try:
+            rows = await run_in_threadpool(_shard_legacy_files)
+            if rows:
+                for i in range(0, len(rows), GC_BATCH):
+                    await self._insert(rows[i:i + GC_BATCH])
+                logger.info(f"Output store: moved {len(rows)} generated file(s) into shard directories")
+        except Exception as e:
+            logger.error(f"Moving generated files into shard directories failed: {e}")
+        finally:
+            self._migrating = False
+
+        while True:
+            self._over_quota.clear()
+            try:
+                await self.collect()
+            except Exception as e:
+                logger.error(f"Output store maintenance failed: {e}")
+            # Next pass after the interval, or as soon as a save goes over quota
+            try:
+                await asyncio.wait_for(self._over_quota.wait(), settings.OUTPUT_GC_INTERVAL_S)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _index(self, row: dict):
+        """
+        Commits an index row. Rows arriving while a commit is running are
+        grouped into the next one (one transaction per batch, not per save).
+        """
+        self._pending.append(row)
+        if self._commit is None:
+            self._commit = asyncio.create_task(self._commit_pending())
+        # shield: a cancelled save must not abort the batch of the others
+        await asyncio.shield(self._commit)
+
+    async def _commit_pending(self):
+        async with self._commit_lock:
+            rows, self._pending = self._pending, []
+            self._commit = None
+            await self._insert(rows)
+
+    @staticmethod
+    async def _insert(rows: list):
+        async with SessionLocal() as db:
+            await db.execute(insert(GeneratedOutput), rows)
+            await db.commit()
+
+    @staticmethod
+    async def _oldest(*conditions) -> list:
+        async with SessionLocal() as db:
+            result = await db.execute(
+                select(GeneratedOutput.filename, GeneratedOutput.size)
+                .where(*conditions)
+                .order_by(GeneratedOutput.created_at)
+                .limit(GC_BATCH)
+            )
+            return result.all()
+
+    @staticmethod
+    async def _delete(batch: list) -> int:
+        """Deletes the files, then their index rows. Returns the bytes freed."""
+        await run_in_threadpool(_unlink, [shard_path(name) for name, _ in batch])
+        async with SessionLocal() as db:
+            await db.execute(delete(GeneratedOutput).where(GeneratedOutput.filename.in_([name for name, _ in batch])))
+            await db.commit()
+        return sum(size for _, size in batch)
+
+    @staticmethod
+    async def _delete_jobs(cutoff: float) -> int:
+        """Removes render jobs that finished before cutoff: their directory and rows."""
+        deleted = 0
+        while True:
+            async with SessionLocal() as db:
+                result = await db.execute(
+                    select(RenderJob.id)
+                    .where(RenderJob.status.in_(FINISHED_STATUSES), RenderJob.finished_at < cutoff)
+                    .limit(GC_BATCH)
+                )
+                job_ids = result.scalars().all()
+                if not job_ids:
+                    return deleted
+                for job_id in job_ids:
+                    await run_in_threadpool(shutil.rmtree, RenderJobRunner.job_dir(job_id), True)
+                await db.execute(delete(RenderJobItem).where(RenderJobItem.job_id.in_(job_ids)))
+                await db.execute(delete(RenderJob).where(RenderJob.id.in_(job_ids)))
+                await db.commit()
+            deleted += len(job_ids)
+
+
+output_store = OutputStore()
@@ -0,0 +1,105 @@
+from dataclasses import dataclass
+import torch
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger("uvicorn")
+
+# QUANTIZATION options
+# - fp16: half precision (CUDA). On CPU falls back to fp32, fp16 kernels there are slower.
+# - bf16: bfloat16 (CUDA with bf16 support, or CPU)
+# - int8: CPU -> dynamic int8 quantization of nn.Linear layers
+#         CUDA -> bitsandbytes 8-bit weights
+# - none: full fp32
+PRECISION_OPTIONS = ("fp16", "bf16", "int8", "none")
+
+
+@dataclass
+class PrecisionPlan:
+    mode: str            # requested QUANTIZATION value
+    device: str          # "cuda" or "cpu"
+    dtype: torch.dtype   # dtype the weights are loaded in
+    dynamic_int8: bool = False   # quantize_dynamic(nn.Linear) after loading (CPU)
+    bnb_int8: bool = False       # bitsandbytes load_in_8bit (CUDA)
+
+    @property
+    def label(self) -> str:
+        if self.dynamic_int8 or self.bnb_int8:
+            return f"int8/{self.device}"
+        return f"{str(self.dtype).replace('torch.', '')}/{self.device}"
+
+
+def resolve_precision(mode: str = None, cuda: bool = None) -> PrecisionPlan:
+    """
+    Maps the QUANTIZATION setting to a concrete loading plan for this machine.
+    Raises ValueError for unknown or unsupported choices.
+    """
+    mode = (mode or settings.QUANTIZATION or "none").lower()
+    if cuda is None:
+        cuda = settings.USE_GPU and torch.cuda.is_available()
+    device = "cuda" if cuda else "cpu"
+
+    if mode not in PRECISION_OPTIONS:
+        raise ValueError(f"Unknown QUANTIZATION '{mode}' (expected one of {', '.join(PRECISION_OPTIONS)})")
+
+    if mode == "none":
+        return PrecisionPlan(mode, device, torch.float32)
+
+    if mode == "fp16":
+        if not cuda:
+            logger.warning("QUANTIZATION=fp16 is not efficient on CPU; using fp32 (try bf16 or int8)")
+            return PrecisionPlan(mode, device, torch.float32)
+        return PrecisionPlan(mode, device, torch.float16)
+
+    if mode == "bf16":
+        if cuda and not torch.cuda.is_bf16_supported():
+            raise ValueError("QUANTIZATION=bf16 requested but this GPU does not support bfloat16 (use fp16)")
+        return PrecisionPlan(mode, device, torch.bfloat16)
+
+    # int8
+    if cuda:
+        try:
+            import bitsandbytes  # noqa: F401
+        except ImportError:
+            raise ValueError("QUANTIZATION=int8 on CUDA requires bitsandbytes (pip install bitsandbytes)")
+        return PrecisionPlan(mode, device, torch.float16, bnb_int8=True)
+
+    if not [e for e in torch.backends.quantized.supported_engines if e != "none"]:
+        raise ValueError("QUANTIZATION=int8 requested but this PyTorch build has no quantized CPU engine")
+    return PrecisionPlan(mode, device, torch.float32, dynamic_int8=True)
+
+
+def load_kwargs(plan: PrecisionPlan) -> dict:
+    """
+    Keyword arguments for Qwen3TTSModel.from_pretrained under the plan.
+    """
+    kwargs = {"device_map": "auto", "torch_dtype": plan.dtype}
+    if plan.bnb_int8:
+        from transformers import BitsAndBytesConfig
+
+        kwargs["quantization_config"] = BitsAndBytesConfig(load_in_8bit=True)
+    return kwargs
+
+
+def apply_precision(model, plan: PrecisionPlan):
+    """
+    Post-load step (dynamic int8) and validation that the weights really
+    ended up in the planned precision.
+    """
+    module = getattr(model, "model", model)
+    if not isinstance(module, torch.nn.Module):
+        return model
+
+    if plan.dynamic_int8:
+        torch.ao.quantization.quantize_dynamic(module, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+        quantized = sum(1 for m in module.modules() if isinstance(m, torch.ao.nn.quantized.dynamic.Linear))
+        if quantized == 0:
+            raise RuntimeError("int8 quantization did not convert any Linear layers")
+        logger.info(f"Dynamic int8: quantized {quantized} Linear layers")
+        return model
+
+    if not plan.bnb_int8:
+        dtypes = {p.dtype for p in module.parameters() if p.is_floating_point()}
+        if dtypes and plan.dtype not in dtypes:
+            raise RuntimeError(f"Model weights loaded as {dtypes}, expected {plan.dtype}")
+    return model
@@ -0,0 +1,115 @@
+import numpy as np
+from app.core.config import settings
+
+# Analysis frames: 20 ms windows every 10 ms
+FRAME_MS = 20
+HOP_MS = 10
+
+_EPS = 1e-10
+
+
+def clipping_ratio(audio: np.ndarray) -> float:
+    """Fraction of samples at (or within 0.1% of) full scale."""
+    if not len(audio):
+        return 0.0
+    return float(np.count_nonzero(np.abs(audio) >= 0.999) / len(audio))
+
+
+def frame_energy_db(audio: np.ndarray, sr: int) -> np.ndarray:
+    """RMS level of each analysis frame in dBFS."""
+    frame = int(sr * FRAME_MS / 1000)
+    hop = int(sr * HOP_MS / 1000)
+    if len(audio) < frame:
+        audio = np.pad(audio, (0, frame - len(audio)))
+    frames = np.lib.stride_tricks.sliding_window_view(audio, frame)[::hop]
+    return 10 * np.log10(np.mean(frames.astype(np.float64) ** 2, axis=1) + _EPS)
+
+
+def voiced_frames(energy_db: np.ndarray) -> tuple:
+    """
+    Energy VAD: frames well above the noise floor (10th percentile level)
+    and within 45 dB of the loudest frame.
+    Returns (voiced mask, threshold dB, noise floor dB).
+    """
+    noise_floor = np.percentile(energy_db, 10)
+    threshold = max(noise_floor + 8.0, energy_db.max() - 45.0)
+    return energy_db > threshold, threshold, noise_floor
+
+
+def estimate_snr_db(energy_db: np.ndarray, voiced: np.ndarray, noise_floor: float) -> float:
+    if not voiced.any():
+        return 0.0  # no frame stands out from the rest: all noise
+    speech_power = np.mean(10 ** (energy_db[voiced] / 10))
+    noise_power = np.mean(10 ** (energy_db[~voiced] / 10)) if (~voiced).any() else 10 ** (noise_floor / 10)
+    return float(10 * np.log10(speech_power / max(noise_power, _EPS)))
+
+
+def best_window(voiced: np.ndarray, length: int) -> int:
+    """
+    Start frame of the length-frame window with the most voiced frames,
+    preferring windows that start and end in a pause (no cut-off words).
+    """
+    if len(voiced) <= length:
+        return 0
+    counts = np.concatenate(([0], np.cumsum(voiced, dtype=np.int64)))
+    speech = counts[length:] - counts[:-length]
+    starts = np.arange(len(speech))
+    clean_cut = (~voiced[starts]).astype(np.float64) + (~voiced[starts + length - 1])
+    return int(np.argmax(speech + 0.5 * clean_cut))
+
+
+def reference_metrics(audio: np.ndarray, sr: int) -> dict:
+    """Quality metrics of reference audio as is (REFERENCE_CONDITIONING off)."""
+    audio = np.asarray(audio, dtype=np.float32)
+    energy = frame_energy_db(audio, sr)
+    voiced, _, noise_floor = voiced_frames(energy)
+    return {
+        "clipping_ratio": round(clipping_ratio(audio), 5),
+        "snr_db": round(estimate_snr_db(energy, voiced, noise_floor), 1),
+        "duration_s": round(len(audio) / sr, 2),
+    }
+
+
+def condition_reference(audio: np.ndarray, sr: int) -> tuple:
+    """
+    Prepares reference audio for cloning, once at upload:
+    - trims leading/trailing silence (energy VAD, REFERENCE_TRIM_PAD_MS kept),
+    - keeps the most speech-dense window of at most REFERENCE_MAX_SECONDS,
+    - normalizes the speech level to REFERENCE_TARGET_DBFS (peaks <= -1 dBFS).
+    Returns (audio, metrics) with duration_s, snr_db and clipping_ratio
+    (clipping is measured before any gain is applied).
+    """
+    audio = np.asarray(audio, dtype=np.float32)
+    hop = int(sr * HOP_MS / 1000)
+    frame = int(sr * FRAME_MS / 1000)
+    metrics = {"clipping_ratio": round(clipping_ratio(audio), 5)}
+
+    energy = frame_energy_db(audio, sr)
+    voiced, _, noise_floor = voiced_frames(energy)
+    metrics["snr_db"] = round(estimate_snr_db(energy, voiced, noise_floor), 1)
+
+    if voiced.any():
+        # Silence trim
+        pad = int(settings.REFERENCE_TRIM_PAD_MS / HOP_MS)
+        first, last = np.flatnonzero(voiced)[[0, -1]]
+        first, last = max(0, first - pad), min(len(voiced) - 1, last + pad)
+
+        # Length cap
+        max_frames = int(settings.REFERENCE_MAX_SECONDS * 1000 / HOP_MS) if settings.REFERENCE_MAX_SECONDS else 0
+        if max_frames and last - first + 1 > max_frames:
+            first += best_window(voiced[first:last + 1], max_frames)
+            last = first + max_frames - 1
+
+        audio = audio[first * hop:min(len(audio), last * hop + frame)]
+        voiced = voiced[first:last + 1]
+
+        # Loudness: gain from the level of the speech frames only
+        speech_db = 10 * np.log10(np.mean(10 ** (energy[first:last + 1][voiced] / 10)) + _EPS)
+        gain = 10 ** ((settings.REFERENCE_TARGET_DBFS - speech_db) / 20)
+        peak = float(np.abs(audio).max()) if len(audio) else 0.0
+        if peak * gain > 10 ** (-1 / 20):
+            gain = 10 ** (-1 / 20) / peak
+        audio = (audio * gain).astype(np.float32)
+
+    metrics["duration_s"] = round(len(audio) / sr, 2)
+    return audio, metrics
@@ -0,0 +1,292 @@
+import asyncio
+import json
+import os
+import time
+import zipfile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import update
+from sqlalchemy.future import select
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.render_job import RenderJob, RenderJobItem
+from app.services.admission import admission, AdmissionRejected
+from app.services.audio_encoder import get_format, encode
+from app.services.synthesis import resolve_voice, render
+import logging
+
+logger = logging.getLogger("uvicorn")
+
+ACTIVE_STATUSES = ("queued", "running")
+FINISHED_STATUSES = ("done", "failed", "cancelled")
+
+
+def _write_file(path: str, data: bytes):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class RenderJobRunner:
+    """
+    Renders whole scripts as background jobs.
+
+    Items of a job are submitted concurrently (RENDER_JOB_CONCURRENCY at a
+    time) through the same path as /tts/generate, so the batch scheduler
+    groups them into full batches and repeated lines hit the result cache.
+    Each item takes an admission slot as client "job:<id>", so jobs share
+    the in-flight limit round-robin with interactive requests and wait
+    (instead of failing) when the server is busy. At most
+    RENDER_JOB_MAX_RUNNING jobs run at once; the rest stay queued.
+    Progress is stored per item in the database: jobs keep running when the
+    client goes away, and queued/running jobs resume after a restart,
+    skipping the items that are already done.
+    """
+
+    def __init__(self):
+        self._tasks = {}   # job_id -> asyncio.Task
+        self._events = {}  # job_id -> asyncio.Event, set on the next progress update
+        self._db_lock = asyncio.Lock()  # progress writes, one at a time (SQLite has a single writer)
+        self._running = None  # asyncio.Semaphore(RENDER_JOB_MAX_RUNNING), created on first use
+
+    async def start(self):
+        """Resumes jobs interrupted by a shutdown or crash."""
+        async with SessionLocal() as db:
+            result = await db.execute(select(RenderJob.id).where(RenderJob.status.in_(ACTIVE_STATUSES)))
+            job_ids = result.scalars().all()
+        for job_id in job_ids:
+            logger.info(f"Resuming render job {job_id}")
+            self._schedule(job_id)
+
+    async def stop(self):
+        # Jobs stay "running" in the database and are resumed on the next start()
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def submit(self, items: list, output_format: str) -> RenderJob:
+        """
+        Creates a job for [{"text", "voice_id", "voice_prompt"}, ...] and starts it.
+        """
+        async with SessionLocal() as db:
+            job = RenderJob(format=output_format, total=len(items))
+            db.add(job)
+            await db.flush()
+            db.add_all([
+                RenderJobItem(
+                    job_id=job.id,
+                    position=position,
+                    text=item["text"],
+                    voice_id=item.get("voice_id"),
+                    voice_prompt=item.get("voice_prompt"),
+                )
+                for position, item in enumerate(items)
+            ])
+            await db.commit()
+            await db.refresh(job)
+        self._schedule(job.id)
+        return job
+
+    async def cancel(self, job_id: str) -> bool:
+        async with self._db_lock:
+            async with SessionLocal() as db:
+                result = await db.execute(
+                    update(RenderJob)
+                    .where(RenderJob.id == job_id, RenderJob.status.in_(ACTIVE_STATUSES))
+                    .values(status="cancelled", finished_at=time.time())
+                )
+                await db.commit()
+        task = self._tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+        self._notify(job_id)
+        return result.rowcount > 0
+
+    async def wait_for_update(self, job_id: str, timeout: float):
+        """Returns after the job's next progress update, or after timeout."""
+        event = self._events.setdefault(job_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    @staticmethod
+    def job_dir(job_id: str) -> str:
+        return os.path.join(settings.OUTPUT_DIR, "jobs", job_id)
+
+    def _notify(self, job_id: str):
+        event = self._events.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    def _schedule(self, job_id: str):
+        if job_id in self._tasks:
+            return
+        task = asyncio.create_task(self._run(job_id))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+    async def _run(self, job_id: str):
+        if self._running is None:
+            self._running = asyncio.Semaphore(max(1, settings.RENDER_JOB_MAX_RUNNING))
+        async with self._running:
+            await self._run_job(job_id)
+
+    async def _render_item(self, job_id: str, text: str, model: str, extra: str, fmt, voice_id: str):
+        """render() under an admission slot; waits out rejections instead of failing the line."""
+        while True:
+            try:
+                async with admission.slot(f"job:{job_id}"):
+                    return await render(text, model, extra, fmt, voice_id=voice_id)
+            except AdmissionRejected as e:
+                await asyncio.sleep(e.retry_after)
+
+    async def _run_job(self, job_id: str):
+        try:
+            async with SessionLocal() as db:
+                job = await db.get(RenderJob, job_id)
+                if job is None or job.status not in ACTIVE_STATUSES:
+                    return
+                fmt = get_format(job.format)
+                job.status = "running"
+                await db.commit()
+
+                result = await db.execute(
+                    select(RenderJobItem)
+                    .where(RenderJobItem.job_id == job_id, RenderJobItem.status == "pending")
+                    .order_by(RenderJobItem.position)
+                )
+                items = result.scalars().all()
+
+                # Resolve each distinct voice once
+                voices = {}
+                for item in items:
+                    voice = (item.voice_id, item.voice_prompt)
+                    if voice not in voices:
+                        voices[voice] = await resolve_voice(db, item.voice_id, item.voice_prompt)
+                work = [
+                    (item.id, item.position, item.text, item.voice_id, *voices[(item.voice_id, item.voice_prompt)])
+                    for item in items
+                ]
+            self._notify(job_id)
+
+            out_dir = self.job_dir(job_id)
+            os.makedirs(out_dir, exist_ok=True)
+            semaphore = asyncio.Semaphore(max(1, settings.RENDER_JOB_CONCURRENCY))
+
+            async def run_item(item_id, position, text, voice_id, model, extra):
+                async with semaphore:
+                    output_path, error = None, None
+                    try:
+                        audio_data = await self._render_item(job_id, text, model, extra, fmt, voice_id)
+                        output_path = os.path.join(out_dir, f"{position:05d}.{fmt.extension}")
+                        await run_in_threadpool(_write_file, output_path, audio_data)
+                    except Exception as e:
+                        logger.error(f"Render job {job_id} item {position} failed: {e}")
+                        output_path, error = None, str(e)
+                    await self._record_item(job_id, item_id, output_path, error)
+
+            await asyncio.gather(*(run_item(*args) for args in work))
+            await self._finish(job_id)
+
+        except Exception as e:
+            logger.error(f"Render job {job_id} failed: {e}")
+            await self._finish(job_id, error=str(e))
+
+    async def _record_item(self, job_id: str, item_id: int, output_path: str, error: str):
+        async with self._db_lock:
+            async with SessionLocal() as db:
+                await db.execute(
+                    update(RenderJobItem)
+                    .where(RenderJobItem.id == item_id)
+                    .values(status="failed" if error else "done", output_path=output_path, error=error)
+                )
+                counter = RenderJob.failed if error else RenderJob.completed
+                await db.execute(update(RenderJob).where(RenderJob.id == job_id).values({counter: counter + 1}))
+                await db.commit()
+        self._notify(job_id)
+
+    async def _finish(self, job_id: str, error: str = None):
+        async with self._db_lock:
+            async with SessionLocal() as db:
+                job = await db.get(RenderJob, job_id)
+                if job is not None and job.status in ACTIVE_STATUSES:
+                    failed = error is not None or (job.completed == 0 and job.failed > 0)
+                    job.status = "failed" if failed else "done"
+                    job.error = error
+                    job.finished_at = time.time()
+                    summary = f"{job.status}: {job.completed}/{job.total} lines, {job.failed} failed"
+                    await db.commit()
+                    logger.info(f"Render job {job_id} {summary}")
+        self._notify(job_id)
+
+    async def build_output(self, job: RenderJob, kind: str) -> str:
+        """
+        Path of the job's combined output, built on first request:
+        "zip" (one file per line + manifest.json) or "track" (all lines joined).
+        """
+        async with SessionLocal() as db:
+            result = await db.execute(
+                select(RenderJobItem).where(RenderJobItem.job_id == job.id).order_by(RenderJobItem.position)
+            )
+            items = [(i.position, i.text, i.voice_id, i.voice_prompt, i.status, i.output_path, i.error) for i in result.scalars().all()]
+
+        fmt = get_format(job.format)
+        if kind == "zip":
+            path = os.path.join(self.job_dir(job.id), f"job_{job.id}.zip")
+            builder = self._build_zip
+        else:
+            path = os.path.join(self.job_dir(job.id), f"job_{job.id}.{fmt.extension}")
+            builder = self._build_track
+        if not os.path.exists(path):
+            os.makedirs(self.job_dir(job.id), exist_ok=True)
+            await run_in_threadpool(builder, path, items, fmt)
+        return path
+
+    @staticmethod
+    def _build_zip(path: str, items: list, fmt):
+        manifest = []
+        tmp_path = path + ".tmp"
+        # Audio is already compressed (or PCM that barely deflates): store as is
+        with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_STORED) as archive:
+            for position, text, voice_id, voice_prompt, status, output_path, error in items:
+                name = f"{position + 1:04d}.{fmt.extension}" if status == "done" else None
+                if name:
+                    archive.write(output_path, name)
+                manifest.append({
+                    "position": position,
+                    "file": name,
+                    "text": text,
+                    "voice_id": voice_id,
+                    "voice_prompt": voice_prompt,
+                    "status": status,
+                    "error": error,
+                })
+            archive.writestr("manifest.json", json.dumps(manifest, indent=2, ensure_ascii=False))
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _build_track(path: str, items: list, fmt):
+        import numpy as np
+        import soundfile as sf
+
+        chunks, sample_rate = [], None
+        for position, text, voice_id, voice_prompt, status, output_path, error in items:
+            if status != "done":
+                continue
+            audio, sr = sf.read(output_path, dtype="float32")
+            if sample_rate is None:
+                sample_rate = sr
+            elif sr != sample_rate:
+                raise ValueError(f"Line {position} has sample rate {sr}, expected {sample_rate}")
+            if chunks:
+                chunks.append(np.zeros(int(sample_rate * settings.RENDER_JOB_GAP_MS / 1000), dtype=np.float32))
+            chunks.append(audio)
+        if not chunks:
+            raise ValueError("Job has no rendered lines")
+        _write_file(path, encode(np.concatenate(chunks), sample_rate, fmt))
+
+
+render_jobs = RenderJobRunner()
@@ -0,0 +1,117 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger("uvicorn")
+
+
+def usable_cpus() -> list:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def plan_core_sets(cpus: list, replicas: int = 0, threads: int = 0) -> list:
+    """
+    Splits the usable cores into one core set per replica.
+    replicas=0 picks len(cpus) // threads (or one replica per 4 cores when
+    threads is also 0); threads=0 gives every replica an equal share.
+    """
+    if replicas <= 0:
+        replicas = max(1, len(cpus) // (threads if threads > 0 else 4))
+    if threads <= 0:
+        threads = max(1, len(cpus) // replicas)
+    if replicas * threads > len(cpus):
+        logger.warning(
+            f"{replicas} replicas x {threads} threads exceeds the {len(cpus)} usable cores; replicas will share cores"
+        )
+    # Contiguous blocks keep a replica on neighbouring cores (shared caches)
+    return [[cpus[(r * threads + t) % len(cpus)] for t in range(threads)] for r in range(replicas)]
+
+
+def _init_replica(cores: list, interop_threads: int):
+    """
+    Runs once inside every replica process, before any torch work:
+    pins it to its cores and sizes torch's thread pools to match.
+    """
+    import torch
+    from app.services.tts_service import tts_service
+
+    if settings.CPU_PIN_REPLICAS and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    torch.set_num_threads(len(cores))
+    torch.set_num_interop_threads(max(1, interop_threads))
+    tts_service.initialize_model()
+
+
+def _run_job(method: str, kwargs: dict):
+    from app.services.tts_service import tts_service
+    return getattr(tts_service, method)(**kwargs)
+
+
+@dataclass
+class Replica:
+    index: int
+    cores: list
+    executor: ProcessPoolExecutor = field(repr=False)
+    pid: int = None
+    outstanding: int = 0
+    served: int = 0
+
+
+class CPUReplicaPool:
+    """
+    K model replicas in separate processes, each pinned to its own cores
+    with intra-op threads = its core count, so concurrent requests don't
+    contend for the same cores the way one all-cores model does.
+    Jobs go to the replica with the fewest outstanding jobs.
+    """
+
+    def __init__(self):
+        self._replicas = []
+
+    def __len__(self):
+        return len(self._replicas)
+
+    def start(self):
+        core_sets = plan_core_sets(usable_cpus(), settings.CPU_REPLICAS, settings.CPU_THREADS_PER_REPLICA)
+        context = multiprocessing.get_context("spawn")
+        for index, cores in enumerate(core_sets):
+            executor = ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=context,
+                initializer=_init_replica,
+                initargs=(cores, settings.CPU_INTEROP_THREADS),
+            )
+            replica = Replica(index, cores, executor)
+            # Spawn now so the models load in the background, not on the first request
+            executor.submit(os.getpid).add_done_callback(
+                lambda f, replica=replica: setattr(replica, "pid", None if f.exception() else f.result())
+            )
+            self._replicas.append(replica)
+        logger.info(f"CPU replica pool: {len(core_sets)} replica(s), cores {core_sets}")
+
+    async def run(self, method: str, kwargs: dict):
+        replica = min(self._replicas, key=lambda r: (r.outstanding, r.served))
+        replica.outstanding += 1
+        try:
+            future = replica.executor.submit(_run_job, method, kwargs)
+            return await asyncio.wrap_future(future)
+        finally:
+            replica.outstanding -= 1
+            replica.served += 1
+
+    def shutdown(self):
+        for replica in self._replicas:
+            replica.executor.shutdown(wait=False, cancel_futures=True)
+        self._replicas = []
+
+    def stats(self) -> list:
+        return [
+            {"index": r.index, "pid": r.pid, "cores": r.cores, "outstanding": r.outstanding, "served": r.served}
+            for r in self._replicas
+        ]
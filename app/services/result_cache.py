@@ -0,0 +1,224 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from fastapi.concurrency import run_in_threadpool
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger("uvicorn")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form of a script line: NFC unicode, collapsed whitespace.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(text: str, voice: str = None, ref_fingerprint: str = None, speed: float = 1.0, model_id: str = None) -> str:
+    """
+    Content address of a synthesis result.
+    """
+    payload = json.dumps(
+        [normalize_text(text), voice, ref_fingerprint, round(float(speed), 3), model_id],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def variant_key(key: str, output_format: str, bitrate_kbps: int = None) -> str:
+    """
+    Cache key of an encoded (Opus/MP3/FLAC) variant of a cached WAV result.
+    """
+    return hashlib.sha256(f"{key}:{output_format}:{bitrate_kbps}".encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheEntry:
+    size: int
+    created_at: float
+
+
+class ResultCache:
+    """
+    Content-addressed cache of synthesized audio.
+
+    - In-memory index (LRU order) over <key>.wav files in RESULT_CACHE_DIR
+      (encoded variants are stored under their own key, same suffix)
+    - Byte budget (RESULT_CACHE_MAX_BYTES) with LRU eviction, plus TTL expiry
+    - Single-flight: concurrent identical requests share one inference
+    """
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = None, ttl: float = None):
+        self.cache_dir = cache_dir or settings.RESULT_CACHE_DIR
+        self.max_bytes = max_bytes if max_bytes is not None else settings.RESULT_CACHE_MAX_BYTES
+        self.ttl = ttl if ttl is not None else settings.RESULT_CACHE_TTL_S
+        self._index = OrderedDict()  # key -> CacheEntry, least recently used first
+        self._bytes = 0
+        self._inflight = {}  # key -> asyncio.Task
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def load_index(self):
+        """
+        Rebuilds the index from disk (once, at startup). Oldest files first.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for de in it:
+                if de.is_file() and de.name.endswith(".wav"):
+                    st = de.stat()
+                    entries.append((st.st_mtime, de.name[:-4], st.st_size))
+        self._index.clear()
+        self._bytes = 0
+        for mtime, key, size in sorted(entries):
+            self._index[key] = CacheEntry(size=size, created_at=mtime)
+            self._bytes += size
+        self._unlink(self._evict(expire=True))
+        logger.info(f"Result cache: {len(self._index)} entries, {self._bytes / 1e6:.1f} MB")
+
+    async def get_or_create(self, key: str, factory):
+        """
+        Returns cached bytes for key, or awaits factory() once and caches the result.
+        Identical concurrent requests wait on the same task. If factory()
+        raises, every waiter gets the exception and nothing is cached.
+        """
+        data = await self.get(key)
+        if data is not None:
+            return data
+
+        task = self._inflight.get(key)
+        if task is not None and not task.done() and not task.cancelling():
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.create_task(self._fill(key, factory))
+            task.waiters = 0
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        # shield: one caller disconnecting must not cancel the shared inference,
+        # but once every caller has gone the inference is dropped
+        task.waiters += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            task.waiters -= 1
+            if task.waiters == 0 and not task.done():
+                task.cancel()
+                # Identical requests arriving from now on start a fresh fill
+                self._forget(key, task)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    async def get(self, key: str):
+        if not settings.RESULT_CACHE_ENABLED:
+            return None
+        entry = self._index.get(key)
+        if entry is None:
+            return None
+        if self._expired(entry):
+            self._remove(key)
+            return None
+        try:
+            data = await run_in_threadpool(self._read, key)
+        except FileNotFoundError:
+            # Deleted behind our back
+            self._remove(key)
+            return None
+        self._index.move_to_end(key)
+        self.hits += 1
+        return data
+
+    async def put(self, key: str, data: bytes):
+        if not settings.RESULT_CACHE_ENABLED or len(data) > self.max_bytes:
+            return
+        await run_in_threadpool(self._write, key, data)
+        if key in self._index:
+            self._bytes -= self._index[key].size
+        self._index[key] = CacheEntry(size=len(data), created_at=time.time())
+        self._index.move_to_end(key)
+        self._bytes += len(data)
+        evicted = self._evict()
+        if evicted:
+            await run_in_threadpool(self._unlink, evicted)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._index),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+        }
+
+    async def _fill(self, key: str, factory):
+        data = await factory()
+        await self.put(key, data)
+        return data
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.wav")
+
+    def _read(self, key: str) -> bytes:
+        with open(self._path(key), "rb") as f:
+            return f.read()
+
+    def _write(self, key: str, data: bytes):
+        tmp_path = self._path(key) + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(key))
+
+    def _expired(self, entry: CacheEntry) -> bool:
+        return self.ttl > 0 and time.time() - entry.created_at > self.ttl
+
+    def _drop(self, key: str):
+        """
+        Removes key from the index. Returns the file path to delete.
+        """
+        entry = self._index.pop(key)
+        self._bytes -= entry.size
+        return self._path(key)
+
+    def _remove(self, key: str):
+        if key in self._index:
+            self._unlink([self._drop(key)])
+
+    @staticmethod
+    def _unlink(paths: list):
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _evict(self, expire: bool = False) -> list:
+        """
+        Shrinks the index under the byte budget (LRU first); optionally also
+        drops expired entries. Returns the evicted file paths.
+        """
+        paths = []
+        if expire:
+            for key in [k for k, e in self._index.items() if self._expired(e)]:
+                paths.append(self._drop(key))
+        while self._bytes > self.max_bytes and self._index:
+            paths.append(self._drop(next(iter(self._index))))
+        self.evictions += len(paths)
+        return paths
+
+
+result_cache = ResultCache()
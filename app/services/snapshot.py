@@ -0,0 +1,176 @@
+import json
+import os
+import shutil
+import time
+import torch
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger("uvicorn")
+
+# Written last by export_snapshot(): a directory without it is incomplete
+MANIFEST = "snapshot.json"
+
+# safetensors dtype codes
+_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+
+
+def read_manifest(path: str):
+    """The snapshot manifest of a model directory, or None if it isn't a snapshot."""
+    try:
+        with open(os.path.join(path, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def snapshot_path(name: str):
+    """Directory of the exported snapshot for a model, if MODEL_SNAPSHOT_DIR has one."""
+    if not settings.MODEL_SNAPSHOT_DIR:
+        return None
+    path = os.path.join(settings.MODEL_SNAPSHOT_DIR, name)
+    return path if read_manifest(path) is not None else None
+
+
+def storage_dtype(plan) -> torch.dtype:
+    """dtype the weights are stored in for a precision plan (int8 is applied at load time)."""
+    return torch.float16 if plan.bnb_int8 else plan.dtype
+
+
+def mmap_safetensors(path: str, strict: bool = False) -> dict:
+    """
+    Tensors of a .safetensors file as views of one private file mapping:
+    nothing is read until a page is touched, and processes mapping the
+    same file share its pages through the page cache.
+    Tensors whose data isn't aligned to their element size are skipped
+    (strict: ValueError instead).
+    """
+    with open(path, "rb") as f:
+        header_size = int.from_bytes(f.read(8), "little")
+        header = json.loads(f.read(header_size))
+    storage = torch.UntypedStorage.from_file(path, shared=False, nbytes=os.path.getsize(path))
+
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__" or info["dtype"] not in _DTYPES:
+            continue
+        dtype = _DTYPES[info["dtype"]]
+        offset = 8 + header_size + info["data_offsets"][0]
+        itemsize = torch.empty(0, dtype=dtype).element_size()
+        if offset % itemsize:
+            if strict:
+                raise ValueError(f"{name} in {path} is not aligned for memory mapping")
+            continue
+        tensors[name] = torch.empty(0, dtype=dtype).set_(storage, offset // itemsize, info["shape"])
+    return tensors
+
+
+def mmap_snapshot(path: str, strict: bool = False) -> dict:
+    """Every tensor of the snapshot's top-level .safetensors files, memory-mapped."""
+    mapped = {}
+    for filename in sorted(os.listdir(path)):
+        if filename.endswith(".safetensors"):
+            mapped.update(mmap_safetensors(os.path.join(path, filename), strict=strict))
+    return mapped
+
+
+def map_weights(module: torch.nn.Module, path: str, mapped: dict = None) -> int:
+    """
+    Points the module's CPU parameters and buffers at memory-mapped copies
+    from the snapshot's .safetensors files (same name, dtype and shape).
+    Tensors already backed by the mapping are counted, not replaced.
+    Returns the number of bytes now backed by the mapping.
+    """
+    if mapped is None:
+        mapped = mmap_snapshot(path)
+
+    mapped_bytes = 0
+    with torch.no_grad():
+        for name, tensor in list(module.named_parameters()) + list(module.named_buffers()):
+            source = mapped.get(name)
+            if (
+                source is None
+                or tensor.device.type != "cpu"
+                or source.dtype != tensor.dtype
+                or source.shape != tensor.shape
+            ):
+                continue
+            if tensor.data_ptr() != source.data_ptr():
+                tensor.data = source
+            mapped_bytes += source.numel() * source.element_size()
+    return mapped_bytes
+
+
+def _source_dir(path: str) -> str:
+    if os.path.isdir(path):
+        return path
+    from huggingface_hub import snapshot_download
+
+    return snapshot_download(path)
+
+
+def export_snapshot(name: str, source: str, dest: str, plan) -> dict:
+    """
+    Writes a model to dest as a local snapshot: the source files (configs,
+    tokenizer, processor, speech tokenizer) plus the weights re-saved as
+    safetensors in the plan's storage dtype. Replaces an existing snapshot
+    only once the new one is complete. Returns the manifest.
+    """
+    from qwen_tts import Qwen3TTSModel
+
+    dtype = storage_dtype(plan)
+    started = time.perf_counter()
+    model = Qwen3TTSModel.from_pretrained(source, device_map="cpu", torch_dtype=dtype)
+    load_s = time.perf_counter() - started
+
+    src = _source_dir(source)
+    tmp = dest + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+
+    def skip_weights(directory, names):
+        # Top-level weights are re-saved below in the target dtype
+        if os.path.abspath(directory) != os.path.abspath(src):
+            return []
+        return [n for n in names if n.endswith((".safetensors", ".bin", ".index.json")) or n == MANIFEST]
+
+    shutil.copytree(src, tmp, ignore=skip_weights)
+    getattr(model, "model", model).save_pretrained(tmp, safe_serialization=True)
+    processor = getattr(model, "processor", None)
+    if processor is not None and hasattr(processor, "save_pretrained"):
+        processor.save_pretrained(tmp)
+
+    files = {}
+    for root, _, names in os.walk(tmp):
+        for n in names:
+            full = os.path.join(root, n)
+            files[os.path.relpath(full, tmp)] = os.path.getsize(full)
+    manifest = {
+        "name": name,
+        "source": source,
+        "dtype": str(dtype).replace("torch.", ""),
+        "quantization": plan.mode,
+        "created_at": time.time(),
+        "source_load_s": round(load_s, 2),
+        "files": files,
+    }
+    with open(os.path.join(tmp, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    old = dest + ".old"
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.exists(dest):
+        os.replace(dest, old)
+    os.replace(tmp, dest)
+    shutil.rmtree(old, ignore_errors=True)
+    return manifest
@@ -0,0 +1,153 @@
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import asdict
+import torch
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger("uvicorn")
+
+
+def reference_fingerprint(ref_audio_path: str) -> str:
+    """
+    Cheap identity of a reference audio file (size + mtime).
+    Changes whenever the file is rewritten.
+    """
+    st = os.stat(ref_audio_path)
+    return f"{st.st_size}-{st.st_mtime_ns}"
+
+
+def embedding_path_for(ref_audio_path: str) -> str:
+    """
+    Speaker features are stored next to the reference audio: vault/voices/<id>.pt
+    """
+    return os.path.splitext(ref_audio_path)[0] + ".pt"
+
+
+class SpeakerEmbeddingCache:
+    """
+    LRU cache of voice clone prompts (x-vector speaker conditioning) keyed by
+    reference audio path.
+
+    Lookup order: memory -> .pt file on disk -> compute with the Base model.
+    Entries are validated against the reference audio fingerprint, so a
+    replaced reference file is never served stale features.
+    Thread-safe: called from inference worker threads.
+    """
+
+    def __init__(self, max_entries: int = None):
+        self._max_entries = max_entries or settings.SPEAKER_CACHE_SIZE
+        self._entries = OrderedDict()  # path -> (fingerprint, VoiceClonePromptItem)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get_many(self, ref_audio_paths: list, model) -> list:
+        """
+        Returns one VoiceClonePromptItem per path, computing missing ones in a single batch.
+        """
+        items = {}
+        missing = []
+        for path in dict.fromkeys(ref_audio_paths):
+            fingerprint = reference_fingerprint(path)
+            item = self._lookup(path, fingerprint)
+            if item is None:
+                item = self._load(path, fingerprint, model)
+            if item is None:
+                missing.append((path, fingerprint))
+            else:
+                items[path] = item
+
+        if missing:
+            computed = self.extract([p for p, _ in missing], model, fingerprints=[fp for _, fp in missing])
+            items.update(zip([p for p, _ in missing], computed))
+
+        return [items[path] for path in ref_audio_paths]
+
+    def extract(self, ref_audio_paths: list, model, fingerprints: list = None) -> list:
+        """
+        Computes speaker features for the given reference files in one batch,
+        saves them as .pt next to each file and caches them.
+        """
+        if fingerprints is None:
+            fingerprints = [reference_fingerprint(p) for p in ref_audio_paths]
+
+        with self._lock:
+            self.misses += len(ref_audio_paths)
+        logger.info(f"Extracting speaker features for {len(ref_audio_paths)} reference(s)")
+
+        items = model.create_voice_clone_prompt(
+            ref_audio=list(ref_audio_paths),
+            x_vector_only_mode=True,
+        )
+        for path, fingerprint, item in zip(ref_audio_paths, fingerprints, items):
+            torch.save(
+                {
+                    "fingerprint": fingerprint,
+                    "model": settings.TTS_CLONE_MODEL_PATH,
+                    "item": {k: v.cpu() if torch.is_tensor(v) else v for k, v in asdict(item).items()},
+                },
+                embedding_path_for(path),
+            )
+            self._store(path, fingerprint, item)
+        return items
+
+    def invalidate(self, ref_audio_path: str):
+        with self._lock:
+            self._entries.pop(ref_audio_path, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self._max_entries,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+        }
+
+    def _lookup(self, path: str, fingerprint: str):
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                return None
+            if entry[0] != fingerprint:
+                # Reference audio changed since extraction
+                del self._entries[path]
+                return None
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return entry[1]
+
+    def _load(self, path: str, fingerprint: str, model):
+        pt_path = embedding_path_for(path)
+        if not os.path.exists(pt_path):
+            return None
+        try:
+            from qwen_tts import VoiceClonePromptItem
+
+            payload = torch.load(pt_path, map_location=model.device, weights_only=True)
+            if payload.get("fingerprint") != fingerprint or payload.get("model") != settings.TTS_CLONE_MODEL_PATH:
+                return None
+            item = VoiceClonePromptItem(**payload["item"])
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable speaker features {pt_path}: {e}")
+            return None
+
+        with self._lock:
+            self.disk_hits += 1
+        self._store(path, fingerprint, item)
+        return item
+
+    def _store(self, path: str, fingerprint: str, item):
+        with self._lock:
+            self._entries[path] = (fingerprint, item)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+
+speaker_cache = SpeakerEmbeddingCache()
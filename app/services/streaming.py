@@ -0,0 +1,162 @@
+import asyncio
+import re
+import struct
+import time
+import numpy as np
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger("uvicorn")
+
+# Sentence boundary: western punctuation followed by whitespace, or CJK full stops
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+|(?<=[。！？])")
+
+
+def split_sentences(text: str, min_chars: int = None) -> list:
+    """
+    Splits a script line into sentences for streaming synthesis.
+    Very short sentences ("Hi.") are merged into the next one, since a
+    separate inference for them costs more than it saves.
+    """
+    min_chars = settings.STREAM_MIN_SENTENCE_CHARS if min_chars is None else min_chars
+    parts = [p.strip() for p in _SENTENCE_END.split(text.strip()) if p and p.strip()]
+
+    sentences = []
+    buffer = ""
+    for part in parts:
+        buffer = f"{buffer} {part}".strip() if buffer else part
+        if len(buffer) >= min_chars:
+            sentences.append(buffer)
+            buffer = ""
+    if buffer:
+        if sentences and len(buffer) < min_chars:
+            sentences[-1] = f"{sentences[-1]} {buffer}"
+        else:
+            sentences.append(buffer)
+    return sentences
+
+
+def wav_stream_header(sr: int, channels: int = 1, bits: int = 16) -> bytes:
+    """
+    WAV header for a stream of unknown length (sizes set to the 0xFFFFFFFF
+    placeholder, which browsers and ffmpeg accept for progressive playback).
+    """
+    byte_rate = sr * channels * bits // 8
+    block_align = channels * bits // 8
+    return (
+        b"RIFF" + struct.pack("<I", 0xFFFFFFFF) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, channels, sr, byte_rate, block_align, bits)
+        + b"data" + struct.pack("<I", 0xFFFFFFFF)
+    )
+
+
+def to_pcm16(wav: np.ndarray) -> bytes:
+    return (np.clip(wav, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+
+class CrossfadeJoiner:
+    """
+    Joins consecutive sentence waveforms with a short linear crossfade,
+    holding back the tail of each chunk until the next one arrives.
+    """
+
+    def __init__(self, sr: int, crossfade_ms: float = None):
+        crossfade_ms = settings.STREAM_CROSSFADE_MS if crossfade_ms is None else crossfade_ms
+        self.n = int(sr * crossfade_ms / 1000)
+        self._tail = np.zeros(0, dtype=np.float32)
+
+    def push(self, wav) -> np.ndarray:
+        wav = np.asarray(wav, dtype=np.float32).reshape(-1)
+        k = min(len(self._tail), len(wav))
+        if k:
+            ramp = np.linspace(0.0, 1.0, k, dtype=np.float32)
+            joined = self._tail[-k:] * (1.0 - ramp) + wav[:k] * ramp
+            wav = np.concatenate([self._tail[:-k], joined, wav[k:]])
+        elif len(self._tail):
+            wav = np.concatenate([self._tail, wav])
+
+        if self.n == 0:
+            self._tail = np.zeros(0, dtype=np.float32)
+            return wav
+        self._tail = wav[-self.n:]
+        return wav[:-self.n]
+
+    def flush(self) -> np.ndarray:
+        tail, self._tail = self._tail, np.zeros(0, dtype=np.float32)
+        return tail
+
+
+class LatencyTracker:
+    """
+    Running time-to-first-byte / total latency for one response path.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._ttfb_total = 0.0
+        self._total = 0.0
+
+    def record(self, ttfb: float, total: float):
+        self.count += 1
+        self._ttfb_total += ttfb
+        self._total += total
+
+    def stats(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ttfb_ms": round(self._ttfb_total / self.count * 1000, 1) if self.count else 0.0,
+            "avg_total_ms": round(self._total / self.count * 1000, 1) if self.count else 0.0,
+        }
+
+
+# "generate" = full synthesis then JSON (TTFB == total), "stream" = chunked audio
+latency_stats = {"generate": LatencyTracker(), "stream": LatencyTracker()}
+
+
+async def stream_sentences(sentences: list, synthesize, lookahead: int = None):
+    """
+    Pipelined streaming synthesis. Yields a WAV header followed by PCM16 chunks.
+
+    The first sentence is synthesized alone for the lowest time-to-first-audio;
+    after that up to `lookahead` further sentences are in flight while the
+    current one is being sent (0 = no prefetch). synthesize(text) must return (waveform, sr).
+    """
+    lookahead = settings.STREAM_LOOKAHEAD if lookahead is None else lookahead
+    started = time.perf_counter()
+    first_byte = None
+    tasks = []
+
+    def schedule(upto: int):
+        for i in range(len(tasks), min(upto, len(sentences))):
+            tasks.append(asyncio.create_task(synthesize(sentences[i])))
+
+    try:
+        joiner = None
+        for i in range(len(sentences)):
+            schedule(i + 1)  # not prefetched (lookahead=0): start it now
+            wav, sr = await tasks[i]
+            # Sentences i+1 .. i+lookahead run while this one is sent
+            schedule(i + 1 + lookahead)
+
+            if joiner is None:
+                joiner = CrossfadeJoiner(sr)
+                chunk = wav_stream_header(sr) + to_pcm16(joiner.push(wav))
+                first_byte = time.perf_counter() - started
+            else:
+                chunk = to_pcm16(joiner.push(wav))
+            yield chunk
+
+        if joiner is not None:
+            yield to_pcm16(joiner.flush())
+
+        total = time.perf_counter() - started
+        latency_stats["stream"].record(first_byte or total, total)
+        logger.info(
+            f"Streamed {len(sentences)} sentence(s): first audio {(first_byte or total) * 1000:.0f}ms, "
+            f"total {total * 1000:.0f}ms"
+        )
+    finally:
+        # Client disconnected or synthesis failed: drop work nobody will receive
+        for task in tasks:
+            if not task.done():
+                task.cancel()
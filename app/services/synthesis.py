@@ -0,0 +1,106 @@
+import os
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.core.config import settings
+from app.core.metrics import span
+from app.models.voice import VoiceProfile
+from app.services.audio_encoder import OutputFormat, transcode, bitrate_kbps
+from app.services.batch_scheduler import batch_scheduler
+from app.services.result_cache import result_cache, cache_key, variant_key
+from app.services.speaker_cache import reference_fingerprint
+from app.services.tts_service import TTSService
+
+
+class FallbackAudio(Exception):
+    """
+    Raised inside render() when inference degraded (mock tone, or
+    VoiceDesign standing in for a clone): carries the WAV bytes so the
+    line is still answered, but nothing is put in the result cache.
+    """
+
+    def __init__(self, wav_data: bytes):
+        super().__init__("Inference fell back to degraded audio")
+        self.wav_data = wav_data
+
+
+async def resolve_voice(db: AsyncSession, voice_id: str = None, voice_prompt: str = None):
+    """
+    Picks the model for a line.
+    Returns ("clone", reference audio path) or ("design", instruction).
+    """
+    # Priority 1: Direct Voice Prompt (Dynamic Mode)
+    if voice_prompt:
+        return "design", voice_prompt
+
+    # Priority 2: Database Lookup by ID (Library/Clone Mode)
+    if voice_id:
+        result = await db.execute(select(VoiceProfile).where(VoiceProfile.id == voice_id))
+        voice_profile = result.scalars().first()
+        if voice_profile:
+            # Check if this is a cloned voice (has reference audio)
+            if voice_profile.file_path and os.path.exists(voice_profile.file_path):
+                return "clone", voice_profile.file_path
+            # Otherwise use prompt-based generation
+            elif voice_profile.prompt:
+                return "design", voice_profile.prompt
+
+    return "design", None
+
+
+async def render(text: str, model: str, extra: str, fmt: OutputFormat, voice_id: str = None, speed: float = 1.0) -> bytes:
+    """
+    Synthesizes one line and returns it encoded in fmt.
+    Batched with concurrent lines; identical lines for the same voice are
+    served from the result cache. Fallback audio is returned but never cached.
+    """
+    if model == "clone":
+        # Voice Cloning Mode
+        key = cache_key(
+            text,
+            voice=voice_id,
+            ref_fingerprint=reference_fingerprint(extra),
+            speed=speed,
+            model_id=f"{settings.TTS_CLONE_MODEL_PATH}:{settings.QUANTIZATION}",
+        )
+    else:
+        # Voice Design Mode (text prompt)
+        key = cache_key(
+            text,
+            voice=extra or voice_id,
+            speed=speed,
+            model_id=f"{settings.TTS_MODEL_PATH}:{settings.QUANTIZATION}",
+        )
+
+    async def synthesize():
+        # "inference" includes the wait for a batch (also reported as batch_wait)
+        with span("inference"):
+            wav, sr, fallback = await batch_scheduler.submit(model, text, extra)
+        with span("encode"):
+            wav_data = await run_in_threadpool(TTSService.encode_wav, wav, sr)
+        if fallback:
+            raise FallbackAudio(wav_data)
+        return wav_data
+
+    try:
+        return await _cached_render(key, fmt, synthesize)
+    except FallbackAudio as e:
+        if fmt.name == "wav":
+            return e.wav_data
+        with span("encode"):
+            return await run_in_threadpool(transcode, e.wav_data, fmt)
+
+
+async def _cached_render(key: str, fmt: OutputFormat, synthesize) -> bytes:
+    if fmt.name == "wav":
+        return await result_cache.get_or_create(key, synthesize)
+
+    # Compressed output: encoded from the cached WAV, off the event loop
+    async def encode_variant():
+        wav_data = await result_cache.get_or_create(key, synthesize)
+        with span("encode"):
+            return await run_in_threadpool(transcode, wav_data, fmt)
+
+    if settings.RESULT_CACHE_KEEP_ENCODED:
+        return await result_cache.get_or_create(variant_key(key, fmt.name, bitrate_kbps(fmt)), encode_variant)
+    return await encode_variant()
@@ -1,15 +1,25 @@
+import os
 import torch
 import time
 from app.core.config import settings
+from app.core.metrics import span, record_inference, FALLBACKS
+from app.services.model_manager import model_manager, MODEL_PATH_SETTINGS
+from app.services.speaker_cache import speaker_cache, reference_fingerprint, embedding_path_for
+from app.services.warmup import parse_sizes, warmup_texts, synthetic_reference
 import logging
 
 # Set up logging
 logger = logging.getLogger("uvicorn")
 
+# VoiceDesign instruction for requests without a voice prompt
+DEFAULT_INSTRUCTION = "A clear, professional voice suitable for gaming context."
+
 class TTSService:
     _instance = None
-    _voice_design_model = None  # For text-prompt voice synthesis
-    _clone_model = None          # For reference-audio cloning
+    warmup_results = None  # this process's last warmup() result
+    # Models are owned by the model manager and loaded on first use:
+    # - "voice_design": text-prompt voice synthesis
+    # - "clone": reference-audio cloning (Base)
     
     def __new__(cls):
         if cls._instance is None:
@@ -18,139 +28,150 @@ class TTSService:
 
     def initialize_model(self):
         """
-        Loads both Qwen3-TTS models into VRAM.
-        - VoiceDesign: for text-prompt based synthesis
-        - Base: for voice cloning from reference audio
+        Preloads the Qwen3-TTS models listed in PRELOAD_MODELS.
+        Others are loaded lazily on first request.
+        """
+        model_manager.preload()
+        logger.info("TTS model preload finished!")
+
+    def model_stats(self) -> dict:
+        return {
+            **model_manager.stats(),
+            "speaker_cache": speaker_cache.stats(),
+        }
+
+    def warmup(self) -> dict:
+        """
+        Runs synthetic lines through the PRELOAD_MODELS at every
+        WARMUP_TEXT_WORDS length x WARMUP_BATCH_SIZES batch size, so lazy
+        allocations, kernel selection and torch.compile happen before real
+        traffic. Returns seconds per model (or the error it failed with).
         """
-        from qwen_tts import Qwen3TTSModel
-        
-        dtype = torch.float16 if settings.USE_GPU else torch.float32
-        device_str = "CUDA" if torch.cuda.is_available() and settings.USE_GPU else "CPU"
-        
-        # Load VoiceDesign model (if not already loaded)
-        if self._voice_design_model is None:
-            logger.info(f"Loading VoiceDesign model from {settings.TTS_MODEL_PATH}...")
+        names = [n.strip() for n in settings.PRELOAD_MODELS.split(",") if n.strip() in MODEL_PATH_SETTINGS]
+        shapes = [(w, b) for w in parse_sizes(settings.WARMUP_TEXT_WORDS) for b in parse_sizes(settings.WARMUP_BATCH_SIZES)]
+        results = {}
+        for name in names:
+            started = time.perf_counter()
             try:
-                self._voice_design_model = Qwen3TTSModel.from_pretrained(
-                    settings.TTS_MODEL_PATH,
-                    device_map="auto",
-                    torch_dtype=dtype,
-                )
-                logger.info(f"VoiceDesign model loaded on {device_str}")
+                with model_manager.acquire(name) as model, span(f"model.warmup.{name}"):
+                    if name == "clone":
+                        prompt = model.create_voice_clone_prompt(ref_audio=[synthetic_reference()], x_vector_only_mode=True)
+                    for words, batch in shapes:
+                        texts = warmup_texts(words, batch)
+                        if name == "clone":
+                            model.generate_voice_clone(
+                                text=texts, language=["English"] * batch, voice_clone_prompt=prompt * batch
+                            )
+                        else:
+                            model.generate_voice_design(text=texts, instruct=[DEFAULT_INSTRUCTION] * batch)
+                results[name] = round(time.perf_counter() - started, 2)
             except Exception as e:
-                logger.error(f"Failed to load VoiceDesign model: {e}")
-                raise e
-        
-        # Load Clone (Base) model (if not already loaded)
-        if self._clone_model is None:
-            logger.info(f"Loading Clone model from {settings.TTS_CLONE_MODEL_PATH}...")
+                logger.warning(f"Warmup of the {name} model failed: {e}")
+                results[name] = f"failed: {e}"
+        logger.info(f"Warmup finished ({len(shapes)} shape(s) per model): {results}")
+        self.warmup_results = results
+        return results
+
+    def warmup_status(self) -> dict:
+        """pid and warmup results of the process running this (process backend)."""
+        return {"pid": os.getpid(), "models": self.warmup_results}
+
+    @staticmethod
+    def encode_wav(audio_data, sr: int) -> bytes:
+        """
+        Encodes a waveform as 16-bit PCM WAV bytes.
+        """
+        import io
+        import soundfile as sf
+
+        buffer = io.BytesIO()
+        sf.write(buffer, audio_data, sr, format='WAV', subtype='PCM_16')
+        return buffer.getvalue()
+
+    @staticmethod
+    def _mock_audio():
+        """
+        1 second 440Hz tone used when inference fails.
+        """
+        sample_rate = 24000
+        duration = 1.0
+        t = torch.linspace(0, duration, int(sample_rate * duration))
+        waveform = torch.sin(2 * torch.pi * 440 * t).unsqueeze(0)
+        return waveform.squeeze().cpu().numpy(), sample_rate
+
+    def synthesize_design(self, texts: list, instructions: list):
+        """
+        Batched VoiceDesign inference.
+        Returns (wavs, sr, fallback) with one waveform per text; fallback is
+        True when inference failed and the waveforms are the mock tone.
+        """
+        logger.info(f"Generating TTS batch of {len(texts)}: '{texts[0][:20]}...'")
+
+        # Loads the model on first use (or waits while it is loading)
+        with model_manager.acquire("voice_design") as model:
             try:
-                self._clone_model = Qwen3TTSModel.from_pretrained(
-                    settings.TTS_CLONE_MODEL_PATH,
-                    device_map="auto",
-                    torch_dtype=dtype,
-                )
-                logger.info(f"Clone model loaded on {device_str}")
+                # Use provided instruction or fallback
+                instructs = [ins or DEFAULT_INSTRUCTION for ins in instructions]
+
+                started = time.perf_counter()
+                with span("model.voice_design"):
+                    wavs, sr = model.generate_voice_design(text=list(texts), instruct=instructs)
+                record_inference("voice_design", wavs, sr, time.perf_counter() - started)
+                return list(wavs), sr, False
+
             except Exception as e:
-                logger.error(f"Failed to load Clone model: {e}")
-                raise e
-        
-        logger.info("Both TTS models initialized successfully!")
+                logger.error(f"Inference failed: {e}")
+                # Fallback for reliability during demo
+                logger.warning("Falling back to mock audio due to inference error.")
+                FALLBACKS.inc(len(texts), model="voice_design", kind="mock")
+                audio_np, sample_rate = self._mock_audio()
+                return [audio_np] * len(texts), sample_rate, True
 
-    def generate(self, text: str, voice_embedding=None, instruction: str = None, speed: float = 1.0):
+    def synthesize_clone(self, texts: list, ref_audio_paths: list):
         """
-        Runs inference to generate audio from text.
+        Batched voice cloning inference, one reference audio per text.
+        Returns (wavs, sr, fallback) like synthesize_design; fallback is True
+        when cloning failed and the lines were synthesized by VoiceDesign.
+        Note: Requires the Base model (Qwen3-TTS-12Hz-1.7B-Base), not VoiceDesign.
         """
-        if not self._voice_design_model:
-            raise RuntimeError("VoiceDesign model not initialized. Call initialize_model() first.")
-
-        logger.info(f"Generating TTS for: '{text[:20]}...' Speed: {speed}")
-        
-        try:
-            # Use provided instruction or fallback
-            instruct_text = instruction or "A clear, professional voice suitable for gaming context."
-            
-            logger.info(f"Using Voice Design Prompt: '{instruct_text}'")
-            
-            # Using generate_voice_design based on docs for this model variant
-            # Returns: wavs, sr
-            wavs, sr = self._voice_design_model.generate_voice_design(
-                text=text,
-                instruct=instruct_text
-            )
-            
-            # wavs is a list (batch), take the first one
-            # The output seems to be a numpy array or tensor expected by sf.write
-            audio_data = wavs[0]
-            
-            import io
-            import soundfile as sf
-            
-            buffer = io.BytesIO()
-            sf.write(buffer, audio_data, sr, format='WAV', subtype='PCM_16')
-            return buffer.getvalue()
-            
-        except Exception as e:
-            logger.error(f"Inference failed: {e}")
-            # Fallback for reliability during demo
-            logger.warning("Falling back to mock audio due to inference error.")
-            import io
-            import soundfile as sf
-            import numpy as np
-            
-            sample_rate = 24000
-            duration = 1.0
-            t = torch.linspace(0, duration, int(sample_rate * duration))
-            waveform = torch.sin(2 * torch.pi * 440 * t).unsqueeze(0)
-            audio_np = waveform.squeeze().cpu().numpy()
-            
-            buffer = io.BytesIO()
-            sf.write(buffer, audio_np, sample_rate, format='WAV', subtype='PCM_16')
-            return buffer.getvalue()  
-    
-    def clone(self, text: str, ref_audio_path: str, ref_text: str = None, speed: float = 1.0):
+        logger.info(f"Cloning batch of {len(texts)} from: {ref_audio_paths}")
+
+        with model_manager.acquire("clone") as model:
+            try:
+                # Precomputed x-vector prompts (memory LRU -> .pt on disk -> extract)
+                with span("model.speaker_prompt"):
+                    prompts = speaker_cache.get_many(list(ref_audio_paths), model)
+                started = time.perf_counter()
+                with span("model.clone"):
+                    wavs, sr = model.generate_voice_clone(
+                        text=list(texts),
+                        language=["English"] * len(texts),  # TODO: detect language
+                        voice_clone_prompt=prompts,
+                    )
+                record_inference("clone", wavs, sr, time.perf_counter() - started)
+                return list(wavs), sr, False
+
+            except Exception as e:
+                logger.error(f"Voice cloning failed: {e}")
+
+        # Fallback to generate_voice_design if cloning fails
+        logger.warning("Falling back to voice_design mode")
+        FALLBACKS.inc(len(texts), model="clone", kind="voice_design")
+        wavs, sr, _ = self.synthesize_design(texts, ["A clear, natural voice."] * len(texts))
+        return wavs, sr, True
+
+    def extract_speaker_features(self, ref_audio_paths: list):
         """
-        Synthesizes speech using a reference audio for voice cloning.
-        Note: Requires the Base model (Qwen3-TTS-12Hz-1.7B-Base), not VoiceDesign.
+        Computes and saves speaker features for freshly uploaded reference audio.
+        Returns one {"embedding_path", "fingerprint"} dict per path.
         """
-        if not self._clone_model:
-            raise RuntimeError("Clone model not initialized. Call initialize_model() first.")
-        
-        logger.info(f"Cloning voice from: {ref_audio_path}")
-        logger.info(f"Text to synthesize: '{text[:30]}...'")
-        
-        try:
-            # Use generate_voice_clone method with x_vector_only_mode (no transcript needed)
-            wavs, sr = self._clone_model.generate_voice_clone(
-                text=text,
-                language="English",  # TODO: detect language
-                ref_audio=ref_audio_path,
-                ref_text=ref_text,  # Optional transcript
-                x_vector_only_mode=(ref_text is None),  # Use embedding only if no transcript
-            )
-            
-            audio_data = wavs[0]
-            
-            import io
-            import soundfile as sf
-            
-            buffer = io.BytesIO()
-            sf.write(buffer, audio_data, sr, format='WAV', subtype='PCM_16')
-            return buffer.getvalue()
-            
-        except Exception as e:
-            logger.error(f"Voice cloning failed: {e}")
-            # Fallback to generate_voice_design if cloning fails
-            logger.warning("Falling back to voice_design mode")
-            return self.generate(text, instruction="A clear, natural voice.")
-        
-        
-    # Correct implementation of just the LOADING part first to avoid crashing with unknown model logic.
-    # The user asked for "Real AI Integration". 
-    # I will fully implement the `initialize_model` to load the heavy weights.
-    # For `generate`, I will implement the `model.generate` call but keep the audio fallback 
-    # until we can confirm the model's output format (Audio vs Text).
-    
-t = torch.linspace(0, 1.0, 24000) # Dummy for safety if method fails
+        fingerprints = [reference_fingerprint(p) for p in ref_audio_paths]
+        with model_manager.acquire("clone") as model, span("model.speaker_features"):
+            speaker_cache.extract(list(ref_audio_paths), model, fingerprints=fingerprints)
+        return [
+            {"embedding_path": embedding_path_for(p), "fingerprint": fp}
+            for p, fp in zip(ref_audio_paths, fingerprints)
+        ]
+
 
 tts_service = TTSService()
@@ -0,0 +1,251 @@
+import asyncio
+import csv
+import io
+import os
+import shutil
+import tarfile
+import uuid
+import zipfile
+from dataclasses import dataclass
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.metrics import span
+from app.models.voice import VoiceProfile
+from app.services.ingest_service import ingest_service, IngestError
+from app.services.inference_executor import inference_executor
+from app.services.voice_library import voice_library
+import logging
+
+logger = logging.getLogger("uvicorn")
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".ogg", ".opus", ".mp3", ".m4a", ".aac", ".webm")
+MANIFEST_NAME = "manifest.csv"  # optional: file,name,tag[,prompt] per row
+
+
+class BulkImportError(Exception):
+    """Archive rejected as a whole; carries the HTTP status to answer with."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class ImportItem:
+    file: str            # path inside the archive
+    name: str
+    tag: str
+    prompt: str = None
+    source_path: str = None
+    voice_id: str = None
+    file_path: str = None
+    quality: dict = None
+    features: dict = None
+    error: str = None
+
+    def report(self) -> dict:
+        report = {"file": self.file, "status": "failed" if self.error else "imported"}
+        if self.error:
+            report["error"] = self.error
+        else:
+            report.update(voice_id=self.voice_id, name=self.name, tag=self.tag, **(self.quality or {}))
+            if self.features is None:
+                report["warning"] = "Speaker features not precomputed (computed on first use)"
+        return report
+
+
+def _display_name(member: str) -> str:
+    stem = os.path.splitext(os.path.basename(member))[0]
+    return stem.replace("_", " ").replace("-", " ").strip() or stem
+
+
+def _folder_tag(member: str) -> str:
+    folder = os.path.basename(os.path.dirname(member))
+    return folder if folder not in ("", ".", "..") else ""
+
+
+def _read_manifest(data: bytes) -> dict:
+    rows = csv.DictReader(io.StringIO(data.decode("utf-8-sig")))
+    return {row["file"].strip(): row for row in rows if row.get("file")}
+
+
+def _unpack(archive_path: str, work_dir: str, default_tag: str) -> list:
+    """
+    Copies the archive's audio members to work_dir under generated names
+    (member paths are never used as file system paths) and returns one
+    ImportItem per member. Names come from manifest.csv or the file name;
+    tags from manifest.csv, the member's folder or default_tag.
+    """
+    if zipfile.is_zipfile(archive_path):
+        archive = zipfile.ZipFile(archive_path)
+        members = [(m.filename, m.file_size, m) for m in archive.infolist() if not m.is_dir()]
+        open_member = archive.open
+    elif tarfile.is_tarfile(archive_path):
+        archive = tarfile.open(archive_path)
+        members = [(m.name, m.size, m) for m in archive.getmembers() if m.isfile()]
+        open_member = archive.extractfile
+    else:
+        raise BulkImportError("Expected a .zip or .tar(.gz) archive", status_code=415)
+
+    with archive:
+        manifest = {}
+        for name, _, member in members:
+            if os.path.basename(name) == MANIFEST_NAME:
+                with open_member(member) as f:
+                    manifest = _read_manifest(f.read())
+
+        audio = [m for m in members if m[0].lower().endswith(AUDIO_EXTENSIONS) and not os.path.basename(m[0]).startswith(".")]
+        if not audio:
+            raise BulkImportError("Archive contains no audio files")
+        if len(audio) > settings.BULK_IMPORT_MAX_ITEMS:
+            raise BulkImportError(f"Archive has {len(audio)} audio files (limit {settings.BULK_IMPORT_MAX_ITEMS})", status_code=413)
+
+        items = []
+        for index, (name, size, member) in enumerate(audio):
+            row = manifest.get(name) or manifest.get(os.path.basename(name)) or {}
+            item = ImportItem(
+                file=name,
+                name=(row.get("name") or "").strip() or _display_name(name),
+                tag=(row.get("tag") or "").strip() or _folder_tag(name) or default_tag,
+                prompt=(row.get("prompt") or "").strip() or None,
+            )
+            item.error = _size_error(size)
+            if item.error is None:
+                item.source_path = os.path.join(work_dir, f"{index:06d}{os.path.splitext(name)[1].lower()}")
+                with open_member(member) as src, open(item.source_path, "wb") as dest:
+                    shutil.copyfileobj(src, dest, settings.UPLOAD_CHUNK_BYTES)
+            items.append(item)
+    return items
+
+
+def _size_error(size: int):
+    """Per-file upload limit, applied to archive members and directory files alike."""
+    if settings.UPLOAD_MAX_BYTES and size > settings.UPLOAD_MAX_BYTES:
+        return f"File exceeds the {settings.UPLOAD_MAX_BYTES // (1024 * 1024)} MB limit"
+    return None
+
+
+def list_directory(path: str) -> list:
+    """Audio files below a directory, as (relative path, absolute path) pairs (CLI imports)."""
+    found = []
+    for root, _, names in os.walk(path):
+        for n in sorted(names):
+            if n.lower().endswith(AUDIO_EXTENSIONS) and not n.startswith("."):
+                full = os.path.join(root, n)
+                found.append((os.path.relpath(full, path), full))
+    return found
+
+
+class VoiceImporter:
+    """
+    Imports many reference clips at once:
+    - every clip is converted (and conditioned) in the ingest process pool,
+      all of them concurrently,
+    - speaker features are extracted BULK_IMPORT_FEATURE_BATCH clips per
+      Base model call,
+    - all VoiceProfile rows are inserted in one transaction.
+    A clip that fails is reported and skipped; the rest are imported.
+    """
+
+    async def import_archive(self, archive_path: str, default_tag: str = "Imported") -> dict:
+        work_dir = os.path.join(settings.UPLOAD_DIR, f".import_{uuid.uuid4().hex}")
+        os.makedirs(work_dir)
+        try:
+            with span("import_unpack"):
+                items = await run_in_threadpool(_unpack, archive_path, work_dir, default_tag)
+            return await self._import(items)
+        finally:
+            await run_in_threadpool(shutil.rmtree, work_dir, True)
+
+    async def import_directory(self, path: str, default_tag: str = "Imported") -> dict:
+        items = []
+        for relative, full in list_directory(path):
+            items.append(ImportItem(
+                file=relative, name=_display_name(relative), tag=_folder_tag(relative) or default_tag, source_path=full,
+                error=_size_error(os.path.getsize(full)),
+            ))
+        if not items:
+            raise BulkImportError("Directory contains no audio files")
+        return await self._import(items)
+
+    async def _import(self, items: list) -> dict:
+        pending = [item for item in items if item.error is None]
+        for item in pending:
+            item.voice_id = uuid.uuid4().hex[:8]
+            item.file_path = os.path.join(settings.UPLOAD_DIR, f"{item.voice_id}.wav")
+
+        # 1. Convert everything in parallel (the pool bounds the concurrency)
+        async def convert(item: ImportItem):
+            try:
+                item.quality = await ingest_service.convert(item.source_path, item.file_path)
+            except IngestError as e:
+                item.error = str(e)
+            except Exception as e:
+                item.error = f"Conversion failed: {e}"
+
+        with span("import_convert"):
+            await asyncio.gather(*(convert(item) for item in pending))
+        converted = [item for item in pending if item.error is None]
+
+        # 2. Speaker features, batched through the Base model (not fatal, like /extract)
+        batch_size = max(1, settings.BULK_IMPORT_FEATURE_BATCH)
+        batches = [converted[i:i + batch_size] for i in range(0, len(converted), batch_size)]
+
+        async def extract(batch: list):
+            try:
+                features = await inference_executor.submit(
+                    "extract_speaker_features", ref_audio_paths=[item.file_path for item in batch]
+                )
+                for item, feature in zip(batch, features):
+                    item.features = feature
+            except Exception as e:
+                logger.warning(f"Speaker feature extraction failed for a batch of {len(batch)}: {e}")
+
+        with span("import_features"):
+            await asyncio.gather(*(extract(batch) for batch in batches))
+
+        # 3. One transaction for all rows
+        if converted:
+            with span("db_write"):
+                async with SessionLocal() as db:
+                    db.add_all([
+                        VoiceProfile(
+                            id=item.voice_id,
+                            name=item.name,
+                            tag=item.tag,
+                            type="cloned",
+                            prompt=item.prompt,
+                            file_path=item.file_path,
+                            embedding_path=(item.features or {}).get("embedding_path"),
+                            ref_fingerprint=(item.features or {}).get("fingerprint"),
+                            duration_s=item.quality["duration_s"],
+                            snr_db=item.quality["snr_db"],
+                            clipping_ratio=item.quality["clipping_ratio"],
+                        )
+                        for item in converted
+                    ])
+                    try:
+                        await db.commit()
+                    except Exception:
+                        await run_in_threadpool(_remove_outputs, converted)
+                        raise
+            voice_library.invalidate()
+
+        imported = len(converted)
+        logger.info(f"Bulk import: {imported} imported, {len(items) - imported} failed")
+        return {
+            "imported": imported,
+            "failed": len(items) - imported,
+            "items": [item.report() for item in items],
+        }
+
+
+def _remove_outputs(items: list):
+    for item in items:
+        for path in (item.file_path, (item.features or {}).get("embedding_path")):
+            if path and os.path.exists(path):
+                os.remove(path)
+
+
+voice_importer = VoiceImporter()
@@ -0,0 +1,112 @@
+import base64
+import json
+import time
+from collections import OrderedDict
+from sqlalchemy import and_, func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.core.config import settings
+from app.models.voice import VoiceProfile
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(voice: VoiceProfile) -> str:
+    payload = json.dumps([voice.created_at, voice.id]).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, voice_id = json.loads(base64.urlsafe_b64decode(padded))
+        return float(created_at), str(voice_id)
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+
+
+class VoiceLibrary:
+    """
+    Paginated, filtered voice listing with a small in-process page cache.
+
+    Pages are ordered by (created_at, id) and continue from an opaque
+    cursor (keyset pagination), so a page costs one index range scan no
+    matter how deep into the vault it is. Cached pages are dropped by
+    invalidate() after every write, and expire after VOICE_LIST_CACHE_TTL_S
+    so other API worker processes pick up changes too.
+    """
+
+    def __init__(self):
+        self._pages = OrderedDict()  # (tag, type, q, cursor, limit) -> (created_at, page)
+        self._generation = 0  # bumped by invalidate(); pages read before a write aren't cached
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self):
+        self._generation += 1
+        self._pages.clear()
+
+    async def list_page(
+        self,
+        db: AsyncSession,
+        limit: int,
+        cursor: str = None,
+        tag: str = None,
+        voice_type: str = None,
+        q: str = None,
+    ) -> dict:
+        """
+        Returns {"voices": [...], "next_cursor": str | None}.
+        Raises InvalidCursor.
+        """
+        key = (tag, voice_type, q, cursor, limit)
+        cached = self._pages.get(key)
+        if cached is not None and time.time() - cached[0] < settings.VOICE_LIST_CACHE_TTL_S:
+            self._pages.move_to_end(key)
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        generation = self._generation
+
+        query = select(VoiceProfile)
+        if tag:
+            query = query.where(VoiceProfile.tag == tag)
+        if voice_type:
+            query = query.where(VoiceProfile.type == voice_type)
+        if q:
+            query = query.where(func.lower(VoiceProfile.name).contains(q.lower(), autoescape=True))
+        if cursor:
+            created_at, voice_id = decode_cursor(cursor)
+            query = query.where(or_(
+                VoiceProfile.created_at > created_at,
+                and_(VoiceProfile.created_at == created_at, VoiceProfile.id > voice_id),
+            ))
+        # One extra row tells whether there is a next page
+        query = query.order_by(VoiceProfile.created_at, VoiceProfile.id).limit(limit + 1)
+
+        result = await db.execute(query)
+        voices = result.scalars().all()
+        page = {
+            "voices": [v.to_dict() for v in voices[:limit]],
+            "next_cursor": encode_cursor(voices[limit - 1]) if len(voices) > limit else None,
+        }
+
+        if settings.VOICE_LIST_CACHE_SIZE > 0 and generation == self._generation:
+            self._pages[key] = (time.time(), page)
+            while len(self._pages) > settings.VOICE_LIST_CACHE_SIZE:
+                self._pages.popitem(last=False)
+        return page
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "pages": len(self._pages),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+voice_library = VoiceLibrary()
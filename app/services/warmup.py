@@ -0,0 +1,75 @@
+import os
+import numpy as np
+import torch
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger("uvicorn")
+
+_WORDS = (
+    "the old keeper lights the lantern at dusk and waits for travelers "
+    "who cross the northern pass before the snow closes every road home"
+).split()
+
+
+def parse_sizes(value: str) -> list:
+    """Comma-separated positive integers ("4,16,48") as a sorted list."""
+    return sorted({int(v) for v in value.split(",") if v.strip() and int(v) > 0})
+
+
+def warmup_texts(words: int, count: int) -> list:
+    """count distinct synthetic lines of the given length in words."""
+    return [
+        " ".join(_WORDS[(i + j) % len(_WORDS)] for j in range(words)).capitalize() + "."
+        for i in range(count)
+    ]
+
+
+def synthetic_reference(seconds: float = 3.0, sr: int = 24000) -> tuple:
+    """
+    Speech-like reference audio (voiced harmonics with syllable-rate
+    amplitude modulation) as (waveform, sample_rate), for warming the
+    speaker encoder without a real voice file.
+    """
+    t = np.arange(int(seconds * sr), dtype=np.float32) / sr
+    pitch = 140 + 20 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / sr
+    voice = sum(np.sin(k * phase) / k for k in range(1, 6))
+    envelope = np.clip(np.sin(2 * np.pi * 4 * t), 0, None)
+    return (0.1 * voice * envelope).astype(np.float32), sr
+
+
+def configure_compile_cache():
+    """
+    Points Inductor at COMPILE_CACHE_DIR and turns on its FX graph cache,
+    so graphs compiled once are reused by later processes and restarts.
+    An explicit TORCHINDUCTOR_CACHE_DIR in the environment wins.
+    """
+    os.makedirs(settings.COMPILE_CACHE_DIR, exist_ok=True)
+    os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", settings.COMPILE_CACHE_DIR)
+    import torch._inductor.config as inductor_config
+
+    inductor_config.fx_graph_cache = True
+
+
+def compile_model(model) -> list:
+    """
+    torch.compile()s the TORCH_COMPILE_MODULES submodules of the model in
+    place (state dict names are unchanged). Compilation itself happens on
+    the first call, i.e. during warmup. Returns the compiled module names.
+    """
+    configure_compile_cache()
+    root = getattr(model, "model", model)
+    names = [n.strip() for n in settings.TORCH_COMPILE_MODULES.split(",") if n.strip()] or [""]
+    compiled = []
+    for name in names:
+        try:
+            module = root.get_submodule(name) if name else root
+        except AttributeError:
+            module = None
+        if not isinstance(module, torch.nn.Module):
+            logger.warning(f"TORCH_COMPILE: no module '{name}' in {type(root).__name__}, skipping")
+            continue
+        module.compile(mode=settings.TORCH_COMPILE_MODE, dynamic=True)
+        compiled.append(name or type(module).__name__)
+    return compiled
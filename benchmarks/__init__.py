@@ -0,0 +1,4 @@
+"""
+Offline benchmarks: run the real app in-process against a stub model.
+See benchmarks/run.py.
+"""
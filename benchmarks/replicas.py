@@ -0,0 +1,80 @@
+"""
+Throughput vs. latency of the CPU replica pool for several replica counts.
+
+Runs benchmarks.run once per K on this machine: the thread backend (one
+model using every core) as the baseline, then INFERENCE_BACKEND=replicas
+with CPU_REPLICAS=K. The stub is made CPU-bound (--cpu-matmuls) so core
+contention shows up the way it does with the real model.
+
+Usage:
+    python -m benchmarks.replicas
+    python -m benchmarks.replicas --replicas 1 2 4 8 --concurrency 16 --requests 200 --out replicas.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+
+def run_once(args, env: list) -> dict:
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        out = f.name
+    try:
+        subprocess.run(
+            [
+                sys.executable, "-m", "benchmarks.run",
+                "--scenarios", "generate",
+                "--requests", str(args.requests),
+                "--concurrency", str(args.concurrency),
+                "--cpu-matmuls", str(args.cpu_matmuls),
+                "--batch-overhead", str(args.batch_overhead),
+                "--out", out,
+                "--env", *env, *args.env,
+            ],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        with open(out) as f:
+            return json.load(f)
+    finally:
+        os.unlink(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--replicas", type=int, nargs="+", default=[1, 2, 4], help="Replica counts (K) to measure")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--cpu-matmuls", type=int, default=2, help="Stub CPU work per codec token")
+    parser.add_argument("--batch-overhead", type=float, default=0.5, help="Stub cost per extra batch item (fraction)")
+    parser.add_argument("--env", nargs="*", default=[], metavar="KEY=VALUE", help="Extra settings for every run")
+    parser.add_argument("--out", help="Write all results to this JSON file")
+    args = parser.parse_args()
+
+    runs = [("thread", ["INFERENCE_BACKEND=thread"])]
+    runs += [(f"K={k}", ["INFERENCE_BACKEND=replicas", f"CPU_REPLICAS={k}"]) for k in args.replicas]
+
+    print(f"{os.cpu_count()} CPUs, concurrency {args.concurrency}, {args.requests} requests per run")
+    print(f"{'backend':<8} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7} {'avg batch':>10}")
+    results = {}
+    for label, env in runs:
+        report = run_once(args, env)
+        r = report["scenarios"]["generate"]
+        batch = report["app_stats"]["scheduler"]["avg_batch_size"]
+        print(
+            f"{label:<8} {r['throughput_rps']:>8} {r['p50_ms']:>9} {r['p95_ms']:>9} "
+            f"{r['p99_ms']:>9} {r['errors']:>7} {batch:>10}",
+            flush=True,
+        )
+        results[label] = report
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
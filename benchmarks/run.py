@@ -0,0 +1,285 @@
+"""
+Offline benchmark for the synthesis and ingestion paths.
+
+Runs the real FastAPI app (app.main:app) in-process with a deterministic stub
+in place of Qwen3TTSModel and drives its endpoints at a fixed concurrency.
+Reports p50/p95/p99 latency, throughput and memory per scenario and writes a
+JSON file that later runs can be compared against.
+
+Usage:
+    python -m benchmarks.run
+    python -m benchmarks.run --concurrency 16 --requests 200 --token-latency-ms 5 --out bench.json
+    python -m benchmarks.run --scenarios generate clone --env BATCH_MAX_SIZE=1 --compare bench.json
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+SCENARIOS = ("generate", "clone", "extract", "lock", "list", "download")
+
+LINES = [
+    "Welcome back, traveler.",
+    "The gates of the northern keep are open once more.",
+    "Watch out! There's something moving in the shadows behind you.",
+    "I have traded with merchants from every port on this coast.",
+    "Quest complete. Return to the guild hall for your reward.",
+    "You dare challenge me? Very well, draw your blade.",
+    "Our supplies are running low, we should head back to town before nightfall.",
+    "The dragon sleeps beneath the mountain, and it must never wake.",
+]
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError):
+        return 0.0
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+def wav_bytes(seconds: float, seed: int) -> bytes:
+    import numpy as np
+    import soundfile as sf
+
+    rng = np.random.default_rng(seed)
+    buffer = io.BytesIO()
+    sf.write(buffer, (rng.standard_normal(int(24000 * seconds)) * 0.1).astype("float32"), 24000, format="WAV")
+    return buffer.getvalue()
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return "unknown"
+
+
+class Bench:
+    def __init__(self, client, args):
+        self.client = client
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.voice_ids = []
+        self.audio_urls = []
+
+    def text(self, i: int) -> str:
+        # unique_ratio controls how many requests repeat an earlier line (cache hits)
+        if self.rng.random() < self.args.unique_ratio:
+            return f"{self.rng.choice(LINES)} Line {i}."
+        return self.rng.choice(LINES)
+
+    async def setup(self):
+        for i in range(self.args.voices):
+            r = await self.client.post(
+                "/api/v1/clone/extract",
+                files={"audio": (f"voice{i}.wav", wav_bytes(self.args.ref_seconds, i), "audio/wav")},
+                data={"name": f"Bench Voice {i}", "tag": "Bench"},
+            )
+            r.raise_for_status()
+            self.voice_ids.append(r.json()["voice"]["id"])
+
+    async def request(self, scenario: str, i: int):
+        c = self.client
+        if scenario == "generate":
+            r = await c.post("/api/v1/tts/generate", json={"text": self.text(i), "voice_prompt": "A calm narrator."})
+        elif scenario == "clone":
+            voice_id = self.voice_ids[i % len(self.voice_ids)]
+            r = await c.post("/api/v1/tts/generate", json={"text": self.text(i), "voice_id": voice_id})
+        elif scenario == "extract":
+            r = await c.post(
+                "/api/v1/clone/extract",
+                files={"audio": ("bench.wav", wav_bytes(self.args.ref_seconds, 1000 + i), "audio/wav")},
+                data={"name": f"Extract {i}", "tag": "Bench"},
+            )
+        elif scenario == "lock":
+            r = await c.post(
+                "/api/v1/clone/lock",
+                files={"audio": ("bench.wav", wav_bytes(self.args.ref_seconds, 2000 + i), "audio/wav")},
+                data={"name": f"Lock {i}", "prompt": "A calm narrator."},
+            )
+        elif scenario == "list":
+            r = await c.get("/api/v1/clone/list")
+        elif scenario == "download":
+            if not self.audio_urls:
+                r = await c.post("/api/v1/tts/generate", json={"text": LINES[0], "voice_prompt": "A calm narrator."})
+                self.audio_urls.append(r.json()["audio_url"])
+            r = await c.get(self.audio_urls[i % len(self.audio_urls)])
+        else:
+            raise ValueError(f"Unknown scenario '{scenario}'")
+
+        if scenario in ("generate", "clone") and r.status_code == 200:
+            url = r.json().get("audio_url")
+            if url:
+                self.audio_urls.append(url)
+        return r
+
+    async def run_scenario(self, scenario: str) -> dict:
+        semaphore = asyncio.Semaphore(self.args.concurrency)
+        latencies, errors, nbytes = [], 0, 0
+
+        async def one(i: int):
+            nonlocal errors, nbytes
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    r = await self.request(scenario, i)
+                    ok = r.status_code < 400
+                    nbytes += len(r.content)
+                except Exception:
+                    ok = False
+                latencies.append(time.perf_counter() - started)
+                if not ok:
+                    errors += 1
+
+        rss_before = rss_mb()
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(self.args.requests)))
+        wall = time.perf_counter() - started
+
+        return {
+            "requests": self.args.requests,
+            "errors": errors,
+            "wall_s": round(wall, 3),
+            "throughput_rps": round(self.args.requests / wall, 2) if wall else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+            "max_ms": round(max(latencies) * 1000, 1) if latencies else 0.0,
+            "response_mb": round(nbytes / 1e6, 2),
+            "rss_mb": round(rss_mb(), 1),
+            "rss_delta_mb": round(rss_mb() - rss_before, 1),
+        }
+
+
+async def run(args) -> dict:
+    import httpx
+    from app.main import app
+
+    results = {}
+    started = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            # Measure steady state: wait for the startup warmup like a load balancer would
+            while (await client.get("/health")).status_code == 503:
+                await asyncio.sleep(0.1)
+            ready_s = round(time.perf_counter() - started, 2)
+            bench = Bench(client, args)
+            await bench.setup()
+            for scenario in args.scenarios:
+                print(f"Running {scenario} ({args.requests} requests, concurrency {args.concurrency})...")
+                results[scenario] = await bench.run_scenario(scenario)
+            stats = (await client.get("/api/v1/tts/stats")).json()
+    return {"scenarios": results, "app_stats": stats, "ready_s": ready_s, "peak_rss_mb": round(peak_rss_mb(), 1)}
+
+
+def print_table(report: dict, baseline: dict = None):
+    print()
+    print(f"{'scenario':<10} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7} {'RSS MB':>8}")
+    for name, r in report["scenarios"].items():
+        line = (
+            f"{name:<10} {r['throughput_rps']:>8} {r['p50_ms']:>9} {r['p95_ms']:>9} "
+            f"{r['p99_ms']:>9} {r['errors']:>7} {r['rss_mb']:>8}"
+        )
+        base = (baseline or {}).get("scenarios", {}).get(name)
+        if base:
+            def delta(key):
+                return f"{(r[key] - base[key]) / base[key] * 100:+.0f}%" if base[key] else "n/a"
+            line += f"   vs baseline: rps {delta('throughput_rps')}, p95 {delta('p95_ms')}"
+        print(line)
+    print(f"\nready after {report['ready_s']}s, peak RSS: {report['peak_rss_mb']} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=SCENARIOS)
+    parser.add_argument("--requests", type=int, default=100, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--token-latency-ms", type=float, default=2.0, help="Stub model wall time per codec token")
+    parser.add_argument("--batch-overhead", type=float, default=0.1, help="Stub cost per extra batch item (fraction)")
+    parser.add_argument("--load-s", type=float, default=0.0, help="Stub model load time")
+    parser.add_argument("--instruct-ms", type=float, default=1.0, help="Stub tokenization time per VoiceDesign instruction")
+    parser.add_argument("--cpu-matmuls", type=int, default=0, help="Make the stub CPU-bound: 512x512 matmuls per codec token")
+    parser.add_argument("--unique-ratio", type=float, default=1.0, help="Fraction of generate requests with unique text")
+    parser.add_argument("--voices", type=int, default=4, help="Cloned voices created during setup")
+    parser.add_argument("--ref-seconds", type=float, default=6.0, help="Length of uploaded reference clips")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--env", nargs="*", default=[], metavar="KEY=VALUE", help="Settings overrides, e.g. BATCH_MAX_SIZE=1")
+    parser.add_argument("--out", default="bench_results.json", help="Machine-readable results file")
+    parser.add_argument("--compare", help="Previous results file to compare against")
+    args = parser.parse_args()
+
+    # Isolated database and vault; must be set before app.core.config is imported
+    workdir = tempfile.mkdtemp(prefix="minestream-bench-")
+    os.environ.update({
+        "DATABASE_URL": f"sqlite+aiosqlite:///{workdir}/bench.db",
+        "UPLOAD_DIR": os.path.join(workdir, "voices"),
+        "OUTPUT_DIR": os.path.join(workdir, "generated"),
+        "RESULT_CACHE_DIR": os.path.join(workdir, "cache"),
+        "USE_GPU": "false",
+    })
+    overrides = dict(item.split("=", 1) for item in args.env)
+    os.environ.update(overrides)
+
+    from benchmarks import stub_model
+    stub_model.install(
+        token_latency_ms=args.token_latency_ms,
+        batch_overhead=args.batch_overhead,
+        load_s=args.load_s,
+        cpu_matmuls=args.cpu_matmuls,
+        instruct_ms=args.instruct_ms,
+    )
+
+    report = asyncio.run(run(args))
+    report["meta"] = {
+        "created_at": time.time(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "args": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+        "env": overrides,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_table(report, baseline)
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
+elif __name__ == "__mp_main__":
+    # Spawned inference processes (process/replicas backends) re-import this
+    # module instead of running main(): give them the stub model as well
+    from benchmarks import stub_model
+    stub_model.install_from_env()
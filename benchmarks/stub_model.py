@@ -0,0 +1,250 @@
+"""
+Deterministic stand-in for qwen_tts.Qwen3TTSModel.
+
+Produces a tone whose pitch and length depend only on the input text and
+sleeps for a configurable time per generated codec token (or burns CPU with
+torch matmuls, cpu_matmuls), so scheduling, batching and caching changes can
+be measured without a GPU or model weights.
+"""
+import hashlib
+import json
+import os
+import sys
+import time
+import types
+from dataclasses import asdict, dataclass
+from typing import Optional
+import numpy as np
+import torch
+
+SAMPLE_RATE = 24000
+TOKENS_PER_SECOND = 12  # Qwen3-TTS-12Hz codec frame rate
+SECONDS_PER_WORD = 0.35
+CONFIG_ENV = "MINESTREAM_BENCH_STUB"
+
+
+@dataclass
+class StubConfig:
+    token_latency_ms: float = 2.0   # wall time per generated codec token
+    batch_overhead: float = 0.1     # extra cost per additional batch item (fraction)
+    load_s: float = 0.0             # simulated from_pretrained time
+    prompt_ms: float = 50.0         # simulated speaker feature extraction per reference
+    instruct_ms: float = 1.0        # simulated tokenization of a VoiceDesign instruction
+    cpu_matmuls: int = 0            # if set, burn CPU instead of sleeping: 512x512 matmuls per codec token
+
+
+config = StubConfig()
+
+
+@dataclass
+class VoiceClonePromptItem:
+    ref_code: Optional[torch.Tensor]
+    ref_spk_embedding: torch.Tensor
+    x_vector_only_mode: bool
+    icl_mode: bool
+    ref_text: Optional[str] = None
+
+
+def _seed(*parts) -> int:
+    return int(hashlib.md5("|".join(map(str, parts)).encode("utf-8")).hexdigest()[:8], 16)
+
+
+def synthesize(texts: list, voices: list):
+    durations = [max(0.3, len(t.split()) * SECONDS_PER_WORD) for t in texts]
+    tokens = max(durations) * TOKENS_PER_SECOND * (1 + config.batch_overhead * (len(texts) - 1))
+    if config.cpu_matmuls:
+        # Real compute, so intra-op threads and core contention behave like the model's
+        a = torch.randn(512, 512)
+        for _ in range(int(tokens * config.cpu_matmuls)):
+            torch.mm(a, a)
+    else:
+        time.sleep(tokens * config.token_latency_ms / 1000)
+
+    wavs = []
+    for text, voice, duration in zip(texts, voices, durations):
+        freq = 110 + _seed(text, voice) % 330
+        t = np.arange(int(duration * SAMPLE_RATE), dtype=np.float32) / SAMPLE_RATE
+        wavs.append((0.3 * np.sin(2 * np.pi * freq * t)).astype(np.float32))
+    return wavs, SAMPLE_RATE
+
+
+# Text <-> ids: UTF-8 bytes, so the ids round-trip to the original text
+ASSISTANT_TEMPLATE = "<|im_start|>assistant\n{}<|im_end|>\n"
+INSTRUCT_TEMPLATE = "<|im_start|>user\n{}<|im_end|>\n"
+
+
+def _ids_to_text(ids, template: str) -> str:
+    prefix, suffix = template.split("{}")
+    return bytes(ids.flatten().tolist()).decode("utf-8")[len(prefix):-len(suffix)]
+
+
+_SAFETENSORS_DTYPES = {torch.float32: "F32", torch.float16: "F16", torch.bfloat16: "BF16"}
+
+
+class StubModule(torch.nn.Sequential):
+    """Stands in for the transformers model: save_pretrained writes safetensors."""
+
+    def save_pretrained(self, save_directory: str, **kwargs):
+        os.makedirs(save_directory, exist_ok=True)
+        header, chunks, offset = {}, [], 0
+        for name, tensor in self.state_dict().items():
+            data = tensor.detach().contiguous().view(torch.uint8).numpy().tobytes()
+            header[name] = {
+                "dtype": _SAFETENSORS_DTYPES[tensor.dtype],
+                "shape": list(tensor.shape),
+                "data_offsets": [offset, offset + len(data)],
+            }
+            chunks.append(data)
+            offset += len(data)
+        encoded = json.dumps(header).encode("utf-8")
+        encoded += b" " * (-len(encoded) % 8)
+        with open(os.path.join(save_directory, "model.safetensors"), "wb") as f:
+            f.write(len(encoded).to_bytes(8, "little") + encoded + b"".join(chunks))
+        with open(os.path.join(save_directory, "config.json"), "w") as f:
+            json.dump({"model_type": "stub", "torch_dtype": str(next(self.parameters()).dtype).replace("torch.", "")}, f)
+
+    def load_safetensors(self, path: str):
+        with open(path, "rb") as f:
+            header_size = int.from_bytes(f.read(8), "little")
+            header = json.loads(f.read(header_size))
+            data = f.read()
+        dtypes = {v: k for k, v in _SAFETENSORS_DTYPES.items()}
+        state = {}
+        for name, info in header.items():
+            begin, end = info["data_offsets"]
+            raw = torch.frombuffer(bytearray(data[begin:end]), dtype=torch.uint8)
+            state[name] = raw.view(dtypes[info["dtype"]]).reshape(info["shape"])
+        self.load_state_dict(state)
+
+    def generate(self, input_ids, instruct_ids=None, languages=None, non_streaming_mode=True, **kwargs):
+        """VoiceDesign generation from token ids; the "codes" are the waveforms."""
+        texts = [_ids_to_text(ids, ASSISTANT_TEMPLATE) for ids in input_ids]
+        instructs = [_ids_to_text(ids, INSTRUCT_TEMPLATE) if ids is not None else None for ids in instruct_ids]
+        wavs, _ = synthesize(texts, instructs)
+        return wavs, None
+
+
+class StubSpeechTokenizer:
+    def decode(self, codes: list):
+        # The stub's "codes" already are waveforms
+        return [c["audio_codes"] for c in codes], SAMPLE_RATE
+
+
+class Qwen3TTSModel:
+    """
+    Mirrors the structure of the real class: generate_voice_design() tokenizes
+    the texts and instructions (_tokenize_texts), runs model.generate() on the
+    ids and decodes the codes with model.speech_tokenizer.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.device = torch.device("cpu")
+        # Small real module so memory accounting and precision handling have something to act on
+        self.model = StubModule(torch.nn.Linear(256, 256), torch.nn.Linear(256, 256))
+        self.model.speech_tokenizer = StubSpeechTokenizer()
+
+    @classmethod
+    def from_pretrained(cls, pretrained_model_name_or_path: str, **kwargs):
+        model = cls(pretrained_model_name_or_path)
+        dtype = kwargs.get("torch_dtype") or kwargs.get("dtype")
+        if dtype is not None:
+            model.model.to(dtype)
+        weights = os.path.join(pretrained_model_name_or_path, "model.safetensors")
+        if kwargs.get("state_dict") is not None:
+            # Like transformers with low_cpu_mem_usage: same-dtype CPU tensors are used as they are
+            model.model.load_state_dict(kwargs["state_dict"], assign=True)
+            if dtype is not None:
+                model.model.to(dtype)
+        elif os.path.exists(weights):
+            # Local snapshot: no hub resolution or re-initialization to pay for
+            model.model.load_safetensors(weights)
+        else:
+            time.sleep(config.load_s)
+        return model
+
+    @staticmethod
+    def _build_assistant_text(text: str) -> str:
+        return ASSISTANT_TEMPLATE.format(text)
+
+    @staticmethod
+    def _build_instruct_text(instruct: str) -> str:
+        return INSTRUCT_TEMPLATE.format(instruct)
+
+    def _tokenize_texts(self, texts: list) -> list:
+        ids = []
+        for text in texts:
+            if text.startswith(INSTRUCT_TEMPLATE.split("{}")[0]):
+                time.sleep(config.instruct_ms / 1000)
+            ids.append(torch.tensor(list(text.encode("utf-8")), dtype=torch.long, device=self.device).unsqueeze(0))
+        return ids
+
+    def _merge_generate_kwargs(self, **kwargs) -> dict:
+        return kwargs
+
+    def generate_voice_design(self, text, instruct, language=None, **kwargs):
+        texts = text if isinstance(text, list) else [text]
+        instructs = instruct if isinstance(instruct, list) else [instruct] * len(texts)
+        input_ids = self._tokenize_texts([self._build_assistant_text(t) for t in texts])
+        instruct_ids = [self._tokenize_texts([self._build_instruct_text(i)])[0] if i else None for i in instructs]
+        codes, _ = self.model.generate(input_ids=input_ids, instruct_ids=instruct_ids, **self._merge_generate_kwargs(**kwargs))
+        return self.model.speech_tokenizer.decode([{"audio_codes": c} for c in codes])
+
+    def create_voice_clone_prompt(self, ref_audio, ref_text=None, x_vector_only_mode=False):
+        import soundfile as sf
+
+        refs = ref_audio if isinstance(ref_audio, list) else [ref_audio]
+        items = []
+        for ref in refs:
+            if isinstance(ref, str):
+                wav, _ = sf.read(ref, dtype="float32")
+            else:
+                wav = np.asarray(ref[0], dtype=np.float32)
+            time.sleep(config.prompt_ms / 1000)
+            embedding = torch.tensor([float(np.abs(wav).mean()), float(len(wav))])
+            items.append(VoiceClonePromptItem(None, embedding, True, False))
+        return items
+
+    def generate_voice_clone(self, text, language=None, ref_audio=None, ref_text=None,
+                             x_vector_only_mode=False, voice_clone_prompt=None, **kwargs):
+        texts = text if isinstance(text, list) else [text]
+        if voice_clone_prompt is None:
+            voice_clone_prompt = self.create_voice_clone_prompt(ref_audio, ref_text, x_vector_only_mode)
+        if len(voice_clone_prompt) == 1:
+            voice_clone_prompt = voice_clone_prompt * len(texts)
+        voices = [float(item.ref_spk_embedding.sum()) for item in voice_clone_prompt]
+        return synthesize(texts, voices)
+
+
+def install(token_latency_ms: float = None, batch_overhead: float = None, load_s: float = None, prompt_ms: float = None,
+            cpu_matmuls: int = None, instruct_ms: float = None):
+    """
+    Registers this module as `qwen_tts` so the app imports the stub.
+    Must run before the app loads its models. The settings are also put in
+    the environment for install_from_env() in spawned inference processes.
+    """
+    if token_latency_ms is not None:
+        config.token_latency_ms = token_latency_ms
+    if batch_overhead is not None:
+        config.batch_overhead = batch_overhead
+    if load_s is not None:
+        config.load_s = load_s
+    if prompt_ms is not None:
+        config.prompt_ms = prompt_ms
+    if cpu_matmuls is not None:
+        config.cpu_matmuls = cpu_matmuls
+    if instruct_ms is not None:
+        config.instruct_ms = instruct_ms
+    os.environ[CONFIG_ENV] = json.dumps(asdict(config))
+
+    module = types.ModuleType("qwen_tts")
+    module.Qwen3TTSModel = Qwen3TTSModel
+    module.VoiceClonePromptItem = VoiceClonePromptItem
+    sys.modules["qwen_tts"] = module
+    return module
+
+
+def install_from_env():
+    """install() with the settings of the parent process, if it installed the stub."""
+    if CONFIG_ENV in os.environ:
+        install(**json.loads(os.environ[CONFIG_ENV]))
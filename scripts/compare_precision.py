@@ -0,0 +1,152 @@
+"""
+Compares QUANTIZATION modes on this machine.
+
+For every mode the VoiceDesign model is loaded in a fresh process (so resident
+memory is measured cleanly) and a fixed set of lines is synthesized with greedy
+decoding. Reports load time, resident memory, real-time factor and output drift
+against the fp32 ("none") reference.
+
+Usage:
+    python scripts/compare_precision.py                    # none, bf16, int8 (CPU) / none, fp16, bf16, int8 (GPU)
+    python scripts/compare_precision.py --modes none int8 --json precision_report.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# Add parent dir to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+LINES = [
+    "Welcome back, traveler. The gates of the northern keep are open once more.",
+    "Watch out! There's something moving in the shadows behind you.",
+    "I have traded with merchants from every port on this coast, and none of them drive a harder bargain than you.",
+]
+INSTRUCT = "A clear, professional voice suitable for gaming context."
+
+
+def run_worker(mode: str, out_path: str):
+    """
+    Child process: load the model in one mode, synthesize LINES, save results.
+    """
+    os.environ["QUANTIZATION"] = mode
+    import numpy as np
+    import torch
+    from app.services.model_manager import load_tts_model, model_memory_bytes, process_rss_bytes
+    from app.core.config import settings
+
+    rss_before = process_rss_bytes()
+    started = time.perf_counter()
+    model = load_tts_model(settings.TTS_MODEL_PATH)
+    load_s = time.perf_counter() - started
+
+    # Warm-up so the first-run setup cost doesn't skew the RTF
+    model.generate_voice_design(text="Warm up.", instruct=INSTRUCT, do_sample=False)
+
+    torch.manual_seed(0)
+    started = time.perf_counter()
+    wavs, sr = model.generate_voice_design(text=LINES, instruct=INSTRUCT, do_sample=False)
+    synth_s = time.perf_counter() - started
+    audio_s = sum(len(w) for w in wavs) / sr
+
+    np.savez(out_path + ".npz", *[np.asarray(w, dtype=np.float32) for w in wavs])
+    with open(out_path + ".json", "w") as f:
+        json.dump({
+            "mode": mode,
+            "precision": model.precision,
+            "load_s": round(load_s, 2),
+            "weights_mb": round(model_memory_bytes(model) / 1e6, 1),
+            "rss_mb": round((process_rss_bytes() - rss_before) / 1e6, 1),
+            "synth_s": round(synth_s, 2),
+            "audio_s": round(audio_s, 2),
+            "rtf": round(synth_s / audio_s, 3) if audio_s else None,
+            "sr": sr,
+        }, f)
+
+
+def spectral_drift(ref, other, sr: int) -> dict:
+    """
+    Output drift vs. the reference. Autoregressive outputs diverge in timing,
+    so compare duration and the time-averaged log-mel spectrum per line.
+    """
+    import numpy as np
+    import torch
+    import torchaudio
+
+    mel = torchaudio.transforms.MelSpectrogram(sample_rate=sr, n_fft=1024, hop_length=256, n_mels=80)
+    duration_delta, mel_l1 = [], []
+    for a, b in zip(ref, other):
+        duration_delta.append(abs(len(a) - len(b)) / max(len(a), 1))
+        ma = torch.log(mel(torch.from_numpy(a)) + 1e-5).mean(dim=-1)
+        mb = torch.log(mel(torch.from_numpy(b)) + 1e-5).mean(dim=-1)
+        mel_l1.append(float((ma - mb).abs().mean()))
+    return {
+        "duration_delta_pct": round(float(np.mean(duration_delta)) * 100, 1),
+        "mel_l1": round(float(np.mean(mel_l1)), 3),
+    }
+
+
+def main():
+    import numpy as np
+    import torch
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", help="QUANTIZATION modes to compare")
+    parser.add_argument("--json", help="Write the report to this file")
+    parser.add_argument("--worker", nargs=2, metavar=("MODE", "OUT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(*args.worker)
+        return
+
+    from app.core.config import settings
+
+    gpu = settings.USE_GPU and torch.cuda.is_available()
+    modes = args.modes or (["none", "fp16", "bf16", "int8"] if gpu else ["none", "bf16", "int8"])
+    if "none" not in modes:
+        modes = ["none"] + modes  # fp32 reference for drift
+
+    results = []
+    wavs = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in modes:
+            print(f"Measuring QUANTIZATION={mode}...")
+            out = os.path.join(tmp, mode)
+            proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", mode, out])
+            if proc.returncode != 0:
+                results.append({"mode": mode, "error": f"worker exited with {proc.returncode}"})
+                continue
+            with open(out + ".json") as f:
+                results.append(json.load(f))
+            with np.load(out + ".npz") as data:
+                wavs[mode] = [data[k] for k in data.files]
+
+    for r in results:
+        if r["mode"] in wavs and "none" in wavs:
+            r["drift"] = spectral_drift(wavs["none"], wavs[r["mode"]], r["sr"])
+
+    print()
+    print(f"{'mode':<6} {'precision':<14} {'load s':>7} {'weights MB':>11} {'RSS MB':>8} {'RTF':>6} {'dur Δ%':>7} {'mel L1':>7}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['mode']:<6} {r['error']}")
+            continue
+        drift = r.get("drift", {})
+        print(
+            f"{r['mode']:<6} {r['precision']:<14} {r['load_s']:>7} {r['weights_mb']:>11} {r['rss_mb']:>8} "
+            f"{r['rtf']:>6} {drift.get('duration_delta_pct', '-'):>7} {drift.get('mel_l1', '-'):>7}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"created_at": time.time(), "gpu": gpu, "results": results}, f, indent=2)
+        print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Exports the TTS models as local safetensors snapshots for fast cold starts.
+
+Each model (TTS_MODEL_PATH, TTS_CLONE_MODEL_PATH) is written to
+<out>/<name>/ with its weights already in the dtype QUANTIZATION loads them
+in. Point MODEL_SNAPSHOT_DIR at <out> and the server loads from there,
+memory-mapping CPU weights so processes on one host share them.
+Re-run after changing QUANTIZATION or the model paths.
+
+Usage:
+    python scripts/export_snapshot.py                          # both models -> vault/snapshots
+    python scripts/export_snapshot.py --models clone --out /srv/minestream/snapshots
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add parent dir to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.services.model_manager import MODEL_PATH_SETTINGS
+from app.services.precision import resolve_precision
+from app.services.snapshot import export_snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", nargs="+", default=list(MODEL_PATH_SETTINGS), choices=list(MODEL_PATH_SETTINGS))
+    parser.add_argument(
+        "--out",
+        default=settings.MODEL_SNAPSHOT_DIR or os.path.join(settings.BASE_DIR, "vault/snapshots"),
+        help="Snapshot root directory (default: MODEL_SNAPSHOT_DIR or vault/snapshots)",
+    )
+    args = parser.parse_args()
+
+    # Snapshots are written from CPU, in the dtype the serving device will use
+    plan = resolve_precision()
+    os.makedirs(args.out, exist_ok=True)
+    for name in args.models:
+        source = getattr(settings, MODEL_PATH_SETTINGS[name])
+        dest = os.path.join(args.out, name)
+        print(f"Exporting {name} from {source} ({plan.label}) to {dest}...")
+        started = time.perf_counter()
+        manifest = export_snapshot(name, source, dest, plan)
+        size_gb = sum(manifest["files"].values()) / 1e9
+        print(f"  {manifest['dtype']}, {size_gb:.2f} GB, {len(manifest['files'])} files in {time.perf_counter() - started:.1f}s")
+
+    print(f"\nSet MODEL_SNAPSHOT_DIR={os.path.abspath(args.out)} to load from the snapshots.")
+
+
+if __name__ == "__main__":
+    main()
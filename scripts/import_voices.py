@@ -0,0 +1,66 @@
+"""
+Imports a folder or archive of reference recordings as cloned voices.
+
+Clips are converted in parallel (INGEST_WORKERS processes), speaker
+features are extracted in batches of BULK_IMPORT_FEATURE_BATCH through the
+Base model, and all voices are added in one database transaction. Names
+and tags come from manifest.csv (file,name,tag[,prompt]) in archives,
+else from the file name and its folder. Failed clips are listed and skipped.
+
+Usage:
+    python scripts/import_voices.py recordings/               # tag = sub-folder or "Imported"
+    python scripts/import_voices.py voices.zip --tag Narrators
+    python scripts/import_voices.py voices.tar.gz --json > report.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+# Add parent dir to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import init_db
+from app.services.inference_executor import inference_executor
+from app.services.ingest_service import ingest_service
+from app.services.voice_import import voice_importer, BulkImportError
+
+
+async def run(source: str, tag: str) -> dict:
+    await init_db()
+    await inference_executor.start()
+    try:
+        if os.path.isdir(source):
+            return await voice_importer.import_directory(source, default_tag=tag)
+        return await voice_importer.import_archive(source, default_tag=tag)
+    finally:
+        await inference_executor.stop()
+        ingest_service.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="Directory, .zip or .tar(.gz) of audio files")
+    parser.add_argument("--tag", default="Imported", help="Tag for clips without a manifest entry or folder")
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    args = parser.parse_args()
+
+    try:
+        report = asyncio.run(run(args.source, args.tag))
+    except BulkImportError as e:
+        sys.exit(f"Import failed: {e}")
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for item in report["items"]:
+        if item["status"] == "failed":
+            print(f"  FAILED {item['file']}: {item['error']}")
+        else:
+            print(f"  {item['voice_id']}  {item['name']} [{item['tag']}]  {item['duration_s']}s, SNR {item['snr_db']} dB")
+    print(f"\n{report['imported']} imported, {report['failed']} failed.")
+
+
+if __name__ == "__main__":
+    main()
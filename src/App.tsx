@@ -31,6 +31,8 @@ function App() {
       const promptToSend = voiceMode === 'prompt' ? customVoicePrompt : undefined;
 
       const result = await api.generateVoice(script, idToSend, promptToSend);
+      // Inline audio lives in a blob URL; free the one being replaced
+      if (generatedAudio?.url.startsWith('blob:')) URL.revokeObjectURL(generatedAudio.url);
       setGeneratedAudio(result);
     } catch (error) {
       console.error(error);
@@ -106,7 +108,7 @@ function App() {
                     <Button
                       variant="ghost"
                       className="w-full text-xs uppercase tracking-widest"
-                      onClick={() => navigator.clipboard.writeText(generatedAudio.url)}
+                      onClick={() => navigator.clipboard.writeText(generatedAudio.path ?? generatedAudio.url)}
                     >
                       Copy Path
                     </Button>
@@ -1,5 +1,5 @@
-import { useState, useRef } from 'react';
-import { Trash2, Download, Upload, Loader2, Lock, Edit2, Check, X } from 'lucide-react';
+import { useState, useRef, useEffect } from 'react';
+import { Trash2, Download, Upload, Loader2, Lock, Edit2, Check, X, Search } from 'lucide-react';
 import { Card } from './ui/Card';
 import { useStore } from '../store/useStore';
 import { api } from '../services/api';
@@ -83,10 +83,18 @@ const UploadPanel = ({ onUploadComplete }: UploadPanelProps) => {
     );
 };
 export const VoiceVault = () => {
-    const { clonedVoices, removeVoice, voiceMode, setVoiceMode, selectedVoiceId, setSelectedVoiceId, customVoicePrompt, setCustomVoicePrompt, generatedAudio, fetchVoices, showToast } = useStore();
+    const { clonedVoices, removeVoice, voiceMode, setVoiceMode, selectedVoiceId, setSelectedVoiceId, customVoicePrompt, setCustomVoicePrompt, generatedAudio, fetchVoices, fetchMoreVoices, voiceQuery, isLoadingVoices, showToast } = useStore();
     const [isSaving, setIsSaving] = useState(false);
     const [editingId, setEditingId] = useState<string | null>(null);
     const [editName, setEditName] = useState('');
+    const [search, setSearch] = useState(voiceQuery);
+
+    // Search on the server, once typing pauses
+    useEffect(() => {
+        if (search === voiceQuery) return;
+        const timer = setTimeout(() => fetchVoices(search), 300);
+        return () => clearTimeout(timer);
+    }, [search, voiceQuery, fetchVoices]);
 
     return (
         <Card>
@@ -109,7 +117,25 @@ export const VoiceVault = () => {
 
             {/* Mode Content */}
             {voiceMode === 'library' && (
-                <div className="space-y-3 max-h-60 overflow-y-auto pr-1">
+                <>
+                <div className="relative mb-3">
+                    <Search size={14} className="absolute left-3 top-1/2 -translate-y-1/2 text-slate-500" />
+                    <input
+                        type="text"
+                        value={search}
+                        onChange={(e) => setSearch(e.target.value)}
+                        placeholder="Search voices..."
+                        className="w-full bg-slate-800 border border-slate-700 rounded-lg pl-8 pr-3 py-1.5 text-sm focus:outline-none focus:ring-1 focus:ring-indigo-500"
+                    />
+                </div>
+                <div
+                    className="space-y-3 max-h-60 overflow-y-auto pr-1"
+                    onScroll={(e) => {
+                        // Load the next page when scrolled near the bottom
+                        const el = e.currentTarget;
+                        if (el.scrollHeight - el.scrollTop - el.clientHeight < 100) fetchMoreVoices();
+                    }}
+                >
                     {clonedVoices.map((voice) => (
                         <div
                             key={voice.id}
@@ -190,12 +216,16 @@ export const VoiceVault = () => {
                             </div>
                         </div>
                     ))}
-                    {clonedVoices.length === 0 && (
+                    {isLoadingVoices && (
+                        <div className="flex justify-center py-2 text-slate-500"><Loader2 size={14} className="animate-spin" /></div>
+                    )}
+                    {clonedVoices.length === 0 && !isLoadingVoices && (
                         <div className="text-center py-6 text-slate-600 text-xs italic">
-                            No cloned voices found in vault.
+                            {voiceQuery ? 'No voices match your search.' : 'No cloned voices found in vault.'}
                         </div>
                     )}
                 </div>
+                </>
             )}
 
             {voiceMode === 'prompt' && (
@@ -16,6 +16,7 @@ export const api = {
                     voice_id: voiceId,
                     voice_prompt: voicePrompt,
                     speed: 1.0,
+                    response_mode: "inline", // Audio bytes in the response, no second download request
                 }),
             });
 
@@ -23,13 +24,16 @@ export const api = {
                 throw new Error("Failed to generate audio");
             }
 
-            const data = await response.json();
+            const blob = await response.blob();
+            const textProcessed = response.headers.get("X-Text-Processed");
+            const audioUrl = response.headers.get("X-Audio-Url");
 
             // Adapt backend response to GeneratedAudio interface
             return {
                 id: crypto.randomUUID(), // Backend doesn't return ID for the generation event itself yet, so we gen one for UI
-                url: `https://${window.location.hostname}:8000${data.audio_url}`, // Dynamic hostname for network access
-                script: data.text_processed,
+                url: URL.createObjectURL(blob), // Revoked by the caller when replaced
+                path: audioUrl ? `https://${window.location.hostname}:8000${audioUrl}` : undefined, // Dynamic hostname for network access
+                script: textProcessed ? decodeURIComponent(textProcessed) : text,
                 timestamp: Date.now(),
                 duration: 0 // We'll let WaveSurfer calculate the actual duration
             };
@@ -66,15 +70,19 @@ export const api = {
         }
     },
 
-    getVoices: async (): Promise<any[]> => {
+    getVoices: async (options: { cursor?: string | null; q?: string } = {}): Promise<{ voices: any[]; next_cursor: string | null }> => {
         try {
-            const response = await fetch(`${API_BASE_URL}/clone/list`);
+            // One page at a time; pass next_cursor back as cursor for the next one
+            const params = new URLSearchParams();
+            if (options.cursor) params.set("cursor", options.cursor);
+            if (options.q) params.set("q", options.q);
+            const response = await fetch(`${API_BASE_URL}/clone/list?${params}`);
             if (!response.ok) throw new Error("Failed to fetch voices");
             const data = await response.json();
-            return data.voices;
+            return { voices: data.voices, next_cursor: data.next_cursor };
         } catch (error) {
             console.error("Fetch Voices Error:", error);
-            return [];
+            return { voices: [], next_cursor: null };
         }
     },
 
@@ -6,6 +6,9 @@ interface AppState {
     script: string;
     voiceMode: VoiceMode;
     clonedVoices: VoiceProfile[];
+    voiceQuery: string;
+    voiceCursor: string | null; // next page of the voice list, null when all are loaded
+    isLoadingVoices: boolean;
     selectedVoiceId: string | null;
     generatedAudio: GeneratedAudio | null;
     isProcessing: boolean;
@@ -19,7 +22,8 @@ interface AppState {
     setIsProcessing: (isProcessing: boolean) => void;
     addVoice: (voice: VoiceProfile) => void;
     removeVoice: (id: string) => void;
-    fetchVoices: () => Promise<void>;
+    fetchVoices: (query?: string) => Promise<void>;
+    fetchMoreVoices: () => Promise<void>;
 
     // Dynamic Voice
     customVoicePrompt: string;
@@ -33,11 +37,14 @@ interface AppState {
 
 import { api } from '../services/api';
 
-export const useStore = create<AppState>((set) => ({
+export const useStore = create<AppState>((set, get) => ({
     mode: 'GENERATE',
     script: '',
     voiceMode: 'library',
     clonedVoices: [], // Empty initially
+    voiceQuery: '',
+    voiceCursor: null,
+    isLoadingVoices: false,
     selectedVoiceId: null, // Track selected voice
     generatedAudio: null,
     isProcessing: false,
@@ -60,10 +67,23 @@ export const useStore = create<AppState>((set) => ({
     showToast: (message, type = 'info') => set({ toast: { message, type } }),
     hideToast: () => set({ toast: null }),
 
-    fetchVoices: async () => {
-        const voices = await api.getVoices();
-        set({ clonedVoices: voices });
+    fetchVoices: async (query) => {
+        // First page only; the vault loads more on scroll (fetchMoreVoices)
+        const voiceQuery = query ?? get().voiceQuery;
+        set({ voiceQuery, isLoadingVoices: true });
+        const { voices, next_cursor } = await api.getVoices({ q: voiceQuery });
+        if (get().voiceQuery !== voiceQuery) return; // a newer search is in flight
+        set({ clonedVoices: voices, voiceCursor: next_cursor, isLoadingVoices: false });
         // Select first voice by default if available
-        if (voices.length > 0) set({ selectedVoiceId: voices[0].id });
+        if (voices.length > 0 && !get().selectedVoiceId) set({ selectedVoiceId: voices[0].id });
+    },
+
+    fetchMoreVoices: async () => {
+        const { voiceQuery, voiceCursor, isLoadingVoices } = get();
+        if (!voiceCursor || isLoadingVoices) return;
+        set({ isLoadingVoices: true });
+        const { voices, next_cursor } = await api.getVoices({ cursor: voiceCursor, q: voiceQuery });
+        if (get().voiceQuery !== voiceQuery) return;
+        set((state) => ({ clonedVoices: [...state.clonedVoices, ...voices], voiceCursor: next_cursor, isLoadingVoices: false }));
     }
 }));
@@ -5,6 +5,9 @@ export interface VoiceProfile {
     type?: 'cloned' | 'locked' | 'preset';
     prompt?: string;
     previewUrl?: string;
+    duration_s?: number | null; // Reference quality (cloned/locked voices)
+    snr_db?: number | null;
+    clipping_ratio?: number | null;
 }
 
 export type AppMode = 'GENERATE' | 'CLONE';
@@ -14,6 +17,7 @@ export type VoiceMode = 'prompt' | 'library' | 'upload';
 export interface GeneratedAudio {
     id: string;
     url: string;
+    path?: string; // Server copy in the vault (inline responses play from a blob URL)
     script: string;
     timestamp: number;
     duration: number;